@@ -7,12 +7,23 @@ import sqlite3
 from datetime import datetime, timedelta
 import random
 
+# model_version of the hand-labelled sample rows
+SAMPLE_DATA_VERSION = 'sample-data'
+
 def add_sample_data():
     """Add sample sentiment analysis data for the last 7 days"""
     
     conn = sqlite3.connect('article_history.db')
     cursor = conn.cursor()
     
+    # Rows record the model version that scored them; these are hand-labelled, so they get their own
+    # version and the app's re-scoring job replaces them with the current model's sentiment
+    try:
+        cursor.execute('ALTER TABLE articles ADD COLUMN model_version TEXT')
+    except sqlite3.OperationalError:
+        # Column already exists
+        pass
+    
     # Sample news titles and content
     sample_data = [
         ("Positive", "Technology breakthrough brings hope", "Scientists have made a significant breakthrough in renewable energy technology, promising a cleaner future for everyone."),
@@ -50,8 +61,9 @@ def add_sample_data():
                 cursor.execute('''
                     INSERT INTO articles 
                     (title, content, sentiment, confidence, summary, language, writing_style, 
-                     clickbait_score, key_details, word_count, readability_score, timestamp, content_hash)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     clickbait_score, key_details, word_count, readability_score, timestamp, content_hash,
+                     model_version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     title_variation,
                     content,
@@ -65,7 +77,8 @@ def add_sample_data():
                     len(content.split()),  # word_count
                     random.uniform(60, 85),  # readability_score
                     date.strftime('%Y-%m-%d %H:%M:%S'),  # timestamp
-                    f"hash_{i}_{j}_{random.randint(1000, 9999)}"  # content_hash
+                    f"hash_{i}_{j}_{random.randint(1000, 9999)}",  # content_hash
+                    SAMPLE_DATA_VERSION  # model_version
                 ))
             except Exception as e:
                 print(f"Error inserting article: {e}")
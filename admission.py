@@ -0,0 +1,157 @@
+"""
+Admission control for the expensive endpoints.
+
+Requests are sorted into endpoint classes: 'media' (video transcription,
+image OCR, large text-file uploads) and 'analysis' (/predict and
+/analyze-article with their word clouds, ordinary text files). Each class
+runs at most ADMISSION_<CLASS>_CONCURRENCY requests at a time per process;
+up to ADMISSION_<CLASS>_QUEUE more wait in FIFO order for at most
+ADMISSION_<CLASS>_QUEUE_TIMEOUT seconds. Anything beyond that is turned away
+immediately with 503 and a Retry-After estimated from recent service times,
+instead of piling up until every server thread is busy.
+
+Endpoints without a class (/history, /sentiment-distribution, /metrics, ...)
+are never queued, so they stay responsive however much media work is
+waiting. serve.py sizes its thread pool so the classes' running and queued
+requests can't take every thread.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+MEDIA = 'media'
+ANALYSIS = 'analysis'
+
+# Concurrency, queue length and queue timeout per class (per process)
+CLASS_LIMITS = {
+    MEDIA: {
+        'concurrency': int(os.getenv('ADMISSION_MEDIA_CONCURRENCY', '2')),
+        'queue': int(os.getenv('ADMISSION_MEDIA_QUEUE', '2')),
+        'queue_timeout': float(os.getenv('ADMISSION_MEDIA_QUEUE_TIMEOUT', '30'))
+    },
+    ANALYSIS: {
+        'concurrency': int(os.getenv('ADMISSION_ANALYSIS_CONCURRENCY', str(os.cpu_count() or 2))),
+        'queue': int(os.getenv('ADMISSION_ANALYSIS_QUEUE', '8')),
+        'queue_timeout': float(os.getenv('ADMISSION_ANALYSIS_QUEUE_TIMEOUT', '10'))
+    }
+}
+
+# Flask endpoint (view function name) -> class
+ENDPOINT_CLASSES = {
+    'transcribe_video': MEDIA,
+    'process_image': MEDIA,
+    'process_text_file': ANALYSIS,
+    'predict': ANALYSIS,
+    'analyze_article': ANALYSIS
+}
+# Text-file uploads larger than this are treated as media work
+ADMISSION_LARGE_UPLOAD_BYTES = int(os.getenv('ADMISSION_LARGE_UPLOAD_BYTES', str(256 * 1024)))
+MAX_RETRY_AFTER = 120
+# Weight of the latest request in the service-time average used for Retry-After
+SERVICE_TIME_SMOOTHING = 0.2
+
+ADMISSION_QUEUE_SECONDS = metrics.histogram(
+    'news_sentiment_admission_queue_seconds',
+    'Time admitted requests waited for a slot, per endpoint class', ('endpoint_class',))
+ADMISSION_REJECTED = metrics.counter(
+    'news_sentiment_admission_rejected_total',
+    'Requests turned away with 503 per endpoint class and reason (queue_full, timeout)',
+    ('endpoint_class', 'reason'))
+ADMISSION_IN_FLIGHT = metrics.gauge(
+    'news_sentiment_admission_in_flight',
+    'Requests running per endpoint class', ('endpoint_class',))
+ADMISSION_QUEUED = metrics.gauge(
+    'news_sentiment_admission_queued',
+    'Requests waiting for a slot per endpoint class', ('endpoint_class',))
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted; retry_after is in seconds"""
+
+    def __init__(self, endpoint_class, reason, retry_after):
+        super().__init__(f"{endpoint_class} requests are at capacity ({reason})")
+        self.endpoint_class = endpoint_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+class Limiter:
+    """Concurrency limit with a bounded FIFO queue for one endpoint class"""
+
+    def __init__(self, name, concurrency, queue, queue_timeout):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.service_time = 1.0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        ADMISSION_IN_FLIGHT.set_function(lambda: self.running, endpoint_class=name)
+        ADMISSION_QUEUED.set_function(lambda: len(self._waiters), endpoint_class=name)
+
+    def retry_after(self):
+        """Seconds until a slot is likely free, from the recent service time and queue length"""
+        backlog = (len(self._waiters) + 1) / self.concurrency
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(self.service_time * backlog)))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; returns seconds waited or raises AdmissionRejected"""
+        with self._lock:
+            if self.running < self.concurrency and not self._waiters:
+                self.running += 1
+                ADMISSION_QUEUE_SECONDS.observe(0.0, endpoint_class=self.name)
+                return 0.0
+            if len(self._waiters) >= self.queue:
+                ADMISSION_REJECTED.inc(endpoint_class=self.name, reason='queue_full')
+                raise AdmissionRejected(self.name, 'queue_full', self.retry_after())
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+
+        start = time.perf_counter()
+        granted = waiter.wait(self.queue_timeout)
+        waited = time.perf_counter() - start
+        with self._lock:
+            # release() may have handed over the slot just as the wait timed out
+            if not granted and not waiter.is_set():
+                self._waiters.remove(waiter)
+                ADMISSION_REJECTED.inc(endpoint_class=self.name, reason='timeout')
+                raise AdmissionRejected(self.name, 'timeout', self.retry_after())
+        ADMISSION_QUEUE_SECONDS.observe(waited, endpoint_class=self.name)
+        return waited
+
+    def release(self, duration=None):
+        """Free a slot, handing it straight to the longest-waiting request"""
+        with self._lock:
+            if duration is not None:
+                self.service_time += SERVICE_TIME_SMOOTHING * (duration - self.service_time)
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self.running -= 1
+
+    def snapshot(self):
+        return {'concurrency': self.concurrency, 'queue': self.queue, 'running': self.running,
+                'queued': len(self._waiters), 'service_time': round(self.service_time, 3)}
+
+_limiters = {name: Limiter(name, **limits) for name, limits in CLASS_LIMITS.items()}
+
+def classify(endpoint, content_length=None):
+    """Endpoint class of a request, or None for endpoints that are never queued"""
+    endpoint_class = ENDPOINT_CLASSES.get(endpoint)
+    if endpoint == 'process_text_file' and (content_length or 0) > ADMISSION_LARGE_UPLOAD_BYTES:
+        return MEDIA
+    return endpoint_class
+
+def get(endpoint_class):
+    return _limiters[endpoint_class]
+
+def max_held():
+    """Most requests the classes can hold at once (running plus queued) in one process"""
+    return sum(limiter.concurrency + limiter.queue for limiter in _limiters.values())
+
+def snapshot():
+    return {name: limiter.snapshot() for name, limiter in _limiters.items()}
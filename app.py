@@ -16,75 +16,46 @@ import heapq
 import sqlite3
 from datetime import datetime, timedelta
 import hashlib
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import requests
-import feedparser
-from langdetect import detect
-from langdetect.lang_detect_exception import LangDetectException
-import textstat
-from wordcloud import WordCloud
+import threading
+import shutil
+import importlib.util
 import base64
 from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from dotenv import load_dotenv
+import metrics
+import tracing
+import profiling
+import app_logging
+import feed_state
+import feed_parser
+import news_cache
+import http_client
+import circuit_breaker
+import rate_limiter
+import translation
+import language_id
+import model_registry
+import rescore
+import admission
+import scheduler
+import latency_budget
 # --- OCR for image processing ---
-try:
-    import pytesseract
-    from PIL import Image
-    
-    # Configure Tesseract path - try common Windows locations
-    import shutil
-    tesseract_cmd = shutil.which('tesseract')
-    if tesseract_cmd:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-        print(f"✅ Tesseract found at: {tesseract_cmd}")
-        OCR_AVAILABLE = True
-    else:
-        # Try common Windows installation paths
-        possible_paths = [
-            r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-            r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-            r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', '')),
-            'tesseract'  # Assume it's in PATH
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path) or path == 'tesseract':
-                pytesseract.pytesseract.tesseract_cmd = path
-                try:
-                    # Test Tesseract
-                    test_img = Image.new('RGB', (100, 50), color='white')
-                    pytesseract.image_to_string(test_img)
-                    print(f"✅ Tesseract configured successfully: {path}")
-                    OCR_AVAILABLE = True
-                    break
-                except Exception as e:
-                    print(f"⚠️ Tesseract test failed for {path}: {e}")
-                    continue
-        else:
-            OCR_AVAILABLE = False
-            print("⚠️ Tesseract OCR not found. Image processing will be disabled.")
-    
-    if OCR_AVAILABLE:
-        print("✅ OCR libraries loaded successfully!")
-        
-except ImportError as e:
-    OCR_AVAILABLE = False
-    print(f"⚠️ OCR libraries not available: {e}")
-except Exception as e:
-    OCR_AVAILABLE = False
-    print(f"⚠️ OCR configuration failed: {e}")
-# --- Google Cloud Translate for multilingual support ---
-import os
-os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = 'dummy'  # We'll use API key instead
-from google.cloud import translate_v2 as translate
+# pytesseract and PIL are imported on first use (see ocr_available)
+TESSERACT_WINDOWS_PATHS = [
+    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+    r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', ''))
+]
+_ocr_status = None
 
 # --- Google Cloud Speech-to-Text for video transcription ---
-from google.cloud import speech
+# google.cloud.speech is imported when the speech client is first needed
 import tempfile
 import subprocess
-import json
 # --- Longformer Fake News Detection Integration ---
 # Temporarily commented out due to import issues
 # from transformers import AutoTokenizer, AutoModelForSequenceClassification
@@ -93,28 +64,58 @@ import json
 # Load environment variables
 load_dotenv()
 
-# Download NLTK data if not already present
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
+# Component loggers (levels configurable via LOG_LEVEL / LOG_LEVELS)
+app_logging.configure_logging()
+pipeline_logger = app_logging.get_logger('pipeline')
+news_logger = app_logging.get_logger('news')
+translate_logger = app_logging.get_logger('translate')
+storage_logger = app_logging.get_logger('storage')
+
+# NLTK data is read from a local directory (fill it with download_nltk_data.py); missing
+# data is downloaded there once at startup, never while serving requests
+NLTK_DATA_DIR = os.getenv('NLTK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+if NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+def nltk_resource_available(*paths):
+    """True if any of the given NLTK resource paths can be found locally"""
+    for path in paths:
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            continue
+    return False
+
+def check_nltk_data():
+    """Raise unless the tokenizer and stopwords are installed locally (python download_nltk_data.py)
+    
+    Nothing is downloaded at import. The model was trained on NLTK's tokenizer and stopwords, so
+    there is no substitute either: any other preprocessing would silently change its predictions.
+    """
+    # punkt_tab replaces punkt in newer NLTK releases
+    required = (('tokenizers/punkt_tab', 'tokenizers/punkt'), ('corpora/stopwords',))
+    if not all(nltk_resource_available(*paths) for paths in required):
+        raise RuntimeError(f"NLTK tokenizer/stopwords data not found in {NLTK_DATA_DIR}. "
+                           f"Run: python download_nltk_data.py")
+
+check_nltk_data()
 
 app = Flask(__name__)
 
-# Global variables for model components
-model = None
-vectorizer = None
-label_encoder = None
+# Global variables for model components (the sentiment model lives in model_registry)
 summarization_system = None
 stop_words = set(stopwords.words('english'))
 stemmer = PorterStemmer()
 
+# SQLite database holding the article history (overridable for benchmarks/tests)
+DATABASE_PATH = os.getenv('ARTICLE_HISTORY_DB', 'article_history.db')
+
 # Initialize database for article history
+@metrics.timed_db
 def init_database():
     """Initialize SQLite database for storing article history"""
-    conn = sqlite3.connect('article_history.db')
+    conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -133,16 +134,18 @@ def init_database():
             readability_score REAL,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
             content_hash TEXT UNIQUE,
-            is_live_analysis BOOLEAN DEFAULT 0
+            is_live_analysis BOOLEAN DEFAULT 0,
+            model_version TEXT
         )
     ''')
     
-    # Add the is_live_analysis column if it doesn't exist (for existing databases)
-    try:
-        cursor.execute('ALTER TABLE articles ADD COLUMN is_live_analysis BOOLEAN DEFAULT 0')
-    except sqlite3.OperationalError:
-        # Column already exists, ignore the error
-        pass
+    # Add the is_live_analysis and model_version columns if they don't exist (for existing databases)
+    for column in ('is_live_analysis BOOLEAN DEFAULT 0', 'model_version TEXT'):
+        try:
+            cursor.execute(f'ALTER TABLE articles ADD COLUMN {column}')
+        except sqlite3.OperationalError:
+            # Column already exists, ignore the error
+            pass
     
     conn.commit()
     conn.close()
@@ -152,12 +155,17 @@ newsapi_key = None
 try:
     newsapi_key = os.getenv('NEWS_API_KEY')
     if newsapi_key:
-        print(f"✅ Mediastack API key loaded: {newsapi_key[:10]}...")
+        print("✅ News API key loaded")
     else:
         print("⚠️  No News API key found in environment")
 except Exception as e:
     print(f"⚠️  Error loading News API: {e}")
 
+# Upstream API endpoints (overridable so load tests can point at local stand-ins)
+MEDIASTACK_API_URL = os.getenv('MEDIASTACK_API_URL', 'http://api.mediastack.com/v1/news')
+NEWSAPI_API_URL = os.getenv('NEWSAPI_API_URL', 'https://newsapi.org/v2/top-headlines')
+GOOGLE_TRANSLATE_API_URL = os.getenv('GOOGLE_TRANSLATE_API_URL', 'https://translation.googleapis.com/language/translate/v2')
+
 # RSS Feed URLs for news
 RSS_FEEDS = [
     'https://rss.cnn.com/rss/edition.rss',
@@ -167,31 +175,49 @@ RSS_FEEDS = [
     'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.rss'
 ]
 
+# Feeds tried by fetch_rss_news; RSS_FEED_URLS (comma-separated) replaces the defaults
+ENHANCED_RSS_FEEDS = [url.strip() for url in os.getenv('RSS_FEED_URLS', '').split(',') if url.strip()] or [
+    'https://rss.cnn.com/rss/edition.rss',
+    'https://feeds.bbci.co.uk/news/rss.xml',
+    'https://feeds.reuters.com/reuters/topNews',
+    'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.rss',
+    'https://feeds.npr.org/1001/rss.xml',
+    'https://www.theguardian.com/world/rss',
+    'https://feeds.washingtonpost.com/rss/world',
+    'https://abcnews.go.com/abcnews/topstories'
+]
+
+# News fetching deadlines (seconds): each feed gets RSS_FETCH_TIMEOUT, all feeds together RSS_FETCH_DEADLINE,
+# and fetch_trending_news waits at most NEWS_FETCH_DEADLINE for the API/RSS race
+RSS_FETCH_TIMEOUT = float(os.getenv('RSS_FETCH_TIMEOUT', '4'))
+RSS_FETCH_DEADLINE = float(os.getenv('RSS_FETCH_DEADLINE', '5'))
+NEWS_FETCH_DEADLINE = float(os.getenv('NEWS_FETCH_DEADLINE', '6'))
+# How long the news API gets before RSS is started alongside it (0 = start both at once)
+NEWS_HEDGE_DELAY = float(os.getenv('NEWS_HEDGE_DELAY', '0.3'))
+
+# Feeds are fetched in parallel; API/RSS races get their own pool so they never wait on feed workers
+rss_fetch_executor = ThreadPoolExecutor(max_workers=max(1, len(ENHANCED_RSS_FEEDS)), thread_name_prefix='rss-fetch')
+news_source_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='news-source')
+
+def submit_with_context(executor, function, *args):
+    """Submit work that keeps the caller's request context (metrics, tracing, logging)"""
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
 def load_models():
     """Load the trained models and preprocessors"""
-    global model, vectorizer, label_encoder, summarization_system
+    global summarization_system
     
     models_dir = 'models'
     
     try:
-        # Load sentiment analysis model metadata
-        with open(os.path.join(models_dir, 'model_metadata.json'), 'r') as f:
-            metadata = json.load(f)
-        
-        # Load the best sentiment model
-        model_file = metadata['model_files']['model']
-        model_path = os.path.join(models_dir, model_file)
-        model = joblib.load(model_path)
-        
-        # Load vectorizer
-        vectorizer_path = os.path.join(models_dir, 'tfidf_vectorizer.pkl')
-        vectorizer = joblib.load(vectorizer_path)
-        
-        # Load label encoder
-        label_encoder_path = os.path.join(models_dir, 'label_encoder.pkl')
-        label_encoder = joblib.load(label_encoder_path)
+        # Sentiment model, vectorizer and label encoder as one versioned bundle
+        # (memory-mapped artifacts when exported, otherwise the pickles)
+        bundle = model_registry.load_initial(models_dir)
+        if bundle is None:
+            return None
+        metadata = bundle.metadata
         
-        print("✅ Sentiment analysis models loaded successfully!")
+        print(f"✅ Sentiment analysis models loaded successfully! (version {bundle.version}, from {bundle.source})")
         print(f"Best model: {metadata['best_model']}")
         print(f"Model performance: {metadata['model_performance']}")
         
@@ -216,28 +242,7 @@ def load_models():
         print(f"❌ Error loading models: {e}")
         return None
 
-def detect_language(text):
-    """Detect language of the text"""
-    try:
-        language = detect(text)
-        # Map some common language codes to readable names
-        lang_map = {
-            'en': 'English',
-            'es': 'Spanish', 
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'zh': 'Chinese',
-            'ja': 'Japanese',
-            'ar': 'Arabic',
-            'hi': 'Hindi'
-        }
-        return lang_map.get(language, language.upper())
-    except LangDetectException:
-        return 'Unknown'
-
+@tracing.traced()
 def detect_writing_style(text):
     """Detect if writing style is formal or informal"""
     formal_indicators = [
@@ -278,6 +283,7 @@ def detect_writing_style(text):
     else:
         return 'Neutral'
 
+@tracing.traced()
 def detect_clickbait(title, content):
     """Detect if content might be clickbait"""
     if not title:
@@ -308,12 +314,13 @@ def detect_clickbait(title, content):
     max_possible_score = len(clickbait_patterns) + 1
     return min(clickbait_score / max_possible_score, 1.0)
 
+@tracing.traced()
 def calculate_readability(text):
     """Calculate readability score using Flesch Reading Ease"""
     try:
         # Ensure we have meaningful text
         if not text or len(text.strip()) < 50:
-            print(f"DEBUG: Text too short for readability analysis: {len(text.strip())} chars")
+            pipeline_logger.debug("Text too short for readability analysis: %d chars", len(text.strip()) if text else 0)
             return 50.0  # Default moderate score for very short text
         
         # Clean text for better analysis
@@ -322,12 +329,13 @@ def calculate_readability(text):
         clean_content = re.sub(r'\s+', ' ', clean_content).strip()  # Clean whitespace
         
         if len(clean_content) < 50:
-            print(f"DEBUG: Cleaned text too short: {len(clean_content)} chars")
+            pipeline_logger.debug("Cleaned text too short: %d chars", len(clean_content))
             return 50.0
             
-        print(f"DEBUG: Calculating readability for text: {len(clean_content)} chars")
+        pipeline_logger.debug("Calculating readability for text: %d chars", len(clean_content))
+        import textstat
         score = textstat.flesch_reading_ease(clean_content)
-        print(f"DEBUG: Readability score calculated: {score}")
+        pipeline_logger.debug("Readability score calculated: %s", score)
         
         # Ensure score is within reasonable bounds
         if score < 0:
@@ -338,9 +346,10 @@ def calculate_readability(text):
             return float(score)
             
     except Exception as e:
-        print(f"DEBUG: Readability calculation error: {e}")
+        pipeline_logger.warning("Readability calculation error: %s", e)
         return 50.0  # Default moderate score on error
 
+@tracing.traced()
 def detect_news_genre(title, text):
     """Detect the genre/category of news based on content"""
     combined_text = f"{title} {text}".lower()
@@ -405,18 +414,18 @@ def detect_news_genre(title, text):
     else:
         return 'General News'
 
+@tracing.traced()
 def extract_important_keywords(text, max_keywords=8):
     """Extract the most important keywords from text in a simple format"""
     try:
-        print(f"DEBUG: Extracting keywords from text: {len(text)} chars")
         if not text or len(text.strip()) < 20:
-            print("DEBUG: Text too short for keyword extraction")
+            pipeline_logger.debug("Text too short for keyword extraction")
             return []
         
         # Clean and preprocess text
         clean_content = clean_text(text)
         if not clean_content:
-            print("DEBUG: No clean content after preprocessing")
+            pipeline_logger.debug("No clean content after preprocessing")
             return []
         
         # Tokenize and filter
@@ -431,10 +440,10 @@ def extract_important_keywords(text, max_keywords=8):
                 not token.isdigit())
         ]
         
-        print(f"DEBUG: Filtered tokens: {len(filtered_tokens)}")
+        pipeline_logger.debug("Keyword extraction: %d chars, %d filtered tokens", len(text), len(filtered_tokens))
         
         if not filtered_tokens:
-            print("DEBUG: No filtered tokens found")
+            pipeline_logger.debug("No filtered tokens found")
             return []
         
         # Count word frequencies
@@ -442,7 +451,6 @@ def extract_important_keywords(text, max_keywords=8):
         
         # Get top frequent words
         common_words = word_freq.most_common(max_keywords * 2)
-        print(f"DEBUG: Common words: {common_words[:5]}")
         
         # Simple keyword extraction - just get the most frequent meaningful words
         keywords = []
@@ -472,36 +480,36 @@ def extract_important_keywords(text, max_keywords=8):
                         'frequency': freq
                     })
         
-        print(f"DEBUG: Extracted {len(keywords)} keywords: {[k['word'] for k in keywords]}")
+        if pipeline_logger.isEnabledFor(logging.DEBUG):
+            pipeline_logger.debug("Extracted %d keywords: %s", len(keywords), [k['word'] for k in keywords])
         return keywords[:max_keywords]
         
     except Exception as e:
-        print(f"DEBUG: Keyword extraction error: {e}")
+        pipeline_logger.warning("Keyword extraction error: %s", e)
         return []
 
 def generate_word_cloud(text):
     """Generate word cloud as base64 image with enhanced error handling"""
     try:
-        print(f"🎨 Starting word cloud generation for text length: {len(text)}")
-        
         # Clean and prepare text
         cleaned_text = clean_text(text)
-        print(f"🧹 Cleaned text length: {len(cleaned_text)}")
+        pipeline_logger.debug("🎨 Word cloud: %d chars, %d after cleaning", len(text), len(cleaned_text))
         
         if len(cleaned_text) < 10:
-            print(f"⚠️ Text too short for word cloud: {len(cleaned_text)} chars")
+            pipeline_logger.debug("⚠️ Text too short for word cloud: %d chars", len(cleaned_text))
             return None
         
         # Check if we have meaningful words
         words = cleaned_text.split()
         if len(words) < 5:
-            print(f"⚠️ Not enough words for word cloud: {len(words)} words")
+            pipeline_logger.debug("⚠️ Not enough words for word cloud: %d words", len(words))
             return None
         
-        print(f"📊 Generating word cloud with {len(words)} words...")
+        pipeline_logger.debug("📊 Generating word cloud with %d words...", len(words))
         
         # Generate word cloud with error handling
         try:
+            from wordcloud import WordCloud
             wordcloud = WordCloud(
                 width=400, 
                 height=200, 
@@ -511,58 +519,58 @@ def generate_word_cloud(text):
                 relative_scaling=0.5,
                 min_font_size=10
             ).generate(cleaned_text)
-            
-            print(f"✅ Word cloud object created successfully")
         except Exception as wc_error:
-            print(f"❌ WordCloud generation failed: {wc_error}")
+            pipeline_logger.warning("❌ WordCloud generation failed: %s", wc_error)
             return None
         
         # Convert to base64
         try:
+            # A standalone Figure (Agg canvas) instead of pyplot's global state, which isn't thread-safe
+            from matplotlib.figure import Figure
             img_buffer = BytesIO()
-            plt.figure(figsize=(8, 4), facecolor='white')
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.tight_layout(pad=0)
-            plt.savefig(img_buffer, format='png', bbox_inches='tight', 
-                       dpi=100, facecolor='white', edgecolor='none')
-            plt.close()
+            figure = Figure(figsize=(8, 4), facecolor='white')
+            axes = figure.add_subplot()
+            axes.imshow(wordcloud, interpolation='bilinear')
+            axes.axis('off')
+            figure.tight_layout(pad=0)
+            figure.savefig(img_buffer, format='png', bbox_inches='tight', 
+                           dpi=100, facecolor='white', edgecolor='none')
             
             img_buffer.seek(0)
             img_data = img_buffer.read()
             
             if len(img_data) == 0:
-                print(f"❌ Empty image buffer")
+                pipeline_logger.warning("❌ Empty word cloud image buffer")
                 return None
                 
             img_str = base64.b64encode(img_data).decode()
-            print(f"✅ Word cloud converted to base64: {len(img_str)} chars")
+            pipeline_logger.debug("✅ Word cloud converted to base64: %d chars", len(img_str))
             return img_str
             
         except Exception as img_error:
-            print(f"❌ Image conversion failed: {img_error}")
+            pipeline_logger.warning("❌ Word cloud image conversion failed: %s", img_error)
             return None
         
     except Exception as e:
-        print(f"❌ Word cloud generation error: {e}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        pipeline_logger.exception("❌ Word cloud generation error: %s", e)
         return None
 
+@metrics.timed_db
 def save_article_to_history(title, content, result, is_live_analysis=False):
-    """Save analyzed article to history database"""
+    """Save analyzed article to history database (result must carry the model_version that scored it)"""
     try:
         # Create content hash to avoid duplicates
         content_hash = hashlib.md5((title + content).encode()).hexdigest()
         
-        conn = sqlite3.connect('article_history.db')
+        conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT OR REPLACE INTO articles 
             (title, content, sentiment, confidence, summary, language, writing_style, 
-             clickbait_score, key_details, word_count, readability_score, content_hash, is_live_analysis)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             clickbait_score, key_details, word_count, readability_score, content_hash, is_live_analysis,
+             model_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             title,
             content[:1000],  # Limit content length
@@ -576,7 +584,8 @@ def save_article_to_history(title, content, result, is_live_analysis=False):
             result.get('word_count', 0),
             result.get('readability_score', 0.0),
             content_hash,
-            is_live_analysis
+            is_live_analysis,
+            result['model_version']
         ))
         
         conn.commit()
@@ -584,18 +593,19 @@ def save_article_to_history(title, content, result, is_live_analysis=False):
         return True
         
     except Exception as e:
-        print(f"Error saving to history: {e}")
+        storage_logger.error("Error saving to history: %s", e)
         return False
 
+@metrics.timed_db
 def get_article_history(limit=50):
     """Get recent article analysis history"""
     try:
-        conn = sqlite3.connect('article_history.db')
+        conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
         cursor.execute('''
             SELECT id, title, content, sentiment, confidence, summary, timestamp, language, 
-                   writing_style, clickbait_score, word_count 
+                   writing_style, clickbait_score, word_count, model_version 
             FROM articles 
             ORDER BY timestamp DESC 
             LIMIT ?
@@ -617,19 +627,21 @@ def get_article_history(limit=50):
                 'language': row[7],
                 'writing_style': row[8],
                 'clickbait_score': row[9],
-                'word_count': row[10]
+                'word_count': row[10],
+                'model_version': row[11]
             })
         
         return history
         
     except Exception as e:
-        print(f"Error retrieving history: {e}")
+        storage_logger.error("Error retrieving history: %s", e)
         return []
 
+@metrics.timed_db
 def get_sentiment_distribution(days=7):
     """Get sentiment distribution data for the last N days/hours for stock-like chart - LIVE ANALYSES ONLY"""
     try:
-        conn = sqlite3.connect('article_history.db')
+        conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         
         # Determine grouping strategy and time calculation based on time period
@@ -890,33 +902,35 @@ def get_sentiment_distribution(days=7):
         return complete_timeline
         
     except Exception as e:
-        print(f"Error retrieving sentiment distribution: {e}")
+        storage_logger.error("Error retrieving sentiment distribution: %s", e)
         return []
 
+@metrics.timed_db
 def clear_article_history():
     """Clear all article history"""
     try:
-        conn = sqlite3.connect('article_history.db')
+        conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         cursor.execute('DELETE FROM articles')
         conn.commit()
         conn.close()
         return True
     except Exception as e:
-        print(f"Error clearing history: {e}")
+        storage_logger.error("Error clearing history: %s", e)
         return False
 
+@metrics.timed_db
 def clear_live_analysis_data():
     """Clear only live analysis data (for chart reset)"""
     try:
-        conn = sqlite3.connect('article_history.db')
+        conn = sqlite3.connect(DATABASE_PATH)
         cursor = conn.cursor()
         cursor.execute('DELETE FROM articles WHERE is_live_analysis = 1')
         conn.commit()
         conn.close()
         return True
     except Exception as e:
-        print(f"Error clearing live analysis data: {e}")
+        storage_logger.error("Error clearing live analysis data: %s", e)
         return False
 
 def analyze_trending_news_all_categories():
@@ -924,140 +938,279 @@ def analyze_trending_news_all_categories():
     categories = ['general', 'business', 'technology', 'health', 'science', 'sports', 'entertainment']
     total_analyzed = 0
     
-    print("🔄 Starting automated trending news analysis for all categories...")
+    news_logger.info("🔄 Starting automated trending news analysis for all categories...")
+    
+    def analyze_and_save(category, article):
+        # Perform sentiment analysis
+        result = analyze_sentiment(article['title'], article['content'], include_wordcloud=False)
+        if 'error' in result:
+            news_logger.warning("⚠️  Analysis error: %s", result['error'])
+            return False
+        # Save to database as live analysis (so it appears on chart)
+        save_article_to_history(
+            f"[{category.upper()}] {article['title']}", 
+            article['content'], 
+            result, 
+            is_live_analysis=True
+        )
+        news_logger.debug("✅ Analyzed: %.50s... | Sentiment: %s", article['title'], result['sentiment'])
+        return True
     
+    # One ingestion-priority unit per article: they use idle analysis slots and yield to interactive requests
+    futures = []
     for category in categories:
         try:
-            print(f"📰 Analyzing {category} news...")
+            news_logger.debug("📰 Analyzing %s news...", category)
             articles = fetch_trending_news(category, 'us')
             
             for article in articles[:3]:  # Limit to 3 articles per category to avoid overwhelming
                 if article.get('title') and article.get('content'):
-                    try:
-                        # Perform sentiment analysis
-                        result = predict_sentiment(article['title'], article['content'], include_wordcloud=False)
-                        
-                        if 'error' not in result:
-                            # Save to database as live analysis (so it appears on chart)
-                            save_article_to_history(
-                                f"[{category.upper()}] {article['title']}", 
-                                article['content'], 
-                                result, 
-                                is_live_analysis=True
-                            )
-                            total_analyzed += 1
-                            print(f"✅ Analyzed: {article['title'][:50]}... | Sentiment: {result['sentiment']}")
-                        else:
-                            print(f"⚠️  Analysis error: {result['error']}")
-                    except Exception as e:
-                        print(f"❌ Error analyzing article: {e}")
-                        continue
-            
-            # Small delay between categories to avoid overwhelming the system
-            time.sleep(0.5)
+                    futures.append(scheduler.submit(scheduler.INGESTION, analyze_and_save, category, article))
             
         except Exception as e:
-            print(f"❌ Error processing {category} news: {e}")
+            news_logger.warning("❌ Error processing %s news: %s", category, e)
             continue
     
-    print(f"✅ Completed automated analysis! Total articles analyzed: {total_analyzed}")
+    for future in futures:
+        try:
+            total_analyzed += future.result()
+        except Exception as e:
+            news_logger.warning("❌ Error analyzing article: %s", e)
+    
+    news_logger.info("✅ Completed automated analysis! Total articles analyzed: %d", total_analyzed)
     return total_analyzed
 
-def fetch_rss_news(max_articles=10):
-    """Fetch latest news from RSS feeds with better error handling"""
-    articles = []
-    
-    # Enhanced RSS feeds with more sources
-    enhanced_rss_feeds = [
-        'https://rss.cnn.com/rss/edition.rss',
-        'https://feeds.bbci.co.uk/news/rss.xml',
-        'https://feeds.reuters.com/reuters/topNews',
-        'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.rss',
-        'https://feeds.npr.org/1001/rss.xml',
-        'https://www.theguardian.com/world/rss',
-        'https://feeds.washingtonpost.com/rss/world',
-        'https://abcnews.go.com/abcnews/topstories'
-    ]
+# Shown when no news source answers
+SAMPLE_ARTICLES = [
+    {
+        'title': 'Technology Advances Continue to Shape Modern Life',
+        'content': 'Recent developments in technology are transforming how we work, communicate, and live our daily lives.',
+        'url': '#',
+        'published': '2025-01-01',
+        'source': 'Sample News'
+    },
+    {
+        'title': 'Global Markets Show Positive Growth Trends',
+        'content': 'Financial markets around the world are displaying encouraging signs of stability and growth.',
+        'url': '#',
+        'published': '2025-01-01',
+        'source': 'Sample Business'
+    },
+    {
+        'title': 'Healthcare Innovation Brings New Treatment Options',
+        'content': 'Medical researchers announce breakthrough treatments that could improve patient outcomes significantly.',
+        'url': '#',
+        'published': '2025-01-01',
+        'source': 'Sample Health'
+    }
+]
+
+def fetch_rss_feed(feed_url, limit, timeout=None):
+    """Fetch and parse one RSS feed; returns up to `limit` articles"""
+    state = feed_state.get_state(feed_url)
+    if not feed_state.poll_due(state):
+        feed_state.FEED_POLLS.inc(result='cached')
+        return state['articles'][:limit]
     
-    successful_feeds = 0
-    target_feeds = min(4, len(enhanced_rss_feeds))  # Try up to 4 feeds
+    news_logger.debug("🔄 Fetching RSS from: %s", feed_url)
+    with metrics.outbound('rss') as call:
+        try:
+            response = http_client.get(feed_url, service='rss', headers=feed_state.conditional_headers(state),
+                                       timeout=timeout or (http_client.HTTP_CONNECT_TIMEOUT, RSS_FETCH_TIMEOUT))
+        except requests.RequestException:
+            feed_state.FEED_POLLS.inc(result='error')
+            if state and state['articles']:
+                # Serve the last good copy; the next request polls again
+                call.outcome = 'error'
+                return state['articles'][:limit]
+            raise
+        
+        if response.status_code == 304 and state:
+            # Unchanged: reuse the stored articles without parsing
+            call.outcome = 'not_modified'
+            feed_state.FEED_POLLS.inc(result='not_modified')
+            feed_state.defer_poll(feed_url, feed_state.next_poll_time(response.headers),
+                                  response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return state['articles'][:limit]
+        
+        if response.status_code != 200:
+            call.outcome = 'error'
+            feed_state.FEED_POLLS.inc(result='error')
+            news_logger.warning("⚠️ RSS feed %s returned %s", feed_url, response.status_code)
+            if state:
+                # Back off as the feed asked (Retry-After) and keep serving the stored copy
+                feed_state.defer_poll(feed_url, feed_state.next_poll_time(response.headers))
+                return state['articles'][:limit]
+            return []
+        feed = feed_parser.parse(response.content, limit=feed_state.FEED_STATE_MAX_ENTRIES)
+        if feed['bozo'] and not feed['entries']:
+            call.outcome = 'error'
     
-    for feed_url in enhanced_rss_feeds:
-        if successful_feeds >= target_feeds:
-            break
-            
+    articles = []
+    source = feed['title'] or 'RSS Feed'
+    for entry in feed['entries']:
         try:
-            print(f"🔄 Fetching RSS from: {feed_url}")
-            feed = feedparser.parse(feed_url)
+            # Clean and validate entry data
+            title = entry['title'].strip()
+            content = entry['summary'].strip()
             
-            if hasattr(feed, 'entries') and len(feed.entries) > 0:
-                feed_articles = 0
-                articles_per_feed = max_articles // target_feeds
-                
-                for entry in feed.entries[:articles_per_feed + 2]:  # Get a few extra
-                    try:
-                        if feed_articles >= articles_per_feed:
-                            break
-                            
-                        # Clean and validate entry data
-                        title = entry.get('title', '').strip()
-                        content = entry.get('summary', entry.get('description', '')).strip()
-                        
-                        if title and len(title) > 10:  # Ensure meaningful title
-                            articles.append({
-                                'title': title,
-                                'content': content[:500] if content else title,  # Limit content length
-                                'url': entry.get('link', ''),
-                                'published': entry.get('published', ''),
-                                'source': feed.feed.get('title', 'RSS Feed')
-                            })
-                            feed_articles += 1
-                    except Exception as entry_error:
-                        print(f"⚠️ Error processing entry: {entry_error}")
-                        continue
-                
-                if feed_articles > 0:
-                    successful_feeds += 1
-                    print(f"✅ RSS: Got {feed_articles} articles from {feed.feed.get('title', 'Unknown')}")
-                
-        except Exception as e:
-            print(f"⚠️ RSS feed error for {feed_url}: {e}")
+            if title and len(title) > 10:  # Ensure meaningful title
+                articles.append({
+                    'title': title,
+                    'content': content[:500] if content else title,  # Limit content length
+                    'url': entry['link'],
+                    'published': entry['published'],
+                    'source': source
+                })
+        except Exception as entry_error:
+            news_logger.debug("⚠️ Error processing entry: %s", entry_error)
             continue
     
+    if articles:
+        feed_state.FEED_POLLS.inc(result='fetched')
+        feed_state.save_state(feed_url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                              articles, feed_state.next_poll_time(response.headers, feed['ttl']))
+        news_logger.debug("✅ RSS: Got %d articles from %s", len(articles), source)
+    else:
+        feed_state.FEED_POLLS.inc(result='error')
+    return articles[:limit]
+
+def collect_rss_articles(max_articles=10, deadline=None):
+    """Fetch all RSS feeds concurrently and keep the ones that answer before the deadline"""
+    feeds = ENHANCED_RSS_FEEDS
+    if not feeds:
+        return []
+    target_feeds = min(4, len(feeds))  # Use up to 4 feeds
+    articles_per_feed = max(1, max_articles // target_feeds)
+    deadline = RSS_FETCH_DEADLINE if deadline is None else deadline
+    
+    futures = {submit_with_context(rss_fetch_executor, fetch_rss_feed, url, articles_per_feed): index
+               for index, url in enumerate(feeds)}
+    results = {}
+    pending = set(futures)
+    end_time = time.perf_counter() + deadline
+    
+    # Take feeds as they answer until enough have content or the deadline passes
+    while pending and len(results) < target_feeds:
+        remaining = end_time - time.perf_counter()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                feed_articles = future.result()
+            except Exception as e:
+                news_logger.warning("⚠️ RSS feed error for %s: %s", feeds[futures[future]], e)
+                continue
+            if feed_articles:
+                results[futures[future]] = feed_articles
+    
+    if pending:
+        # Late feeds keep running in the background; their results are dropped
+        news_logger.debug("⏱️ %d RSS feed(s) missed the %.1fs deadline", len(pending), deadline)
+        for future in pending:
+            future.cancel()
+    
+    # Keep the configured feed order among the feeds that answered
+    articles = []
+    for index in sorted(results)[:target_feeds]:
+        articles.extend(results[index])
+    return articles[:max_articles]
+
+def fetch_rss_news(max_articles=10):
+    """Fetch latest news from RSS feeds with better error handling"""
+    articles = collect_rss_articles(max_articles)
+    
     # Add some sample articles if no RSS feeds work
     if not articles:
-        print("📝 Using sample articles as fallback")
-        articles = [
-            {
-                'title': 'Technology Advances Continue to Shape Modern Life',
-                'content': 'Recent developments in technology are transforming how we work, communicate, and live our daily lives.',
-                'url': '#',
-                'published': '2025-01-01',
-                'source': 'Sample News'
-            },
-            {
-                'title': 'Global Markets Show Positive Growth Trends',
-                'content': 'Financial markets around the world are displaying encouraging signs of stability and growth.',
-                'url': '#',
-                'published': '2025-01-01',
-                'source': 'Sample Business'
-            },
-            {
-                'title': 'Healthcare Innovation Brings New Treatment Options',
-                'content': 'Medical researchers announce breakthrough treatments that could improve patient outcomes significantly.',
-                'url': '#',
-                'published': '2025-01-01',
-                'source': 'Sample Health'
-            }
-        ]
+        news_logger.warning("📝 No RSS feed answered, using sample articles as fallback")
+        articles = list(SAMPLE_ARTICLES)
     
-    print(f"📊 Total RSS articles collected: {len(articles)}")
+    news_logger.info("📊 Total RSS articles collected: %d", len(articles))
     return articles[:max_articles]
 
-# Cache for API responses
-news_cache = {}
-cache_duration = 300  # 5 minutes
+def news_api_providers():
+    """News API providers the configured key may belong to, in the order they are tried"""
+    providers = []
+    if newsapi_key and len(newsapi_key) > 20:  # Mediastack keys are longer
+        providers.append('mediastack')
+    if newsapi_key and len(newsapi_key) <= 32:  # NewsAPI.org keys are shorter
+        providers.append('newsapi')
+    return providers
+
+def fetch_from_news_apis(category, country, priority=rate_limiter.NORMAL):
+    """Fetch from the configured news API(s); returns [] when none is configured, allowed or successful"""
+    fetchers = {'mediastack': fetch_from_mediastack, 'newsapi': fetch_from_newsapi}
+    for provider in news_api_providers():
+        # Skip calls the provider's quota can't take instead of letting them fail
+        if not rate_limiter.acquire(provider, priority):
+            news_logger.debug("💸 %s quota reached, skipping %s/%s", provider, category, country)
+            continue
+        articles = fetchers[provider](category, country)
+        if articles:
+            return articles
+    
+    return []
+
+def fetch_rss_for_category(category):
+    """Fetch RSS articles and keep those matching the category keywords"""
+    articles = collect_rss_articles(10)
+    
+    # Filter by category if possible
+    if category != 'general' and articles:
+        filtered_articles = []
+        category_keywords = {
+            'business': ['business', 'finance', 'economy', 'market', 'stock'],
+            'technology': ['tech', 'technology', 'software', 'ai', 'digital'],
+            'health': ['health', 'medical', 'healthcare', 'doctor', 'medicine'],
+            'sports': ['sport', 'football', 'basketball', 'game', 'team'],
+            'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'show']
+        }
+        
+        keywords = category_keywords.get(category, [])
+        for article in articles:
+            article_text = f"{article.get('title', '')} {article.get('content', '')}".lower()
+            if any(keyword in article_text for keyword in keywords):
+                filtered_articles.append(article)
+        
+        articles = filtered_articles[:10] if filtered_articles else articles[:5]
+    
+    return articles
+
+def race_news_sources(category, country, priority=rate_limiter.NORMAL):
+    """Race the news API against RSS feeds; the first non-empty result wins"""
+    end_time = time.perf_counter() + NEWS_FETCH_DEADLINE
+    sources = {}
+    if newsapi_key:
+        api_future = submit_with_context(news_source_executor, fetch_from_news_apis, category, country, priority)
+        sources[api_future] = 'api'
+        # Hedge: give the API a head start before paying for the RSS fetches
+        wait([api_future], timeout=NEWS_HEDGE_DELAY)
+        if api_future.done() and not api_future.exception() and api_future.result():
+            return api_future.result(), 'api'
+    sources[submit_with_context(news_source_executor, fetch_rss_for_category, category)] = 'rss'
+    
+    pending = set(sources)
+    while pending:
+        remaining = end_time - time.perf_counter()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                articles = future.result()
+            except Exception as e:
+                news_logger.warning("❌ %s news source error: %s", sources[future], e)
+                continue
+            if articles:
+                return articles, sources[future]
+    
+    return [], None
 
+# Cache for trending news (bounded, stale-while-revalidate; see news_cache.py)
+trending_news_cache = news_cache.create_cache()
+
+@tracing.traced()
 def deduplicate_articles(articles):
     """Remove duplicate articles based on title similarity"""
     if not articles:
@@ -1084,76 +1237,57 @@ def deduplicate_articles(articles):
             # If titles are 80% similar or more, consider it a duplicate
             if similarity >= 0.8:
                 is_duplicate = True
-                print(f"🔄 Skipping duplicate article: '{title[:50]}...' (similar to existing)")
+                news_logger.debug("🔄 Skipping duplicate article: '%.50s...' (similar to existing)", title)
                 break
         
         if not is_duplicate:
             unique_articles.append(article)
             seen_titles.append(title)
             
-    print(f"🔍 Deduplication: {len(articles)} -> {len(unique_articles)} articles")
+    news_logger.debug("🔍 Deduplication: %d -> %d articles", len(articles), len(unique_articles))
     return unique_articles
 
 def fetch_trending_news(category='general', country='us'):
     """Fetch trending news using multiple APIs with fallback to RSS feeds"""
-    print(f"🔍 fetch_trending_news called with category={category}, country={country}")
+    news_logger.debug("🔍 fetch_trending_news called with category=%s, country=%s", category, country)
     
-    # Create cache key
+    # Expired entries are served while a background task refreshes them
     cache_key = f"{category}_{country}"
-    current_time = time.time()
-    
-    # Check cache first
-    if cache_key in news_cache:
-        cached_data, cached_time = news_cache[cache_key]
-        if current_time - cached_time < cache_duration:
-            print(f"📋 Using cached data for {cache_key}")
-            return cached_data
-    
-    # Try Mediastack API first if configured
-    if newsapi_key and len(newsapi_key) > 20:  # Mediastack keys are longer
-        articles = fetch_from_mediastack(category, country)
-        if articles:
-            articles = deduplicate_articles(articles)
-            news_cache[cache_key] = (articles, current_time)
-            return articles
-    
-    # Try NewsAPI.org if configured
-    if newsapi_key and len(newsapi_key) <= 32:  # NewsAPI.org keys are shorter
-        articles = fetch_from_newsapi(category, country)
-        if articles:
-            articles = deduplicate_articles(articles)
-            news_cache[cache_key] = (articles, current_time)
-            return articles
-    
-    # Fallback to RSS feeds
-    print("🔄 Falling back to RSS feeds...")
-    articles = fetch_rss_news(10)
+    rate_limiter.record_demand(cache_key)
+    try:
+        return trending_news_cache.get_or_fetch(cache_key, lambda: fetch_trending_news_uncached(category, country))
+    except NoNewsSources:
+        # Nothing cached and no source answered; the samples are not cached, so the next call tries again
+        news_logger.info("🔄 No news source answered in time for %s, using sample articles", cache_key)
+        return deduplicate_articles(list(SAMPLE_ARTICLES))
+
+class NoNewsSources(Exception):
+    """Raised when no news source returned articles, so a cached entry is never replaced by samples"""
+
+def fetch_trending_news_uncached(category, country):
+    """Race the news sources for one category/country and deduplicate the winner"""
+    cache_key = f"{category}_{country}"
+    priority = rate_limiter.priority_for(cache_key)
     
-    # Filter by category if possible
-    if category != 'general' and articles:
-        filtered_articles = []
-        category_keywords = {
-            'business': ['business', 'finance', 'economy', 'market', 'stock'],
-            'technology': ['tech', 'technology', 'software', 'ai', 'digital'],
-            'health': ['health', 'medical', 'healthcare', 'doctor', 'medicine'],
-            'sports': ['sport', 'football', 'basketball', 'game', 'team'],
-            'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'show']
-        }
-        
-        keywords = category_keywords.get(category, [])
-        for article in articles:
-            article_text = f"{article.get('title', '')} {article.get('content', '')}".lower()
-            if any(keyword in article_text for keyword in keywords):
-                filtered_articles.append(article)
-        
-        articles = filtered_articles[:10] if filtered_articles else articles[:5]
+    # With the news API quota used up, keep serving what we have rather than swapping in RSS
+    providers = news_api_providers()
+    if providers and not any(rate_limiter.has_budget(provider, priority) for provider in providers):
+        cached = trending_news_cache.peek(cache_key)
+        if cached is not None:
+            news_logger.info("💸 News API quota reached, keeping cached articles for %s", cache_key)
+            return cached
     
-    # Apply deduplication to RSS articles as well
-    articles = deduplicate_articles(articles)
+    articles, source = race_news_sources(category, country, priority)
+    if not source:
+        raise NoNewsSources(f"no news source answered for {cache_key}")
+    news_logger.debug("🏁 %s answered first for %s", source, cache_key)
     
-    # Cache the results
-    news_cache[cache_key] = (articles, current_time)
-    return articles
+    return deduplicate_articles(articles)
+
+def retry_after_seconds(response, default=60):
+    """Seconds to back off after a 429, from Retry-After when it is a number"""
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.strip().isdigit() else default
 
 def fetch_from_mediastack(category, country):
     """Fetch from Mediastack API"""
@@ -1180,7 +1314,7 @@ def fetch_from_mediastack(category, country):
         }
         
         # Build API URL for Mediastack
-        base_url = 'http://api.mediastack.com/v1/news'
+        base_url = MEDIASTACK_API_URL
         params = {
             'access_key': newsapi_key,
             'limit': 10,
@@ -1194,14 +1328,19 @@ def fetch_from_mediastack(category, country):
         if country != 'global' and country in country_map:
             params['countries'] = country_map[country]
         
-        print(f"📡 Making Mediastack request with params: {params}")
-        response = requests.get(base_url, params=params, timeout=5)
-        
-        if response.status_code != 200:
-            print(f"❌ Mediastack API Error: {response.status_code}")
-            return []
+        news_logger.debug("📡 Making Mediastack request: categories=%s countries=%s",
+                          params.get('categories'), params.get('countries'))
+        with metrics.outbound('mediastack') as call:
+            response = http_client.get(base_url, service='mediastack', params=params)
             
-        data = response.json()
+            if response.status_code != 200:
+                call.outcome = 'error'
+                news_logger.warning("❌ Mediastack API Error: %s", response.status_code)
+                if response.status_code == 429:
+                    rate_limiter.penalize('mediastack', retry_after_seconds(response))
+                return []
+                
+            data = response.json()
         articles = []
         
         for article in data.get('data', []):
@@ -1223,11 +1362,14 @@ def fetch_from_mediastack(category, country):
                     'image_url': article.get('image')
                 })
         
-        print(f"✅ Mediastack: {len(articles)} articles")
+        news_logger.debug("✅ Mediastack: %d articles", len(articles))
         return articles
         
+    except circuit_breaker.CircuitOpenError:
+        news_logger.debug("⏭️ Mediastack circuit open, skipping")
+        return []
     except Exception as e:
-        print(f"❌ Mediastack error: {e}")
+        news_logger.warning("❌ Mediastack error: %s", e)
         return []
 
 def fetch_from_newsapi(category, country):
@@ -1244,7 +1386,7 @@ def fetch_from_newsapi(category, country):
             'technology': 'technology'
         }
         
-        base_url = 'https://newsapi.org/v2/top-headlines'
+        base_url = NEWSAPI_API_URL
         params = {
             'apiKey': newsapi_key,
             'pageSize': 10,
@@ -1254,14 +1396,19 @@ def fetch_from_newsapi(category, country):
         if category != 'general' and category in category_map:
             params['category'] = category_map[category]
         
-        print(f"📡 Making NewsAPI request with params: {params}")
-        response = requests.get(base_url, params=params, timeout=5)
-        
-        if response.status_code != 200:
-            print(f"❌ NewsAPI Error: {response.status_code}")
-            return []
+        news_logger.debug("📡 Making NewsAPI request: category=%s country=%s",
+                          params.get('category'), params.get('country'))
+        with metrics.outbound('newsapi') as call:
+            response = http_client.get(base_url, service='newsapi', params=params)
             
-        data = response.json()
+            if response.status_code != 200:
+                call.outcome = 'error'
+                news_logger.warning("❌ NewsAPI Error: %s", response.status_code)
+                if response.status_code == 429:
+                    rate_limiter.penalize('newsapi', retry_after_seconds(response))
+                return []
+                
+            data = response.json()
         articles = []
         
         for article in data.get('articles', []):
@@ -1281,28 +1428,32 @@ def fetch_from_newsapi(category, country):
                     'image_url': article.get('urlToImage')
                 })
         
-        print(f"✅ NewsAPI: {len(articles)} articles")
+        news_logger.debug("✅ NewsAPI: %d articles", len(articles))
         return articles
         
+    except circuit_breaker.CircuitOpenError:
+        news_logger.debug("⏭️ NewsAPI circuit open, skipping")
+        return []
     except Exception as e:
-        print(f"❌ NewsAPI error: {e}")
+        news_logger.warning("❌ NewsAPI error: %s", e)
         return []
 
 def find_similar_articles(content, history_limit=100):
     """Find similar articles from history using basic text similarity"""
     try:
-        conn = sqlite3.connect('article_history.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT title, content, sentiment, confidence 
-            FROM articles 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        ''', (history_limit,))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with metrics.db_operation('find_similar_articles'):
+            conn = sqlite3.connect(DATABASE_PATH)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT title, content, sentiment, confidence 
+                FROM articles 
+                ORDER BY timestamp DESC 
+                LIMIT ?
+            ''', (history_limit,))
+            
+            rows = cursor.fetchall()
+            conn.close()
         
         if not rows:
             return []
@@ -1334,9 +1485,10 @@ def find_similar_articles(content, history_limit=100):
         return similar_articles[:5]
         
     except Exception as e:
-        print(f"Error finding similar articles: {e}")
+        storage_logger.error("Error finding similar articles: %s", e)
         return []
 
+@tracing.traced()
 def clean_text(text):
     """Comprehensive text cleaning function"""
     if not text or text == '':
@@ -1362,6 +1514,7 @@ def clean_text(text):
     
     return text
 
+@tracing.traced()
 def preprocess_text(text, remove_stopwords=True, apply_stemming=False):
     """Advanced text preprocessing with tokenization, stopword removal, and stemming"""
     if not text or text == '':
@@ -1411,7 +1564,7 @@ def generate_enhanced_summary(text, max_sentences=2):
         #     return summary, key_details
             
     except Exception as e:
-        print(f"Enhanced summarization error: {e}")
+        pipeline_logger.warning("Enhanced summarization error: %s", e)
         # Fallback to rule-based methods
         summary = summarize_text_fallback(text, max_sentences=max_sentences)
         key_details = extract_key_details(text)
@@ -1479,6 +1632,7 @@ def generate_video_summary(transcription, max_sentences=3):
         # Fallback to basic enhanced summary
         return generate_enhanced_summary(transcription, max_sentences=max_sentences)
 
+@tracing.traced()
 def extract_video_topics(transcription):
     """
     Extract main topics and themes from video transcription
@@ -1540,14 +1694,37 @@ def extract_video_topics(transcription):
         print(f"⚠️ Topic extraction failed: {e}")
         return []
 
+def ocr_available():
+    """Check (once) that pytesseract, PIL and a Tesseract binary are installed, without running OCR"""
+    global _ocr_status
+    if _ocr_status is None:
+        if not (importlib.util.find_spec('pytesseract') and importlib.util.find_spec('PIL')):
+            print("⚠️ OCR libraries not available: pytesseract/Pillow not installed")
+            _ocr_status = False
+            return _ocr_status
+        tesseract_cmd = shutil.which('tesseract') or next(
+            (path for path in TESSERACT_WINDOWS_PATHS if os.path.exists(path)), None)
+        if tesseract_cmd:
+            import pytesseract
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+            print(f"✅ Tesseract found at: {tesseract_cmd}")
+            _ocr_status = True
+        else:
+            print("⚠️ Tesseract OCR not found. Image processing will be disabled.")
+            _ocr_status = False
+    return _ocr_status
+
 def extract_text_from_image(image_file):
     """
     Extract text from image using OCR (Optical Character Recognition)
     """
     try:
-        if not OCR_AVAILABLE:
+        if not ocr_available():
             return None, "OCR is not available. Please ensure Tesseract is installed and in your system PATH."
         
+        import pytesseract
+        from PIL import Image
+        
         print(f"🔍 Processing image with OCR...")
         
         # Open the image
@@ -1630,13 +1807,13 @@ def is_image_file(filename):
     image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}
     return any(filename.lower().endswith(ext) for ext in image_extensions)
 
+@tracing.traced()
 def summarize_text_fallback(text, max_sentences=3):
     """
     Generate an enhanced extractive summary with important details highlighted
     """
     try:
         # Split into sentences
-        from nltk.tokenize import sent_tokenize
         sentences = sent_tokenize(text)
         
         if len(sentences) <= max_sentences:
@@ -1719,6 +1896,7 @@ def summarize_text_fallback(text, max_sentences=3):
         except:
             return text[:500] + "..."
 
+@tracing.traced()
 def extract_key_details(text):
     """Extract key details from text for enhanced analysis"""
     try:
@@ -1774,34 +1952,46 @@ def initialize_translator():
         class GoogleTranslateClient:
             def __init__(self, api_key):
                 self.api_key = api_key
-                self.base_url = 'https://translation.googleapis.com/language/translate/v2'
+                self.base_url = GOOGLE_TRANSLATE_API_URL
             
             def translate(self, text, target_language='en', source_language=None):
-                import requests
-                params = {
+                results = self.translate_batch([text], target_language, source_language)
+                return results[0] if results else None
+            
+            def translate_batch(self, texts, target_language='en', source_language=None, deadline=None):
+                """Translate several texts in one request (one `q` per text); None on failure"""
+                # Sent as a form body: long texts don't fit in a query string
+                data = {
                     'key': self.api_key,
-                    'q': text,
+                    'q': list(texts),
                     'target': target_language,
                     'format': 'text'
                 }
                 if source_language:
-                    params['source'] = source_language
+                    data['source'] = source_language
                 
                 try:
-                    response = requests.post(self.base_url, params=params, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
+                    with metrics.outbound('translate'):
+                        response = http_client.post(self.base_url, service='translate', data=data,
+                                                    deadline=deadline)
+                        response.raise_for_status()
+                        payload = response.json()
                     
-                    if 'data' in data and 'translations' in data['data']:
-                        translation = data['data']['translations'][0]
-                        return {
-                            'translatedText': translation['translatedText'],
-                            'detectedSourceLanguage': translation.get('detectedSourceLanguage', source_language)
-                        }
+                    if 'data' in payload and 'translations' in payload['data']:
+                        return [
+                            {
+                                'translatedText': translation['translatedText'],
+                                'detectedSourceLanguage': translation.get('detectedSourceLanguage', source_language)
+                            }
+                            for translation in payload['data']['translations']
+                        ]
                     else:
-                        raise Exception(f"Translation failed: {data}")
+                        raise Exception(f"Translation failed: {payload}")
+                except circuit_breaker.CircuitOpenError:
+                    translate_logger.debug("⏭️ Translate circuit open, keeping original text")
+                    return None
                 except Exception as e:
-                    print(f"Translation API error: {e}")
+                    translate_logger.warning("Translation API error: %s", e)
                     return None
         
         translate_client = GoogleTranslateClient(GOOGLE_TRANSLATE_API_KEY)
@@ -1825,6 +2015,7 @@ def initialize_speech_client():
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = key_path
         
         # Create the speech client
+        from google.cloud import speech
         speech_client = speech.SpeechClient()
         print("✅ Google Cloud Speech-to-Text initialized successfully!")
         return speech_client
@@ -1833,127 +2024,30 @@ def initialize_speech_client():
         print(f"❌ Error initializing Google Cloud Speech-to-Text: {e}")
         return None
 
-def detect_language_advanced(text):
-    """Enhanced language detection with more details"""
-    try:
-        language_code = detect(text)
-        
-        # Extended language mapping
-        lang_map = {
-            'en': 'English',
-            'es': 'Spanish', 
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'zh': 'Chinese',
-            'ja': 'Japanese',
-            'ar': 'Arabic',
-            'hi': 'Hindi',
-            'ko': 'Korean',
-            'th': 'Thai',
-            'vi': 'Vietnamese',
-            'tr': 'Turkish',
-            'pl': 'Polish',
-            'nl': 'Dutch',
-            'sv': 'Swedish',
-            'da': 'Danish',
-            'no': 'Norwegian',
-            'fi': 'Finnish',
-            'cs': 'Czech',
-            'hu': 'Hungarian',
-            'ro': 'Romanian',
-            'bg': 'Bulgarian',
-            'hr': 'Croatian',
-            'sk': 'Slovak',
-            'sl': 'Slovenian',
-            'et': 'Estonian',
-            'lv': 'Latvian',
-            'lt': 'Lithuanian',
-            'el': 'Greek',
-            'he': 'Hebrew',
-            'fa': 'Persian',
-            'ur': 'Urdu',
-            'bn': 'Bengali',
-            'ta': 'Tamil',
-            'te': 'Telugu',
-            'ml': 'Malayalam',
-            'kn': 'Kannada',
-            'gu': 'Gujarati',
-            'pa': 'Punjabi',
-            'mr': 'Marathi',
-            'ne': 'Nepali',
-            'si': 'Sinhala',
-            'my': 'Myanmar',
-            'km': 'Khmer',
-            'lo': 'Lao',
-            'ka': 'Georgian',
-            'am': 'Amharic',
-            'sw': 'Swahili',
-            'zu': 'Zulu',
-            'af': 'Afrikaans',
-            'sq': 'Albanian',
-            'eu': 'Basque',
-            'be': 'Belarusian',
-            'bs': 'Bosnian',
-            'ca': 'Catalan',
-            'cy': 'Welsh',
-            'eo': 'Esperanto',
-            'fo': 'Faroese',
-            'fy': 'Frisian',
-            'ga': 'Irish',
-            'gd': 'Scottish Gaelic',
-            'gl': 'Galician',
-            'is': 'Icelandic',
-            'jw': 'Javanese',
-            'lb': 'Luxembourgish',
-            'mk': 'Macedonian',
-            'mg': 'Malagasy',
-            'ms': 'Malay',
-            'mt': 'Maltese',
-            'mn': 'Mongolian',
-            'sr': 'Serbian',
-            'tl': 'Filipino',
-            'uk': 'Ukrainian',
-            'uz': 'Uzbek',
-            'yi': 'Yiddish'
-        }
-        
-        return {
-            'code': language_code,
-            'name': lang_map.get(language_code, language_code.upper()),
-            'is_english': language_code == 'en'
-        }
-    except LangDetectException:
-        return {
-            'code': 'unknown',
-            'name': 'Unknown',
-            'is_english': False
-        }
+def clean_for_translation(text):
+    """Remove mixed characters that might cause issues in translation"""
+    cleaned_text = ''.join(char for char in text if ord(char) < 127 or ord(char) > 160)
+    if len(cleaned_text) < len(text) * 0.5:  # If too much was removed, use original
+        return text
+    return cleaned_text
 
-def translate_text(text, target_language='en', source_language=None):
-    """Translate text using Google Cloud Translate with enhanced error handling"""
-    global translate_client
-    
-    if not translate_client:
-        translate_client = initialize_translator()
-        if not translate_client:
-            print("❌ Translation client not available")
-            return None
+def translate_texts(texts, target_language='en', source_language=None):
+    """Translate several texts with one batched, cached call; returns a result dict (or None) per text"""
+    client = get_translate_client()
+    if not client:
+        translate_logger.warning("❌ Translation client not available")
+        return [None] * len(texts)
     
     try:
-        # Detect source language if not provided
+        # Detect source language only if the caller hasn't already
         if not source_language:
-            detected = detect_language_advanced(text)
+            detected = language_id.detect(' '.join(texts))
             source_language = detected['code']
         
-        print(f"🔄 Translation request: {source_language} → {target_language}")
-        print(f"📝 Text preview: {text[:100]}...")
+        translate_logger.debug("🔄 Translation request: %s → %s (%d texts, %d chars)", source_language,
+                               target_language, len(texts), sum(len(text) for text in texts))
         
-        # Skip translation if already in target language
-        if source_language == target_language:
-            print(f"✅ Text already in target language ({target_language})")
+        def unchanged(text):
             return {
                 'translated_text': text,
                 'source_language': source_language,
@@ -1961,46 +2055,124 @@ def translate_text(text, target_language='en', source_language=None):
                 'confidence': 1.0
             }
         
-        # Clean text before translation (remove mixed characters that might cause issues)
-        cleaned_text = ''.join(char for char in text if ord(char) < 127 or ord(char) > 160)
-        if len(cleaned_text) < len(text) * 0.5:  # If too much was removed, use original
-            cleaned_text = text
+        # Skip translation if already in target language
+        if source_language == target_language:
+            translate_logger.debug("✅ Text already in target language (%s)", target_language)
+            return [unchanged(text) for text in texts]
+        
+        cleaned_texts = [clean_for_translation(text) for text in texts]
+        
+        # Empty texts (e.g. a missing title) never go to the API
+        indexes = [index for index, text in enumerate(cleaned_texts) if text.strip()]
+        results = [unchanged(text) if not text.strip() else None for text in texts]
+        if not indexes:
+            return results
         
-        # Perform translation
-        result = translate_client.translate(
-            cleaned_text,
+        translations = translation.translate_batch(
+            client,
+            [cleaned_texts[index] for index in indexes],
             target_language=target_language,
             source_language=source_language
         )
         
-        translated = result['translatedText']
-        print(f"✅ Translation successful: {translated[:100]}...")
-        
-        return {
-            'translated_text': translated,
-            'source_language': result.get('detectedSourceLanguage', source_language),
-            'target_language': target_language,
-            'confidence': 0.9  # Google Translate doesn't provide confidence scores
-        }
+        for index, result in zip(indexes, translations):
+            if result is None:
+                continue
+            results[index] = {
+                'translated_text': result['translatedText'],
+                'source_language': result.get('detectedSourceLanguage') or source_language,
+                'target_language': target_language,
+                'confidence': 0.9  # Google Translate doesn't provide confidence scores
+            }
+        translate_logger.debug("✅ Translation done: %d/%d texts", sum(1 for r in results if r), len(texts))
+        return results
         
     except Exception as e:
-        print(f"❌ Translation error: {e}")
-        print(f"📝 Failed text: {text[:100]}...")
+        translate_logger.warning("❌ Translation error: %s (%d texts)", e, len(texts))
         
-        # Return None to indicate translation failure
+        # None marks a translation failure
+        return [None] * len(texts)
+
+def translate_text(text, target_language='en', source_language=None):
+    """Translate text using Google Cloud Translate with enhanced error handling"""
+    return translate_texts([text], target_language, source_language)[0]
+
+def translate_document(text, target_language='en', source_language=None):
+    """Translate a long text (file, OCR output, transcript) in concurrent chunks; None on failure"""
+    client = get_translate_client()
+    if not client:
+        translate_logger.warning("❌ Translation client not available")
+        return None
+    
+    with metrics.stage('translation'):
+        result = translation.translate_document(
+            client,
+            clean_for_translation(text),
+            target_language=target_language,
+            source_language=source_language
+        )
+    if result is None:
+        translate_logger.warning("❌ Document translation failed (%d chars)", len(text))
         return None
+    translate_logger.debug("✅ Document translated: %d chars in %d chunks", len(text), result['chunks'])
+    return result['translatedText']
+
+def prepare_history_texts(rows):
+    """Preprocessed English text of stored history rows (id, title, content, language, ...) for re-scoring
+    
+    Non-English rows are translated (batched and cached) like in predict_sentiment; None when
+    no translation is available, so the row is skipped.
+    """
+    language_codes = {name: code for code, name in language_id.LANGUAGE_NAMES.items()}
+    texts = []
+    for _, title, content, language, *_ in rows:
+        title, content = title or '', content or ''
+        if language and language not in ('English', 'Unknown'):
+            if not get_translate_client():
+                texts.append(None)
+                continue
+            title_translation, content_translation = translate_texts(
+                [title, content], 'en', language_codes.get(language))
+            if not content_translation:
+                texts.append(None)
+                continue
+            title = title_translation['translated_text'] if title_translation else title
+            content = content_translation['translated_text']
+        texts.append(preprocess_text(f"{title} {content}") or None)
+    return texts
+
+def start_background_jobs(watch_models=True):
+    """Threads that run beside request handling; start once per serving process (after fork)
 
-def predict_sentiment(title, content, include_wordcloud=True):
+    serve.py workers pass watch_models=False: their parent watches the model files instead.
+    """
+    if watch_models:
+        model_registry.start_watcher()
+    # Re-score history left by other model versions, now and after every model swap
+    model_registry.on_swap(lambda bundle: rescore.start(DATABASE_PATH, bundle, prepare_history_texts))
+    rescore.start(DATABASE_PATH, model_registry.current(), prepare_history_texts)
+
+def predict_sentiment(title, content, include_wordcloud=True, priority=scheduler.INTERACTIVE):
     """
     Enhanced predict sentiment function with multilingual support
+    
+    Runs in an analysis slot of the given scheduler priority class, so background
+    analysis never delays interactive requests for long.
     """
-    global model, vectorizer, label_encoder, translate_client
+    with scheduler.slot(priority):
+        return analyze_sentiment(title, content, include_wordcloud)
+
+def analyze_sentiment(title, content, include_wordcloud=True):
+    """The analysis pipeline behind predict_sentiment; the caller holds an analysis slot"""
+    # The model this request started with, even if a new version is swapped in meanwhile
+    bundle = model_registry.current()
     
     try:
         # Step 1: Detect original language
         combined_text = f"{title} {content}"
-        original_language = detect_language_advanced(combined_text)
-        print(f"🌐 Detected language: {original_language['name']} ({original_language['code']})")
+        with metrics.stage('language_detection'):
+            original_language = language_id.detect(combined_text)
+        pipeline_logger.debug("🌐 Detected language: %s (%s)", original_language['name'], original_language['code'])
         
         # Step 2: Translate to English if not already English
         translated_title = title
@@ -2008,99 +2180,321 @@ def predict_sentiment(title, content, include_wordcloud=True):
         translation_info = None
         
         if not original_language['is_english'] and original_language['code'] != 'unknown':
-            print(f"🔄 Translating from {original_language['name']} to English...")
+            pipeline_logger.debug("🔄 Translating from %s to English...", original_language['name'])
             
-            # Translate title
-            title_translation = translate_text(title, 'en', original_language['code'])
-            if title_translation:
-                translated_title = title_translation['translated_text']
-            
-            # Translate content
-            content_translation = translate_text(content, 'en', original_language['code'])
-            if content_translation:
-                translated_content = content_translation['translated_text']
-                translation_info = content_translation
+            with metrics.stage('translation'):
+                # Title and content go out in one batched (and cached) request
+                title_translation, content_translation = translate_texts(
+                    [title, content], 'en', original_language['code'])
+                if title_translation:
+                    translated_title = title_translation['translated_text']
+                if content_translation:
+                    translated_content = content_translation['translated_text']
+                    translation_info = content_translation
         
         # Step 3: Perform sentiment analysis on English text
         combined_english_text = f"{translated_title} {translated_content}"
         
         # Preprocess the text for analysis
-        processed_text = preprocess_text(combined_english_text)
+        with metrics.stage('preprocessing'):
+            processed_text = preprocess_text(combined_english_text)
         
         if not processed_text:
             return {'error': 'Unable to process text after translation'}
         
-        # Vectorize the text
-        text_vector = vectorizer.transform([processed_text])
-        
-        # Make prediction
-        prediction = model.predict(text_vector)[0]
-        prediction_proba = model.predict_proba(text_vector)[0]
-        
-        # Get sentiment label and confidence
-        sentiment = label_encoder.inverse_transform([prediction])[0]
-        confidence = max(prediction_proba)
+        with metrics.stage('vectorize_predict'):
+            # Vectorize the text, predict, and get the sentiment label and confidence
+            sentiment, confidence = bundle.score([processed_text])[0]
         
         # Step 4: Extract additional features (removed summary generation)
-        writing_style = detect_writing_style(translated_content)
-        clickbait_score = detect_clickbait(translated_title, translated_content)
-        readability_score = calculate_readability(translated_content)
+        with metrics.stage('writing_style'):
+            writing_style = detect_writing_style(translated_content)
+        with metrics.stage('clickbait'):
+            clickbait_score = detect_clickbait(translated_title, translated_content)
         word_count = len(combined_text.split())
-        keywords = extract_important_keywords(translated_content)
-        news_genre = detect_news_genre(translated_title, translated_content)
-        
+        with metrics.stage('genre'):
+            news_genre = detect_news_genre(translated_title, translated_content)
+        
+        # Optional stages run while the request's latency budget allows; the rest are deferred
+        optional = latency_budget.OptionalStages(title, content)
+        optional.run('readability', calculate_readability, translated_content)
+        optional.run('keywords', extract_important_keywords, translated_content)
+        optional.run('similar_articles', find_similar_articles, translated_content)
         # Generate word cloud if requested
-        wordcloud_img = None
         if include_wordcloud:
-            print(f"🎨 Generating word cloud for {len(translated_content)} characters...")
-            wordcloud_img = generate_word_cloud(translated_content)
-            if wordcloud_img:
-                print(f"✅ Word cloud generated successfully")
-            else:
-                print(f"❌ Word cloud generation failed")
-        
-        # Find similar articles
-        similar_articles = find_similar_articles(translated_content)
+            optional.run('wordcloud', generate_word_cloud, translated_content)
         
         # Prepare result
         result = {
             'sentiment': sentiment,
             'confidence': confidence,
+            'model_version': bundle.version,
             'language': original_language['name'],
             'language_code': original_language['code'],
             'writing_style': writing_style,
             'clickbait_score': clickbait_score,
-            'readability_score': readability_score,
             'word_count': word_count,
-            'keywords': keywords,
             'news_genre': news_genre,
-            'similar_articles': similar_articles,
+            'skipped_stages': optional.skipped,
             'translation_info': {
                 'was_translated': not original_language['is_english'],
                 'original_language': original_language,
                 'translation_details': translation_info
             }
         }
+        # Skipped stages are left out rather than reported as empty
+        result.update(latency_budget.result_fields(optional.values))
         
-        if wordcloud_img:
-            result['wordcloud'] = wordcloud_img
+        deferred_id = optional.defer()
+        if deferred_id:
+            result['deferred'] = {'id': deferred_id, 'url': f'/analysis/deferred/{deferred_id}'}
         
-        print(f"✅ Analysis completed - Sentiment: {sentiment} ({confidence:.2%})")
+        pipeline_logger.debug("✅ Analysis completed - Sentiment: %s (%.2f%%)", sentiment, confidence * 100)
         return result
         
     except Exception as e:
-        print(f"Error in sentiment prediction: {e}")
+        pipeline_logger.exception("Error in sentiment prediction: %s", e)
         return {'error': str(e)}
 
-# Initialize the translator
-translate_client = initialize_translator()
+# Translate and speech-to-text clients are created on first use
+translate_client = None
+speech_client = None
+_initialized_clients = set()
+_clients_lock = threading.Lock()
 
-# Initialize the speech-to-text client
-speech_client = initialize_speech_client()
+def get_translate_client():
+    """Translate client, initialized on first use (None when not configured)"""
+    global translate_client
+    if 'translate' not in _initialized_clients:
+        with _clients_lock:
+            if 'translate' not in _initialized_clients:
+                translate_client = initialize_translator()
+                _initialized_clients.add('translate')
+    return translate_client
+
+def get_speech_client():
+    """Speech-to-Text client, initialized on first use (None when not configured)"""
+    global speech_client
+    if 'speech' not in _initialized_clients:
+        with _clients_lock:
+            if 'speech' not in _initialized_clients:
+                speech_client = initialize_speech_client()
+                _initialized_clients.add('speech')
+    return speech_client
+
+# Run warm-up at startup (set WARM_UP=0 to skip, e.g. while developing)
+WARM_UP_ENABLED = os.getenv('WARM_UP', '1') != '0'
+
+# Representative inputs for warm-up; English, so no translation API call is made
+WARM_UP_ARTICLE = {
+    'title': 'Central bank holds interest rates steady as inflation eases',
+    'content': 'The central bank held interest rates steady on Wednesday, saying that inflation had eased '
+               'over the past quarter but remained above its target. Officials said they would watch the '
+               'labour market closely before deciding whether to cut rates later in the year. Markets had '
+               'expected the decision, and shares rose modestly after the announcement. Analysts said the '
+               'statement was more cautious than in previous months.'
+}
+WARM_UP_FOREIGN_TEXTS = [
+    'El gobierno aprobó este martes un nuevo paquete de medidas para abaratar el precio de la vivienda.',
+    'Le gouvernement a présenté mercredi son projet de budget pour l\'année prochaine.',
+    '政府は火曜日、物価高騰への対策として新たな経済対策を閣議決定した。'
+]
+
+# Warm-up progress, reported by /ready
+warm_up_state = {'status': 'pending', 'duration_ms': None, 'stages': {}, 'error': None}
+
+def warm_up():
+    """Run representative inputs through every pipeline stage so the first request doesn't pay for lazy loading"""
+    if model_registry.current() is None:
+        warm_up_state.update(status='failed', error='models not loaded')
+        return False
+    
+    warm_up_state.update(status='warming', error=None)
+    start = time.perf_counter()
+    
+    def run_stage(name, function):
+        stage_start = time.perf_counter()
+        function()
+        warm_up_state['stages'][name] = round((time.perf_counter() - stage_start) * 1000, 1)
+    
+    try:
+        # langdetect profiles load on the first non-English text
+        run_stage('language_detection', lambda: [language_id.detect(text) for text in WARM_UP_FOREIGN_TEXTS])
+        # Tokenizers, stopwords, textstat, the sklearn model and the word cloud
+        def predict():
+            result = predict_sentiment(WARM_UP_ARTICLE['title'], WARM_UP_ARTICLE['content'], include_wordcloud=True)
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+        run_stage('predict', predict)
+        run_stage('summary', lambda: summarize_text_fallback(WARM_UP_ARTICLE['content']))
+    except Exception as e:
+        warm_up_state.update(status='failed', error=str(e))
+        pipeline_logger.warning("❌ Warm-up failed: %s", e)
+        return False
+    
+    warm_up_state.update(status='ready', duration_ms=round((time.perf_counter() - start) * 1000, 1))
+    pipeline_logger.info("🔥 Warm-up done in %.0f ms %s", warm_up_state['duration_ms'], warm_up_state['stages'])
+    return True
 
 # Flask Routes and main functions would go here...
 # Let me add the essential Flask routes
 
+@app.before_request
+def start_request_metrics():
+    """Start collecting per-stage timings for this request"""
+    request.environ['metrics.start_time'] = time.perf_counter()
+    metrics.start_request()
+    app_logging.sample_request()
+    if tracing.should_trace(request.headers.get(tracing.TRACE_HEADER)):
+        tracing.start_trace(f"{request.method} {request.path}", {'endpoint': request.endpoint})
+
+@app.before_request
+def start_latency_budget():
+    """Start the clock on the endpoint's latency budget, before any queueing"""
+    latency_budget.start(request.endpoint, request.environ.get('metrics.start_time'))
+
+@app.before_request
+def admit_request():
+    """Queue expensive requests, or turn them away with 503, when their endpoint class is at capacity"""
+    endpoint_class = admission.classify(request.endpoint, request.content_length)
+    if endpoint_class is None:
+        return None
+    limiter = admission.get(endpoint_class)
+    try:
+        waited = limiter.acquire()
+    except admission.AdmissionRejected as e:
+        return jsonify({'error': 'Server is busy, please retry later', 'endpoint_class': e.endpoint_class}), \
+            503, {'Retry-After': str(e.retry_after)}
+    metrics.record_timing('admission_queue', waited)
+    request.environ['admission.slot'] = (limiter, time.perf_counter())
+    scheduler.begin_request()
+    return None
+
+@app.teardown_request
+def release_admission(error=None):
+    """Hand the request's slot to the next queued request"""
+    slot = request.environ.pop('admission.slot', None)
+    if slot is not None:
+        limiter, admitted_at = slot
+        limiter.release(time.perf_counter() - admitted_at)
+        scheduler.end_request()
+    latency_budget.finish()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request latency and expose the stage breakdown as Server-Timing"""
+    start_time = request.environ.get('metrics.start_time')
+    timings = metrics.finish_request()
+    app_logging.end_request()
+    if start_time is None:
+        return response
+    
+    elapsed = time.perf_counter() - start_time
+    metrics.HTTP_SECONDS.observe(
+        elapsed,
+        endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+        method=request.method,
+        status=response.status_code
+    )
+    response.headers['Server-Timing'] = metrics.server_timing_header(timings, total=elapsed)
+    
+    if tracing.current_trace() is not None:
+        tracing.current_trace().attrs['status_code'] = response.status_code
+        trace_id = tracing.finish_trace('ok' if response.status_code < 500 else 'error')
+        response.headers['X-Trace-Id'] = trace_id
+    return response
+
+@app.teardown_request
+def finish_unhandled_trace(error=None):
+    """Flush a trace left open by an unhandled exception"""
+    if tracing.current_trace() is not None:
+        tracing.finish_trace('error')
+
+@app.before_request
+def start_request_profile():
+    """Profile this request when ?profile=cpu|mem is sent with a valid admin token"""
+    kind = request.args.get('profile')
+    if kind and profiling.is_authorized(request.headers.get(profiling.ADMIN_TOKEN_HEADER)):
+        request.environ['profiling.session'] = profiling.start_profile(kind, f"{request.method} {request.full_path}")
+
+@app.after_request
+def finish_request_profile(response):
+    """Stop the profiler, store the report and point the caller at it"""
+    session = request.environ.pop('profiling.session', None)
+    if session is None:
+        return response
+    
+    record = session.stop()
+    response.headers['X-Profile-Id'] = record['id']
+    response.headers['X-Profile-Url'] = f"/debug/profiles/{record['id']}"
+    
+    # Optionally embed the report in JSON responses
+    if request.args.get('profile_inline') == '1' and response.is_json:
+        data = response.get_json(silent=True)
+        if isinstance(data, dict):
+            data['_profile'] = record
+            response.set_data(json.dumps(data))
+    return response
+
+@app.route('/debug/profiles')
+def debug_profiles():
+    """List stored request profiles (admin only)"""
+    if not profiling.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not profiling.is_authorized(request.headers.get(profiling.ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({'profiles': profiling.list_profiles()})
+
+@app.route('/debug/profiles/<profile_id>')
+def debug_profile(profile_id):
+    """Return one stored profile report as plain text (admin only)"""
+    if not profiling.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not profiling.is_authorized(request.headers.get(profiling.ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    record = profiling.get_profile(profile_id)
+    if not record:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    header = f"# {record['request']} ({record['kind']}, {record['duration_ms']} ms, {record['created_at']})\n"
+    if record['error']:
+        header += f"# error: {record['error']}\n"
+    return header + record['report'], 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose application metrics in Prometheus text format"""
+    return metrics.render_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/admin/model')
+def admin_model():
+    """Model version currently serving and the state of the last reload (admin only)"""
+    if not profiling.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not profiling.is_authorized(request.headers.get(profiling.ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    bundle = model_registry.current()
+    return jsonify({'model': bundle.describe() if bundle else None, 'reload': model_registry.reload_state,
+                    'rescore': rescore.progress(DATABASE_PATH)})
+
+@app.route('/admin/model/reload', methods=['POST'])
+def admin_model_reload():
+    """Load the model files in the background and swap them in when warmed up (admin only)"""
+    if not profiling.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not profiling.is_authorized(request.headers.get(profiling.ADMIN_TOKEN_HEADER)):
+        return jsonify({'error': 'Forbidden'}), 403
+    if not model_registry.request_reload():
+        return jsonify({'error': 'A reload is already running', 'reload': model_registry.reload_state}), 409
+    return jsonify({'message': 'Reload started', 'reload': model_registry.reload_state}), 202
+
+@app.route('/ready')
+def ready_endpoint():
+    """Readiness probe: 200 once models are loaded and warm-up has finished"""
+    ready = warm_up_state['status'] == 'ready' or (not WARM_UP_ENABLED and model_registry.current() is not None)
+    return jsonify({'ready': ready, **warm_up_state}), 200 if ready else 503
+
 @app.route('/')
 def index():
     """Main page"""
@@ -2146,8 +2540,7 @@ def analyze_article():
         # Use title as content if no content available
         analysis_text = content if content else title
         
-        print(f"📰 Analyzing article: {title[:50]}...")
-        print(f"📝 Content length: {len(analysis_text)} characters")
+        pipeline_logger.debug("📰 Analyzing article: %.50s... (%d characters)", title, len(analysis_text))
         
         # Perform sentiment analysis with word cloud
         result = predict_sentiment(title, analysis_text, include_wordcloud=True)
@@ -2165,9 +2558,21 @@ def analyze_article():
         return jsonify(result)
         
     except Exception as e:
-        print(f"❌ Error analyzing article: {e}")
+        pipeline_logger.exception("❌ Error analyzing article: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/analysis/deferred/<deferred_id>')
+def deferred_stages(deferred_id):
+    """Optional analysis stages that were deferred to meet a request's latency budget"""
+    if not re.fullmatch(r'[0-9a-f]{24}', deferred_id):
+        return jsonify({'error': 'Unknown deferred id'}), 404
+    entry = latency_budget.lookup(deferred_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown deferred id'}), 404
+    return jsonify({'id': deferred_id, 'status': entry['status'],
+                    'results': latency_budget.result_fields(entry['stages'])}), \
+        202 if entry['status'] == 'pending' else 200
+
 @app.route('/history')
 def history():
     """Get analysis history"""
@@ -2197,8 +2602,6 @@ def trending_news():
         category = request.args.get('category', 'general')
         country = request.args.get('country', 'us')
         
-        print(f"🔄 Trending news request: category={category}, country={country}")
-        
         articles = fetch_trending_news(category, country)
         
         return jsonify({
@@ -2209,7 +2612,7 @@ def trending_news():
         })
         
     except Exception as e:
-        print(f"❌ Error in trending news: {e}")
+        news_logger.exception("❌ Error in trending news: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/rss-news')
@@ -2242,7 +2645,7 @@ def sentiment_distribution():
         })
         
     except Exception as e:
-        print(f"❌ Error in sentiment distribution: {e}")
+        storage_logger.exception("❌ Error in sentiment distribution: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/translate-text', methods=['POST'])
@@ -2268,7 +2671,7 @@ def translate_text_endpoint():
             return jsonify({'error': 'Translation failed'}), 500
             
     except Exception as e:
-        print(f"❌ Error in translation: {e}")
+        translate_logger.exception("❌ Error in translation: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/transcribe-video', methods=['POST'])
@@ -2323,18 +2726,9 @@ def transcribe_video():
             transcription = transcribe_audio_file(audio_path)
             
             # Detect language of the transcribed text
-            detected_language = detect_language(transcription)
-            
-            # Get language name mapping
-            language_names = {
-                'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German', 
-                'it': 'Italian', 'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese',
-                'ko': 'Korean', 'zh': 'Chinese', 'ar': 'Arabic', 'hi': 'Hindi',
-                'th': 'Thai', 'vi': 'Vietnamese', 'nl': 'Dutch', 'pl': 'Polish',
-                'tr': 'Turkish', 'sv': 'Swedish', 'no': 'Norwegian', 'da': 'Danish',
-                'fi': 'Finnish', 'cs': 'Czech', 'hu': 'Hungarian'
-            }
-            language_name = language_names.get(detected_language, f"Unknown ({detected_language})")
+            language_info = language_id.detect(transcription)
+            detected_language = language_info['code']
+            language_name = language_info['name']
             
             print(f"🌐 Detected language in video: {language_name} ({detected_language})")
             
@@ -2365,12 +2759,15 @@ def transcribe_video():
             }
             
             # If the detected language is not English, offer translation
-            if detected_language != 'en' and translate_client:
+            if detected_language != 'en' and get_translate_client():
                 try:
                     # Translate transcription to English
-                    english_transcription = translate_client.translate(
-                        transcription, target_language='en'
-                    )['translatedText']
+                    english_transcription = translate_document(
+                        transcription, target_language='en',
+                        source_language=None if detected_language == 'unknown' else detected_language
+                    )
+                    if english_transcription is None:
+                        raise Exception('Translation service unavailable')
                     
                     response_data.update({
                         'english_transcription': english_transcription,
@@ -2405,8 +2802,9 @@ def transcribe_video():
 
 def transcribe_audio_file(audio_path):
     """Transcribe audio file using Google Cloud Speech-to-Text with automatic fallback for long files"""
-    global speech_client
+    from google.cloud import speech
     
+    speech_client = get_speech_client()
     if not speech_client:
         raise Exception("Speech-to-Text client not initialized")
     
@@ -2455,7 +2853,8 @@ def transcribe_audio_file(audio_path):
                 content = audio_file.read()
             
             audio = speech.RecognitionAudio(content=content)
-            response = speech_client.recognize(config=config, audio=audio)
+            with metrics.outbound('speech'), circuit_breaker.get('speech').guard():
+                response = speech_client.recognize(config=config, audio=audio)
             
         else:
             print("🔄 Using asynchronous recognition (file > 10MB)")
@@ -2487,7 +2886,9 @@ def transcribe_audio_file(audio_path):
 
 def transcribe_long_audio_chunked(audio_path, config):
     """Split long audio into chunks and transcribe each chunk"""
-    global speech_client
+    from google.cloud import speech
+    
+    speech_client = get_speech_client()
     
     print("🔄 Splitting audio into chunks for processing...")
     
@@ -2562,7 +2963,8 @@ def transcribe_long_audio_chunked(audio_path, config):
                     content = audio_file.read()
                 
                 audio = speech.RecognitionAudio(content=content)
-                response = speech_client.recognize(config=config, audio=audio)
+                with metrics.outbound('speech'), circuit_breaker.get('speech').guard():
+                    response = speech_client.recognize(config=config, audio=audio)
                 
                 chunk_transcription = []
                 for result in response.results:
@@ -2577,6 +2979,9 @@ def transcribe_long_audio_chunked(audio_path, config):
                 else:
                     print(f"⚪ Chunk {i+1}: No speech detected in this segment")
                 
+            except circuit_breaker.CircuitOpenError:
+                # Every remaining chunk would fail too; don't return a silently truncated transcript
+                raise Exception("Speech-to-Text is temporarily unavailable, please try again later")
             except Exception as e:
                 print(f"❌ Error processing chunk {i+1}: {str(e)}")
                 continue
@@ -2639,18 +3044,10 @@ def process_text_file():
             return jsonify({'error': 'File content is too short for meaningful analysis.'}), 400
         
         # Detect language of file content
-        try:
-            detected_language = detect_language(file_content)
-            language_names = {
-                'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German', 
-                'it': 'Italian', 'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese',
-                'ko': 'Korean', 'zh': 'Chinese', 'ar': 'Arabic', 'hi': 'Hindi',
-                'th': 'Thai', 'vi': 'Vietnamese', 'nl': 'Dutch', 'pl': 'Polish',
-                'tr': 'Turkish', 'sv': 'Swedish', 'no': 'Norwegian', 'da': 'Danish',
-                'fi': 'Finnish', 'cs': 'Czech', 'hu': 'Hungarian'
-            }
-            language_name = language_names.get(detected_language, f"Unknown ({detected_language})")
-        except:
+        language_info = language_id.detect(file_content)
+        detected_language = language_info['code']
+        language_name = language_info['name']
+        if detected_language == 'unknown':
             detected_language = 'en'
             language_name = 'English (default)'
         
@@ -2668,12 +3065,12 @@ def process_text_file():
         }
         
         # If the detected language is not English, offer translation
-        if detected_language != 'en' and translate_client:
+        if detected_language != 'en' and get_translate_client():
             try:
                 # Translate file content to English
-                english_text = translate_client.translate(
-                    file_content, target_language='en'
-                )['translatedText']
+                english_text = translate_document(file_content, target_language='en', source_language=detected_language)
+                if english_text is None:
+                    raise Exception('Translation service unavailable')
                 
                 response_data['english_text'] = english_text
                 response_data['translation_available'] = True
@@ -2733,18 +3130,10 @@ def process_image():
             return jsonify({'error': 'No readable text found in the image.'}), 400
         
         # Detect language of extracted text
-        try:
-            detected_language = detect_language(extracted_text)
-            language_names = {
-                'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German', 
-                'it': 'Italian', 'pt': 'Portuguese', 'ru': 'Russian', 'ja': 'Japanese',
-                'ko': 'Korean', 'zh': 'Chinese', 'ar': 'Arabic', 'hi': 'Hindi',
-                'th': 'Thai', 'vi': 'Vietnamese', 'nl': 'Dutch', 'pl': 'Polish',
-                'tr': 'Turkish', 'sv': 'Swedish', 'no': 'Norwegian', 'da': 'Danish',
-                'fi': 'Finnish', 'cs': 'Czech', 'hu': 'Hungarian'
-            }
-            language_name = language_names.get(detected_language, f"Unknown ({detected_language})")
-        except:
+        language_info = language_id.detect(extracted_text)
+        detected_language = language_info['code']
+        language_name = language_info['name']
+        if detected_language == 'unknown':
             detected_language = 'en'
             language_name = 'English (default)'
         
@@ -2762,12 +3151,12 @@ def process_image():
         }
         
         # If the detected language is not English, offer translation
-        if detected_language != 'en' and translate_client:
+        if detected_language != 'en' and get_translate_client():
             try:
                 # Translate extracted text to English
-                english_text = translate_client.translate(
-                    extracted_text, target_language='en'
-                )['translatedText']
+                english_text = translate_document(extracted_text, target_language='en', source_language=detected_language)
+                if english_text is None:
+                    raise Exception('Translation service unavailable')
                 
                 response_data.update({
                     'english_text': english_text,
@@ -2792,6 +3181,13 @@ if __name__ == '__main__':
     metadata = load_models()
     if metadata:
         print("✅ All models loaded successfully!")
+        # Rows from before versions were recorded were scored by this model; re-scoring them from the
+        # stored (truncated) text would only change results, not the version
+        rescore.stamp_legacy_rows(DATABASE_PATH, model_registry.current())
+        start_background_jobs()
+        if WARM_UP_ENABLED:
+            print("🔥 Warming up the analysis pipeline...")
+            warm_up()
         print("🌐 Multilingual support enabled with Google Cloud Translate")
         print("📊 Application ready!")
         print("=" * 60)
@@ -0,0 +1,112 @@
+"""
+Logging setup for the news sentiment app.
+
+Components log through get_logger('<component>') so levels can be tuned per
+component, and hot paths use lazy %-style arguments so disabled debug lines
+cost only a level check.
+
+Configuration (environment):
+    LOG_LEVEL              default level for all components (default: INFO)
+    LOG_LEVELS             per-component overrides, e.g. "pipeline=DEBUG,news=WARNING"
+    LOG_FORMAT             "text" (default) or "json" for one JSON object per line
+    LOG_DEBUG_SAMPLE_RATE  share of requests whose DEBUG lines are kept (default: 1.0)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+import tracing
+
+ROOT_LOGGER = 'news_sentiment'
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0') or 1.0)
+
+# Per-request decision on whether DEBUG records are emitted (None = not decided / outside a request)
+_debug_sampled = contextvars.ContextVar('debug_sampled', default=None)
+
+_configured = False
+
+class DebugSamplingFilter(logging.Filter):
+    """Drop DEBUG records of requests that were not sampled"""
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        return _debug_sampled.get() is not False
+
+class JsonFormatter(logging.Formatter):
+    """Render each record as a single-line JSON object"""
+
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        # Include structured fields passed via extra={...}
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED and not key.startswith('_'):
+                payload[key] = value
+        trace = tracing.current_trace()
+        if trace is not None:
+            payload['trace_id'] = trace.trace_id
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+def _parse_level(value, default=logging.INFO):
+    if not value:
+        return default
+    value = value.strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else default
+
+def configure_logging(force=False):
+    """Install the handler and levels described by the environment (idempotent)"""
+    global _configured
+    if _configured and not force:
+        return
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        if getattr(handler, '_news_sentiment_handler', False):
+            root.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler._news_sentiment_handler = True
+    if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+    handler.addFilter(DebugSamplingFilter())
+
+    root.addHandler(handler)
+    root.setLevel(_parse_level(os.getenv('LOG_LEVEL'), logging.INFO))
+    root.propagate = False
+
+    for item in os.getenv('LOG_LEVELS', '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            logging.getLogger(f"{ROOT_LOGGER}.{name.strip()}").setLevel(_parse_level(level))
+
+    _configured = True
+
+def get_logger(component):
+    """Return the logger for one app component (pipeline, news, translate, storage, ...)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+def sample_request():
+    """Decide once per request whether its DEBUG lines are kept"""
+    _debug_sampled.set(LOG_DEBUG_SAMPLE_RATE >= 1.0 or random.random() < LOG_DEBUG_SAMPLE_RATE)
+
+def end_request():
+    _debug_sampled.set(None)
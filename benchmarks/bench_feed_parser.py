@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming feed parser against feedparser.
+
+Parses every saved feed under benchmarks/fixtures/feeds/ with feed_parser.parse
+(stopping after --limit entries, as fetch_rss_feed does), with the fast path
+reading the whole document, and with feedparser. Also checks that both parsers
+agree on the fields the app uses.
+
+Usage:
+    python -m benchmarks.bench_feed_parser
+    python -m benchmarks.bench_feed_parser --limit 20 --iterations 50
+    python -m benchmarks.bench_feed_parser --baseline base.json --threshold 0.2
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from benchmarks.common import (
+    REPO_ROOT, summarize_samples, run_metadata, default_output_path,
+    save_results, load_results, compare_results, report_regressions
+)
+
+FIXTURES_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures', 'feeds')
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Read every *.xml fixture as bytes, keyed by file stem"""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.xml'))):
+        with open(path, 'rb') as f:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return fixtures
+
+def _normalize(value):
+    """Collapse whitespace; markup is compared as is, so an unsanitized field shows up as a mismatch"""
+    return re.sub(r'\s+', ' ', value or '').strip()
+
+def check_parity(feed_parser, content, limit):
+    """List field mismatches between parse() and feedparser for the first `limit` entries"""
+    fast = feed_parser.parse(content, limit)
+    reference = feed_parser.parse_with_feedparser(content, limit)
+    mismatches = []
+    if fast['title'] != reference['title']:
+        mismatches.append(f"feed title: {fast['title']!r} != {reference['title']!r}")
+    if len(fast['entries']) != len(reference['entries']):
+        mismatches.append(f"entry count: {len(fast['entries'])} != {len(reference['entries'])}")
+    for index, (ours, theirs) in enumerate(zip(fast['entries'], reference['entries'])):
+        for field in ('title', 'link', 'published', 'summary'):
+            if _normalize(ours[field]) != _normalize(theirs[field]):
+                mismatches.append(f"entry {index} {field}: {ours[field][:60]!r} != {theirs[field][:60]!r}")
+    return mismatches
+
+def time_parser(function, content, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function(content)
+        samples.append(time.perf_counter() - start)
+    return summarize_samples(samples)
+
+def run_benchmark(feed_parser, fixtures, iterations, limit):
+    """Time each parser on each fixture; returns {fixture: {parser: summary}}"""
+    parsers = {
+        f"parse_limit_{limit}": lambda content: feed_parser.parse(content, limit),
+        'parse_full': lambda content: feed_parser.parse(content),
+        'feedparser': lambda content: feed_parser.parse_with_feedparser(content),
+    }
+    results = {}
+    for name, content in fixtures.items():
+        # Warm up imports and the expat/sgmllib machinery outside the timed loop
+        for function in parsers.values():
+            function(content)
+        results[name] = {parser: time_parser(function, content, iterations)
+                         for parser, function in parsers.items()}
+    return results
+
+def print_table(results):
+    header = f"{'fixture':<22} {'parser':<18} {'p50 ms':>10} {'p95 ms':>10} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+    for fixture, parsers in results.items():
+        reference = parsers['feedparser']['p50_ms'] or 1.0
+        for parser, summary in parsers.items():
+            speedup = reference / summary['p50_ms'] if summary['p50_ms'] else 0.0
+            print(f"{fixture:<22} {parser:<18} {summary['p50_ms']:>10.3f} "
+                  f"{summary['p95_ms']:>10.3f} {speedup:>7.1f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark feed_parser against feedparser')
+    parser.add_argument('--iterations', type=int, default=30, help='parses per fixture (default: 30)')
+    parser.add_argument('--limit', type=int, default=20,
+                        help='entries read before stopping, as in fetch_rss_feed (default: 20)')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='directory of *.xml feeds')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/feed_parser-<time>.json)')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed fractional slowdown before failing (default: 0.2)')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms'],
+                        help='metric compared against the baseline')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    import feed_parser
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"❌ No feed fixtures found in {args.fixtures}")
+        return 2
+
+    parity_failures = 0
+    for name, content in fixtures.items():
+        mismatches = check_parity(feed_parser, content, args.limit)
+        if mismatches:
+            parity_failures += 1
+            print(f"⚠️  {name}: {len(mismatches)} field mismatch(es) with feedparser")
+            for mismatch in mismatches[:5]:
+                print(f"     {mismatch}")
+        else:
+            print(f"✅ {name}: fields match feedparser")
+
+    print(f"⏱️  Parsing {len(fixtures)} fixture(s) {args.iterations} time(s) each...")
+    results = run_benchmark(feed_parser, fixtures, args.iterations, args.limit)
+
+    payload = {
+        'benchmark': 'feed_parser',
+        'metadata': run_metadata({
+            'iterations': args.iterations,
+            'limit': args.limit,
+            'fixtures': {name: len(content) for name, content in fixtures.items()}
+        }),
+        'results': results
+    }
+
+    print_table(results)
+    output_path = save_results(payload, args.output or default_output_path('feed_parser'))
+    print(f"💾 Results saved to {output_path}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), payload,
+                                      threshold=args.threshold, metric=args.metric)
+        if report_regressions(regressions, args.threshold, args.metric):
+            return 1
+    return 1 if parity_failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark language_id.detect against plain langdetect.
+
+Identifies every fixture under benchmarks/fixtures/languages/ (the expected
+language code is the file name prefix, e.g. zh-cn_article.txt) plus a long
+variant of each article built by repeating it --long-repeat times. Each text
+is identified with langdetect on the full text, as the app used to, with
+language_id.detect on a cold cache, and with a warm cache. Also checks
+accuracy and that repeated calls give the same answer.
+
+Usage:
+    python -m benchmarks.bench_language_id
+    python -m benchmarks.bench_language_id --iterations 50 --long-repeat 20
+    python -m benchmarks.bench_language_id --baseline base.json --threshold 0.2
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from benchmarks.common import (
+    REPO_ROOT, summarize_samples, run_metadata, default_output_path,
+    save_results, load_results, compare_results, report_regressions
+)
+
+FIXTURES_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures', 'languages')
+
+def load_fixtures(directory=FIXTURES_DIR, long_repeat=10):
+    """Return {name: (expected_code, text)}, with a long variant of every article"""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.txt'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        expected = name.rsplit('_', 1)[0]
+        with open(path, encoding='utf-8') as f:
+            text = f.read().strip()
+        fixtures[name] = (expected, text)
+        if name.endswith('_article') and long_repeat > 1:
+            fixtures[f"{name}_long"] = (expected, '\n\n'.join([text] * long_repeat))
+    return fixtures
+
+def time_detector(function, texts, iterations, before_each=None):
+    """Identify every text `iterations` times; returns a summary of per-text durations"""
+    samples = []
+    for _ in range(iterations):
+        for text in texts:
+            if before_each:
+                before_each()
+            start = time.perf_counter()
+            function(text)
+            samples.append(time.perf_counter() - start)
+    return summarize_samples(samples)
+
+def check_fixtures(detectors, fixtures, repeats=5):
+    """Accuracy and determinism per detector; returns {detector: {...}}"""
+    report = {}
+    for detector, function in detectors.items():
+        wrong, unstable = [], []
+        for name, (expected, text) in fixtures.items():
+            answers = {function(text) for _ in range(repeats)}
+            if len(answers) > 1:
+                unstable.append(f"{name}: {sorted(answers)}")
+            if expected not in answers:
+                wrong.append(f"{name}: expected {expected}, got {sorted(answers)}")
+        report[detector] = {
+            'correct': len(fixtures) - len(wrong),
+            'total': len(fixtures),
+            'wrong': wrong,
+            'unstable': unstable
+        }
+    return report
+
+def run_benchmark(language_id, fixtures, iterations):
+    """Time each detector on short texts, articles and long articles"""
+    from langdetect import detect as langdetect_detect
+
+    groups = {
+        'short': [text for name, (_, text) in fixtures.items() if not name.endswith(('_article', '_long'))],
+        'article': [text for name, (_, text) in fixtures.items() if name.endswith('_article')],
+        'long': [text for name, (_, text) in fixtures.items() if name.endswith('_long')],
+    }
+    results = {}
+    for group, texts in groups.items():
+        if not texts:
+            continue
+        results[group] = {
+            'langdetect_full': time_detector(langdetect_detect, texts, iterations),
+            'language_id_cold': time_detector(language_id.detect, texts, iterations,
+                                              before_each=language_id.clear_cache),
+        }
+        for text in texts:
+            language_id.detect(text)
+        results[group]['language_id_warm'] = time_detector(language_id.detect, texts, iterations)
+    return results
+
+def print_table(results):
+    header = f"{'group':<10} {'detector':<18} {'p50 ms':>10} {'p95 ms':>10} {'texts/s':>10} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+    for group, detectors in results.items():
+        reference = detectors['langdetect_full']['p50_ms'] or 1.0
+        for detector, summary in detectors.items():
+            speedup = reference / summary['p50_ms'] if summary['p50_ms'] else 0.0
+            print(f"{group:<10} {detector:<18} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} "
+                  f"{summary['docs_per_sec']:>10.1f} {speedup:>7.1f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark language_id against langdetect')
+    parser.add_argument('--iterations', type=int, default=20, help='passes over every fixture (default: 20)')
+    parser.add_argument('--long-repeat', type=int, default=10,
+                        help='times each article is repeated for the long variant (default: 10)')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='directory of <code>_<name>.txt files')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/language_id-<time>.json)')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed fractional slowdown before failing (default: 0.2)')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms'],
+                        help='metric compared against the baseline')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    import language_id
+    from langdetect import detect as langdetect_detect
+
+    fixtures = load_fixtures(args.fixtures, args.long_repeat)
+    if not fixtures:
+        print(f"❌ No language fixtures found in {args.fixtures}")
+        return 2
+
+    def unseeded(text):
+        # What the app did before: full text, detector randomized per call
+        from langdetect import DetectorFactory
+        seed, DetectorFactory.seed = DetectorFactory.seed, None
+        try:
+            return langdetect_detect(text)
+        finally:
+            DetectorFactory.seed = seed
+
+    def cold(text):
+        language_id.clear_cache()
+        return language_id.detect(text)['code']
+
+    checks = check_fixtures({'langdetect_full': unseeded, 'language_id': cold}, fixtures)
+    for detector, report in checks.items():
+        print(f"{'✅' if not report['wrong'] else '⚠️ '} {detector}: {report['correct']}/{report['total']} correct, "
+              f"{len(report['unstable'])} unstable")
+        for line in (report['wrong'] + report['unstable'])[:5]:
+            print(f"     {line}")
+
+    print(f"⏱️  Identifying {len(fixtures)} text(s) {args.iterations} time(s) each...")
+    results = run_benchmark(language_id, fixtures, args.iterations)
+
+    payload = {
+        'benchmark': 'language_id',
+        'metadata': run_metadata({
+            'iterations': args.iterations,
+            'long_repeat': args.long_repeat,
+            'sample_chars': language_id.LANG_ID_SAMPLE_CHARS,
+            'fixtures': {name: len(text) for name, (_, text) in fixtures.items()}
+        }),
+        'checks': checks,
+        'results': results
+    }
+
+    print_table(results)
+    output_path = save_results(payload, args.output or default_output_path('language_id'))
+    print(f"💾 Results saved to {output_path}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), payload,
+                                      threshold=args.threshold, metric=args.metric)
+        if report_regressions(regressions, args.threshold, args.metric):
+            return 1
+    return 1 if checks['language_id']['wrong'] or checks['language_id']['unstable'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Per-stage benchmark for predict_sentiment.
+
+Times every stage of the analysis pipeline separately over a fixed synthetic
+corpus of short, medium and long documents and reports p50/p95 and docs/sec.
+No network access is needed: the corpus is generated, and the similar-articles
+scan runs against a temporary history database seeded from the same corpus.
+
+Usage:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --output base.json
+    python -m benchmarks.bench_pipeline --baseline base.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (
+    REPO_ROOT, summarize_samples, run_metadata, default_output_path,
+    save_results, load_results, compare_results, report_regressions
+)
+from benchmarks.corpus import DEFAULT_SEED, build_corpus, build_history_rows
+
+# Stage names in the order predict_sentiment runs them
+STAGES = [
+    'language_detection',
+    'preprocessing',
+    'vectorize_predict',
+    'detect_writing_style',
+    'detect_clickbait',
+    'calculate_readability',
+    'extract_important_keywords',
+    'detect_news_genre',
+    'generate_word_cloud',
+    'find_similar_articles',
+    'end_to_end'
+]
+
+def _stage_callables(app_module, doc):
+    """Build the stage -> zero-argument callable mapping for one document"""
+    title = doc['title']
+    content = doc['content']
+    combined_text = f"{title} {content}"
+    state = {}
+
+    def preprocessing():
+        state['processed'] = app_module.preprocess_text(combined_text)
+
+    def vectorize_predict():
+        processed = state.get('processed') or app_module.preprocess_text(combined_text)
+        app_module.model_registry.current().score([processed])
+
+    return {
+        'language_detection': lambda: app_module.language_id.detect(combined_text),
+        'preprocessing': preprocessing,
+        'vectorize_predict': vectorize_predict,
+        'detect_writing_style': lambda: app_module.detect_writing_style(content),
+        'detect_clickbait': lambda: app_module.detect_clickbait(title, content),
+        'calculate_readability': lambda: app_module.calculate_readability(content),
+        'extract_important_keywords': lambda: app_module.extract_important_keywords(content),
+        'detect_news_genre': lambda: app_module.detect_news_genre(title, content),
+        'generate_word_cloud': lambda: app_module.generate_word_cloud(content),
+        'find_similar_articles': lambda: app_module.find_similar_articles(content),
+        'end_to_end': lambda: app_module.predict_sentiment(title, content, include_wordcloud=True)
+    }
+
+def seed_history_database(app_module, path, seed):
+    """Create a throwaway history database so the similarity scan is reproducible"""
+    app_module.DATABASE_PATH = path
+    app_module.init_database()
+    for row in build_history_rows(seed):
+        app_module.save_article_to_history(
+            row['title'], row['content'],
+            {'sentiment': row['sentiment'], 'confidence': row['confidence'], 'model_version': 'benchmark-seed'}
+        )
+
+def run_benchmark(app_module, corpus, iterations, stages, quiet=True):
+    """Time each stage for every document; returns {size: {stage: summary}}"""
+    results = {}
+    sink = open(os.devnull, 'w') if quiet else None
+
+    try:
+        for size_class, documents in corpus.items():
+            if not documents:
+                continue
+
+            samples = {stage: [] for stage in stages}
+
+            # Warm caches (langdetect profiles, punkt, textstat) outside the timed loop
+            warmup = _stage_callables(app_module, documents[0])
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                for stage in stages:
+                    warmup[stage]()
+
+            for _ in range(iterations):
+                for doc in documents:
+                    callables = _stage_callables(app_module, doc)
+                    for stage in stages:
+                        with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                            start = time.perf_counter()
+                            callables[stage]()
+                            samples[stage].append(time.perf_counter() - start)
+
+            results[size_class] = {stage: summarize_samples(values) for stage, values in samples.items()}
+    finally:
+        if sink:
+            sink.close()
+
+    return results
+
+def print_table(results):
+    """Print a compact per-stage summary table"""
+    header = f"{'size':<8} {'stage':<28} {'p50 ms':>10} {'p95 ms':>10} {'docs/sec':>10}"
+    print(header)
+    print('-' * len(header))
+    for size_class, stages in results.items():
+        for stage, summary in stages.items():
+            print(f"{size_class:<8} {stage:<28} {summary['p50_ms']:>10.3f} "
+                  f"{summary['p95_ms']:>10.3f} {summary['docs_per_sec']:>10.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark predict_sentiment stage by stage')
+    parser.add_argument('--iterations', type=int, default=3, help='passes over the corpus (default: 3)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='corpus seed')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='comma-separated subset of stages to run')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/pipeline-<time>.json)')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed fractional slowdown before failing (default: 0.2)')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms'],
+                        help='metric compared against the baseline')
+    parser.add_argument('--verbose', action='store_true', help='keep the app\'s stdout logging')
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    # The app loads models from relative paths
+    os.chdir(REPO_ROOT)
+    import app as app_module
+
+    if not app_module.load_models():
+        print("❌ Failed to load models. Please check model files.")
+        return 2
+
+    corpus = build_corpus(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db = app_module.DATABASE_PATH
+        try:
+            seed_history_database(app_module, os.path.join(tmp_dir, 'bench_history.db'), args.seed)
+            print(f"⏱️  Running {args.iterations} iteration(s) over "
+                  f"{sum(len(docs) for docs in corpus.values())} documents...")
+            results = run_benchmark(app_module, corpus, args.iterations, stages, quiet=not args.verbose)
+        finally:
+            app_module.DATABASE_PATH = original_db
+
+    payload = {
+        'benchmark': 'pipeline',
+        'metadata': run_metadata({
+            'seed': args.seed,
+            'iterations': args.iterations,
+            'documents': {size: len(docs) for size, docs in corpus.items()}
+        }),
+        'results': results
+    }
+
+    print_table(results)
+    output_path = save_results(payload, args.output or default_output_path('pipeline'))
+    print(f"💾 Results saved to {output_path}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), payload,
+                                      threshold=args.threshold, metric=args.metric)
+        if report_regressions(regressions, args.threshold, args.metric):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Measure how long a fresh worker takes from interpreter start to serving requests.
+
+Each run starts a new Python process that imports app.py, loads the models
+and answers one request through the Flask test client, timing every phase:
+
+    import_ms         `import app` (module-level imports and setup)
+    models_ms         load_models()
+    first_request_ms  first request to --path
+    ready_ms          import + models + first request
+    process_ms        the whole child process, including interpreter start
+
+The slowest modules imported directly by app.py (from `python -X importtime`)
+are listed too, so a dependency creeping back into import time is easy to spot.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --path /metrics
+    python -m benchmarks.bench_startup --baseline base.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (
+    REPO_ROOT, summarize_samples, run_metadata, default_output_path,
+    save_results, load_results, compare_results, report_regressions
+)
+
+RESULT_PREFIX = 'STARTUP_RESULT '
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import app
+imported = time.perf_counter()
+{load_models}
+loaded = time.perf_counter()
+response = app.app.test_client().get({path!r})
+ready = time.perf_counter()
+print({prefix!r} + json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'models_ms': (loaded - imported) * 1000,
+    'first_request_ms': (ready - loaded) * 1000,
+    'ready_ms': (ready - start) * 1000,
+    'status': response.status_code
+}}))
+'''
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)')
+
+def child_environment(tmp_dir):
+    """Keep the child's SQLite stores out of the working tree"""
+    env = dict(os.environ)
+    for name, filename in (('ARTICLE_HISTORY_DB', 'history.db'), ('FEED_STATE_DB', 'feed_state.db'),
+                           ('NEWS_CACHE_DB', 'news_cache.db'), ('RATE_LIMIT_DB', 'rate_limits.db'),
+                           ('TRANSLATION_CACHE_DB', 'translation_cache.db')):
+        env[name] = os.path.join(tmp_dir, filename)
+    return env
+
+def run_once(path, load_models, env):
+    """Start one fresh process; returns its phase timings in ms"""
+    code = PROBE.format(repo=REPO_ROOT, path=path, prefix=RESULT_PREFIX,
+                        load_models='app.load_models()' if load_models else '')
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, env=env,
+                               capture_output=True, text=True)
+    process_ms = (time.perf_counter() - start) * 1000
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            result['process_ms'] = process_ms
+            return result
+    raise RuntimeError(f"startup probe failed (exit {completed.returncode}): {completed.stderr[-2000:]}")
+
+def slowest_imports(env, top=10):
+    """Modules imported directly by app.py, slowest first: [(module, cumulative ms)]"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                               cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    app_indent = None
+    modules = []
+    # Children are listed before their parent, so collect until app's own line
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if name == 'app':
+            app_indent = len(indent)
+            break
+        modules.append((len(indent), name, int(cumulative) / 1000))
+    if app_indent is None:
+        return []
+    direct = [(name, round(ms, 1)) for depth, name, ms in modules if depth == app_indent + 2]
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure import-to-ready time of a fresh app process')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes to start (default: 5)')
+    parser.add_argument('--path', default='/metrics', help='first request path (default: /metrics)')
+    parser.add_argument('--skip-models', action='store_true', help='do not call load_models()')
+    parser.add_argument('--top', type=int, default=10, help='slowest direct imports to list (default: 10)')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/startup-<time>.json)')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='allowed fractional slowdown before failing (default: 0.2)')
+    parser.add_argument('--metric', default='p50_ms', choices=['p50_ms', 'p95_ms', 'mean_ms'],
+                        help='metric compared against the baseline')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as tmp_dir:
+        env = child_environment(tmp_dir)
+        print(f"🚀 Starting {args.runs} fresh app process(es)...")
+        runs = [run_once(args.path, not args.skip_models, env) for _ in range(args.runs)]
+        imports = slowest_imports(env, args.top)
+
+    phases = ('import_ms', 'models_ms', 'first_request_ms', 'ready_ms', 'process_ms')
+    results = {phase: summarize_samples([run[phase] / 1000 for run in runs]) for phase in phases}
+
+    print(f"{'phase':<18} {'p50 ms':>10} {'p95 ms':>10}")
+    print('-' * 40)
+    for phase, summary in results.items():
+        print(f"{phase:<18} {summary['p50_ms']:>10.1f} {summary['p95_ms']:>10.1f}")
+    if imports:
+        print("🐢 Slowest modules imported by app.py:")
+        for name, ms in imports:
+            print(f"   {name:<40} {ms:>8.1f} ms")
+
+    payload = {
+        'benchmark': 'startup',
+        'metadata': run_metadata({
+            'runs': args.runs,
+            'path': args.path,
+            'load_models': not args.skip_models,
+            'statuses': sorted({run['status'] for run in runs})
+        }),
+        'slowest_imports': imports,
+        'results': results
+    }
+    output_path = save_results(payload, args.output or default_output_path('startup'))
+    print(f"💾 Results saved to {output_path}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), payload,
+                                      threshold=args.threshold, metric=args.metric)
+        if report_regressions(regressions, args.threshold, args.metric):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
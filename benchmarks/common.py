@@ -0,0 +1,119 @@
+"""
+Shared helpers for the benchmark scripts: percentiles, result files and regression checks
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples using linear interpolation"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = rank - lower
+    return float(ordered[lower] + (ordered[upper] - ordered[lower]) * weight)
+
+def summarize_samples(samples):
+    """Summarize a list of durations (seconds) as milliseconds plus throughput"""
+    total = sum(samples)
+    return {
+        'samples': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round((total / len(samples)) * 1000, 3) if samples else 0.0,
+        'docs_per_sec': round(len(samples) / total, 2) if total > 0 else 0.0
+    }
+
+def run_metadata(extra=None):
+    """Describe the environment a benchmark ran in so results can be compared"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = 'unknown'
+
+    metadata = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+    if extra:
+        metadata.update(extra)
+    return metadata
+
+def default_output_path(name):
+    """Build a timestamped results path under benchmarks/results/"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+
+def save_results(results, path):
+    """Write benchmark results as pretty-printed JSON"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    return path
+
+def load_results(path):
+    """Load a previously saved results file"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def compare_results(baseline, current, threshold=0.2, metric='p50_ms', min_delta_ms=0.5):
+    """
+    Compare two result files produced by the same benchmark.
+
+    Results are nested dicts whose leaves are summaries from summarize_samples().
+    A leaf regresses when its metric grew by more than threshold (a fraction)
+    and by more than min_delta_ms, which keeps sub-millisecond noise out.
+    Returns a list of (path, baseline_value, current_value, ratio) regressions.
+    """
+    regressions = []
+
+    def walk(base_node, cur_node, path):
+        if isinstance(cur_node, dict) and metric in cur_node:
+            if not isinstance(base_node, dict) or metric not in base_node:
+                return
+            base_value = base_node[metric]
+            cur_value = cur_node[metric]
+            if base_value <= 0:
+                return
+            ratio = cur_value / base_value
+            if ratio > 1 + threshold and cur_value - base_value > min_delta_ms:
+                regressions.append(('/'.join(path), base_value, cur_value, ratio))
+            return
+        if isinstance(cur_node, dict) and isinstance(base_node, dict):
+            for key, value in cur_node.items():
+                if key in base_node:
+                    walk(base_node[key], value, path + [key])
+
+    walk(baseline.get('results', {}), current.get('results', {}), [])
+    return regressions
+
+def report_regressions(regressions, threshold, metric='p50_ms'):
+    """Print a regression report; returns True when the run should fail"""
+    if not regressions:
+        print(f"✅ No {metric} regressions above {threshold:.0%}")
+        return False
+
+    print(f"❌ {len(regressions)} {metric} regression(s) above {threshold:.0%}:")
+    for path, base_value, cur_value, ratio in regressions:
+        print(f"   {path}: {base_value:.3f} ms -> {cur_value:.3f} ms ({ratio:.2f}x)")
+    return True
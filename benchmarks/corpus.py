@@ -0,0 +1,137 @@
+"""
+Deterministic, offline benchmark corpus of synthetic news articles.
+
+Articles are assembled from fixed word pools with a seeded random generator,
+so the same seed always yields byte-identical documents on every machine.
+"""
+
+import random
+
+DEFAULT_SEED = 1234
+
+# Target word counts per document size class
+SIZE_CLASSES = {
+    'short': 40,
+    'medium': 450,
+    'long': 9000
+}
+
+# Number of documents generated per size class
+DEFAULT_COUNTS = {
+    'short': 24,
+    'medium': 12,
+    'long': 3
+}
+
+SUBJECTS = [
+    'The government', 'The central bank', 'A technology company', 'Hospital officials',
+    'The city council', 'Investors', 'The national team', 'Researchers', 'The prime minister',
+    'Local residents', 'The university', 'Police', 'The startup', 'Climate scientists',
+    'Senate Republicans', 'Health Department officials', 'Shareholders', 'The coach'
+]
+
+VERBS = [
+    'announced', 'warned about', 'confirmed', 'denied', 'celebrated', 'criticized',
+    'launched', 'reported', 'welcomed', 'rejected', 'investigated', 'praised',
+    'delayed', 'approved', 'questioned', 'revealed'
+]
+
+OBJECTS = [
+    'a new policy on renewable energy', 'record quarterly profits', 'rising inflation',
+    'a breakthrough cancer treatment', 'the championship victory', 'budget cuts to public schools',
+    'a data breach affecting millions of users', 'the trade agreement', 'severe flooding in the region',
+    'an artificial intelligence platform', 'the election results', 'a vaccine trial',
+    'job losses at the factory', 'the merger with a rival firm', 'new climate targets',
+    'the court verdict', 'a surge in violent crime', 'the opening of a new stadium'
+]
+
+CLAUSES = [
+    'according to a statement released on Monday',
+    'despite strong opposition from critics',
+    'following months of negotiations',
+    'amid growing concern among experts',
+    'which analysts described as significant',
+    'although the details remain unclear',
+    'in a move that surprised the markets',
+    'as officials demonstrate a comprehensive response',
+    'while residents said it was awesome news',
+    'and the decision is expected to face legal challenges'
+]
+
+NUMBERS = ['3', '12', '250', '1,500', '4.5 percent', '2 million', '30 billion dollars', '2025']
+
+TITLES = [
+    'Markets rally as {subject} {verb} {object}',
+    '{subject} {verb} {object}',
+    'You won\'t believe how {subject} {verb} {object}',
+    'Analysis: what {object} means for voters',
+    '{n} things to know about {object}',
+    'BREAKING: {subject} {verb} {object}!!'
+]
+
+def _sentence(rng):
+    """Build one synthetic news sentence"""
+    sentence = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+    if rng.random() < 0.6:
+        sentence += f", {rng.choice(CLAUSES)}"
+    if rng.random() < 0.3:
+        sentence += f", with {rng.choice(NUMBERS)} cited in the report"
+    return sentence + '.'
+
+def _title(rng):
+    """Build a synthetic headline, sometimes clickbait-shaped"""
+    template = rng.choice(TITLES)
+    return template.format(
+        subject=rng.choice(SUBJECTS),
+        verb=rng.choice(VERBS),
+        object=rng.choice(OBJECTS),
+        n=rng.randint(3, 12)
+    )
+
+def generate_document(rng, target_words):
+    """Generate a (title, content) pair of roughly target_words words"""
+    sentences = []
+    word_count = 0
+    paragraph = []
+    while word_count < target_words:
+        sentence = _sentence(rng)
+        paragraph.append(sentence)
+        word_count += len(sentence.split())
+        if len(paragraph) >= rng.randint(3, 6):
+            sentences.append(' '.join(paragraph))
+            paragraph = []
+    if paragraph:
+        sentences.append(' '.join(paragraph))
+    return _title(rng), '\n\n'.join(sentences)
+
+def build_corpus(seed=DEFAULT_SEED, counts=None):
+    """
+    Build the benchmark corpus.
+
+    Returns a dict mapping size class -> list of {'title', 'content'} dicts.
+    """
+    counts = counts or DEFAULT_COUNTS
+    corpus = {}
+    for size_class, target_words in SIZE_CLASSES.items():
+        # Separate generator per class so changing one count doesn't shift the others
+        rng = random.Random(f"{seed}-{size_class}")
+        documents = []
+        for _ in range(counts.get(size_class, 0)):
+            title, content = generate_document(rng, target_words)
+            documents.append({'title': title, 'content': content})
+        corpus[size_class] = documents
+    return corpus
+
+def build_history_rows(seed=DEFAULT_SEED, count=100):
+    """Build deterministic history rows used to seed the similar-articles scan"""
+    rng = random.Random(f"{seed}-history")
+    rows = []
+    for i in range(count):
+        title, content = generate_document(rng, 120)
+        rows.append({
+            'title': f"{title} #{i}",
+            'content': content,
+            'sentiment': 'positive' if rng.random() < 0.5 else 'negative',
+            'confidence': round(rng.uniform(0.55, 0.95), 4)
+        })
+    return rows
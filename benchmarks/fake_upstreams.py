@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for Mediastack, NewsAPI, RSS feeds and Google Translate.
+
+One threaded HTTP server answers all four upstreams with canned, deterministic
+payloads. Each service has its own latency (plus jitter) and error rate, which
+can be changed while running via GET /_control?service=translate&latency_ms=800.
+
+Standalone usage (prints the environment variables to point app.py at it):
+    python -m benchmarks.fake_upstreams --port 8900 --latency-ms 50 --error-rate 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.corpus import SUBJECTS, VERBS, OBJECTS, CLAUSES
+
+SERVICES = ('mediastack', 'newsapi', 'rss', 'translate')
+
+# Number of distinct RSS feeds served at /rss/<n>.xml
+RSS_FEED_COUNT = 8
+
+def _headline(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+
+def _description(rng):
+    return f"{_headline(rng)}, {rng.choice(CLAUSES)}. {_headline(rng)}."
+
+def build_articles(key, count=10):
+    """Deterministic article dicts for a given category/country/feed key"""
+    rng = random.Random(key)
+    return [
+        {
+            'title': _headline(rng),
+            'description': _description(rng),
+            'url': f"https://example.com/{key}/{i}",
+            'published': formatdate(1735689600 + i * 3600, usegmt=True)
+        }
+        for i in range(count)
+    ]
+
+def build_rss_feed(feed_id, count=20):
+    """Render a small RSS 2.0 document"""
+    items = []
+    for article in build_articles(f"rss-{feed_id}", count):
+        items.append(
+            '<item>'
+            f"<title>{article['title']}</title>"
+            f"<description>{article['description']}</description>"
+            f"<link>{article['url']}</link>"
+            f"<pubDate>{article['published']}</pubDate>"
+            '</item>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f"<title>Fake Feed {feed_id}</title>"
+        f"<link>https://example.com/rss/{feed_id}</link>"
+        '<description>Local stand-in feed</description>'
+        f"{''.join(items)}"
+        '</channel></rss>'
+    )
+
+class ServiceSettings:
+    """Mutable latency/error configuration and call counters for one service"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'error_rate': self.error_rate,
+            'calls': self.calls,
+            'errors': self.errors
+        }
+
+class FakeUpstreams:
+    """Threaded HTTP server hosting every fake upstream on one port"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0):
+        self.settings = {
+            service: ServiceSettings(latency_ms, jitter_ms, error_rate) for service in SERVICES
+        }
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """Environment variables that point app.py at these stand-ins"""
+        return {
+            'MEDIASTACK_API_URL': f"{self.base_url}/mediastack/v1/news",
+            'NEWSAPI_API_URL': f"{self.base_url}/newsapi/v2/top-headlines",
+            'GOOGLE_TRANSLATE_API_URL': f"{self.base_url}/translate/language/translate/v2",
+            'RSS_FEED_URLS': ','.join(f"{self.base_url}/rss/{i}.xml" for i in range(RSS_FEED_COUNT))
+        }
+
+    def configure(self, service, latency_ms=None, jitter_ms=None, error_rate=None):
+        """Change latency/error settings for one service (or 'all')"""
+        targets = SERVICES if service == 'all' else (service,)
+        with self._lock:
+            for name in targets:
+                settings = self.settings[name]
+                if latency_ms is not None:
+                    settings.latency_ms = float(latency_ms)
+                if jitter_ms is not None:
+                    settings.jitter_ms = float(jitter_ms)
+                if error_rate is not None:
+                    settings.error_rate = float(error_rate)
+
+    def stats(self):
+        with self._lock:
+            return {service: settings.as_dict() for service, settings in self.settings.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-upstreams', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _admit(self, service):
+        """Apply simulated latency; returns False when this call should fail"""
+        with self._lock:
+            settings = self.settings[service]
+            settings.calls += 1
+            delay = settings.latency_ms + self._rng.uniform(0, settings.jitter_ms)
+            failed = self._rng.random() < settings.error_rate
+            if failed:
+                settings.errors += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return not failed
+
+    def _make_handler(self):
+        upstreams = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json', headers=None):
+                payload = body.encode('utf-8') if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _params(self):
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+                if self.command == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = self.rfile.read(length).decode('utf-8') if length else ''
+                    for key, values in parse_qs(body).items():
+                        params.setdefault(key, []).extend(values)
+                return parsed.path, params
+
+            def _route(self):
+                path, params = self._params()
+                first = lambda name, default=None: params.get(name, [default])[0]
+
+                if path == '/_control':
+                    service = first('service', 'all')
+                    if service != 'all' and service not in SERVICES:
+                        return self._send(400, json.dumps({'error': f'unknown service {service}'}))
+                    upstreams.configure(service, first('latency_ms'), first('jitter_ms'), first('error_rate'))
+                    return self._send(200, json.dumps(upstreams.stats()))
+
+                if path.startswith('/mediastack/'):
+                    if not upstreams._admit('mediastack'):
+                        return self._send(503, json.dumps({'error': {'code': 'fake_error'}}))
+                    key = f"ms-{first('categories', 'general')}-{first('countries', 'all')}"
+                    data = [
+                        {'title': a['title'], 'description': a['description'], 'url': a['url'],
+                         'published_at': a['published'], 'source': 'Fake Mediastack', 'image': None}
+                        for a in build_articles(key)
+                    ]
+                    return self._send(200, json.dumps({'data': data}))
+
+                if path.startswith('/newsapi/'):
+                    if not upstreams._admit('newsapi'):
+                        return self._send(503, json.dumps({'status': 'error', 'code': 'fake_error'}))
+                    key = f"na-{first('category', 'general')}-{first('country', 'us')}"
+                    articles = [
+                        {'title': a['title'], 'description': a['description'], 'url': a['url'],
+                         'publishedAt': a['published'], 'source': {'name': 'Fake NewsAPI'}, 'urlToImage': None}
+                        for a in build_articles(key)
+                    ]
+                    return self._send(200, json.dumps({'status': 'ok', 'articles': articles}))
+
+                if path.startswith('/rss/'):
+                    if not upstreams._admit('rss'):
+                        return self._send(503, 'Service Unavailable', 'text/plain')
+                    feed_id = path.rsplit('/', 1)[-1].split('.')[0]
+                    body = build_rss_feed(feed_id)
+                    # Feeds never change, so conditional requests always get a 304
+                    etag = '"' + hashlib.sha1(body.encode('utf-8')).hexdigest()[:16] + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(304, b'', 'application/rss+xml', {'ETag': etag})
+                    return self._send(200, body, 'application/rss+xml', {'ETag': etag})
+
+                if path.startswith('/translate/'):
+                    if not upstreams._admit('translate'):
+                        return self._send(503, json.dumps({'error': {'code': 503, 'message': 'fake_error'}}))
+                    source = first('source', 'und')
+                    translations = [
+                        {'translatedText': text, 'detectedSourceLanguage': source}
+                        for text in params.get('q', [])
+                    ]
+                    return self._send(200, json.dumps({'data': {'translations': translations}}))
+
+                return self._send(404, json.dumps({'error': 'not found'}))
+
+            def do_GET(self):
+                self._route()
+
+            def do_POST(self):
+                self._route()
+
+        return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run local stand-ins for the news and translate APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    upstreams = FakeUpstreams(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"🧪 Fake upstreams listening on {upstreams.base_url}")
+    print("Point the app at them with:")
+    for key, value in upstreams.environment().items():
+        print(f"  export {key}='{value}'")
+    print("  export NEWS_API_KEY='fake-mediastack-key-0123456789abcdef'")
+    print("  export GOOGLE_TRANSLATE_API_KEY='fake-translate-key'")
+    try:
+        upstreams.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Fake upstreams stopped")
+    finally:
+        upstreams.server.server_close()
+
+if __name__ == '__main__':
+    main()
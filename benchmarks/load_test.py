@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness for the Flask app with local upstream stand-ins.
+
+Starts the fake Mediastack/NewsAPI/RSS/Translate servers, points app.py at
+them through environment variables, serves the app in-process and drives it
+with concurrent mixed traffic. Reports throughput, latency percentiles and
+error rates per endpoint; the history database is a temporary copy.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 16 --duration 30
+    python -m benchmarks.load_test --upstream-latency-ms 800 --upstream-error-rate 0.2
+    python -m benchmarks.load_test --translate-latency-ms 1500 --output slow-translate.json
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.common import (
+    REPO_ROOT, summarize_samples, run_metadata, default_output_path,
+    save_results, load_results, compare_results, report_regressions
+)
+from benchmarks.corpus import DEFAULT_SEED, build_corpus
+from benchmarks.fake_upstreams import FakeUpstreams
+
+# Relative request weights of the default traffic mix
+DEFAULT_MIX = {
+    'predict': 30,
+    'analyze-article': 20,
+    'trending-news': 20,
+    'sentiment-distribution': 15,
+    'history': 15
+}
+
+CATEGORIES = ['general', 'business', 'technology', 'health', 'science', 'sports', 'entertainment']
+COUNTRIES = ['us', 'gb', 'ca', 'au', 'in']
+
+# Non-English documents so /predict exercises the translation path
+FOREIGN_DOCUMENTS = [
+    {'title': 'El gobierno anuncia nuevas medidas económicas',
+     'content': 'El gobierno anunció hoy un paquete de medidas para reducir la inflación y apoyar a las '
+                'familias. Los analistas consideran que el plan es positivo para la economía del país.'},
+    {'title': 'Le marché boursier recule fortement',
+     'content': 'Les marchés financiers ont fortement reculé cette semaine après des résultats décevants. '
+                'Les investisseurs craignent une récession et les entreprises réduisent leurs prévisions.'},
+    {'title': 'Neue Klimaziele vorgestellt',
+     'content': 'Die Regierung hat neue Klimaziele vorgestellt, die den Ausstoß von Treibhausgasen bis 2030 '
+                'deutlich senken sollen. Umweltverbände begrüßen den Plan, fordern aber mehr Tempo.'}
+]
+
+class TrafficGenerator:
+    """Builds randomized requests for each endpoint from the benchmark corpus"""
+
+    def __init__(self, seed, mix, foreign_ratio):
+        corpus = build_corpus(seed, counts={'short': 30, 'medium': 15, 'long': 1})
+        self.documents = corpus['short'] + corpus['medium'] + corpus['long']
+        self.mix_names = list(mix.keys())
+        self.mix_weights = list(mix.values())
+        self.foreign_ratio = foreign_ratio
+
+    def _document(self, rng):
+        if rng.random() < self.foreign_ratio:
+            return rng.choice(FOREIGN_DOCUMENTS)
+        return rng.choice(self.documents)
+
+    def next_request(self, rng):
+        """Return (endpoint name, method, path, kwargs) for one request"""
+        endpoint = rng.choices(self.mix_names, weights=self.mix_weights)[0]
+        if endpoint == 'predict':
+            doc = self._document(rng)
+            return endpoint, 'POST', '/predict', {'json': {'title': doc['title'], 'text': doc['content']}}
+        if endpoint == 'analyze-article':
+            doc = self._document(rng)
+            return endpoint, 'POST', '/analyze-article', {
+                'json': {'title': doc['title'], 'content': doc['content'], 'url': 'https://example.com/load'}
+            }
+        if endpoint == 'trending-news':
+            params = {'category': rng.choice(CATEGORIES), 'country': rng.choice(COUNTRIES)}
+            return endpoint, 'GET', '/trending-news', {'params': params}
+        if endpoint == 'sentiment-distribution':
+            return endpoint, 'GET', '/sentiment-distribution', {'params': {'days': rng.choice([0.0417, 1, 7])}}
+        return endpoint, 'GET', '/history', {'params': {'limit': rng.choice([10, 50])}}
+
+class ResultCollector:
+    """Thread-safe latency/status accumulator"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            key = str(status)
+            self.statuses.setdefault(endpoint, {}).setdefault(key, 0)
+            self.statuses[endpoint][key] += 1
+            if status == 'exception' or int(status) >= 500:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed):
+        results = {}
+        all_latencies = []
+        total_errors = 0
+        for endpoint, latencies in sorted(self.latencies.items()):
+            errors = self.errors.get(endpoint, 0)
+            summary = summarize_samples(latencies)
+            summary['requests'] = len(latencies)
+            summary['errors'] = errors
+            summary['error_rate'] = round(errors / len(latencies), 4)
+            summary['throughput_rps'] = round(len(latencies) / elapsed, 2)
+            summary['statuses'] = self.statuses.get(endpoint, {})
+            results[endpoint] = summary
+            all_latencies.extend(latencies)
+            total_errors += errors
+
+        overall = summarize_samples(all_latencies) if all_latencies else {}
+        overall['requests'] = len(all_latencies)
+        overall['errors'] = total_errors
+        overall['error_rate'] = round(total_errors / len(all_latencies), 4) if all_latencies else 0.0
+        overall['throughput_rps'] = round(len(all_latencies) / elapsed, 2)
+        results['overall'] = overall
+        return results
+
+def start_app_server(app_module):
+    """Serve the Flask app on an ephemeral port in a background thread"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='app-under-test', daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def run_load(base_url, generator, concurrency, duration, max_requests, seed, timeout):
+    """Drive the app with `concurrency` client threads until duration or max_requests"""
+    collector = ResultCollector()
+    deadline = time.perf_counter() + duration
+    issued = [0]
+    issued_lock = threading.Lock()
+
+    def worker(worker_id):
+        rng = random.Random(f"{seed}-{worker_id}")
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            with issued_lock:
+                if max_requests and issued[0] >= max_requests:
+                    return
+                issued[0] += 1
+            endpoint, method, path, kwargs = generator.next_request(rng)
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, timeout=timeout, **kwargs)
+                status = response.status_code
+            except requests.RequestException:
+                status = 'exception'
+            collector.record(endpoint, time.perf_counter() - start, status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for worker_id in range(concurrency):
+            pool.submit(worker, worker_id)
+    elapsed = time.perf_counter() - start
+    return collector.summary(elapsed), elapsed
+
+def print_report(results, elapsed):
+    header = (f"{'endpoint':<24} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'err %':>7}")
+    print(header)
+    print('-' * len(header))
+    for endpoint, summary in results.items():
+        if not summary.get('requests'):
+            continue
+        print(f"{endpoint:<24} {summary['requests']:>6} {summary['throughput_rps']:>8.2f} "
+              f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f} "
+              f"{summary['error_rate'] * 100:>6.2f}%")
+    print(f"⏱️  Elapsed: {elapsed:.1f}s")
+
+def parse_mix(value):
+    """Parse 'predict=30,history=10' into a weight dict"""
+    mix = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive the app with concurrent mixed traffic against fake upstreams')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of load (default: 20)')
+    parser.add_argument('--max-requests', type=int, default=0, help='stop after N requests (0 = unlimited)')
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX),
+                        help='endpoint weights, e.g. predict=30,history=10')
+    parser.add_argument('--foreign-ratio', type=float, default=0.2,
+                        help='share of analysis requests using non-English text (default: 0.2)')
+    parser.add_argument('--news-provider', choices=['mediastack', 'newsapi', 'rss'], default='mediastack',
+                        help='which upstream /trending-news should hit first')
+    parser.add_argument('--upstream-latency-ms', type=float, default=20.0)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=10.0)
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0)
+    for service in ('mediastack', 'newsapi', 'rss', 'translate'):
+        parser.add_argument(f"--{service}-latency-ms", type=float, help=f"override latency for {service}")
+        parser.add_argument(f"--{service}-error-rate", type=float, help=f"override error rate for {service}")
+    parser.add_argument('--request-timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/load-<time>.json)')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--verbose', action='store_true', help='keep the app\'s stdout logging')
+    args = parser.parse_args(argv)
+
+    upstreams = FakeUpstreams(latency_ms=args.upstream_latency_ms, jitter_ms=args.upstream_jitter_ms,
+                              error_rate=args.upstream_error_rate, seed=args.seed).start()
+    for service in ('mediastack', 'newsapi', 'rss', 'translate'):
+        upstreams.configure(service,
+                            latency_ms=getattr(args, f"{service}_latency_ms"),
+                            error_rate=getattr(args, f"{service}_error_rate"))
+    print(f"🧪 Fake upstreams on {upstreams.base_url}")
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    os.environ.update(upstreams.environment())
+    os.environ['ARTICLE_HISTORY_DB'] = os.path.join(tmp_dir.name, 'load_history.db')
+    os.environ['FEED_STATE_DB'] = os.path.join(tmp_dir.name, 'feed_state.db')
+    os.environ['NEWS_CACHE_DB'] = os.path.join(tmp_dir.name, 'news_cache.db')
+    os.environ['RATE_LIMIT_DB'] = os.path.join(tmp_dir.name, 'rate_limits.db')
+    os.environ['TRANSLATION_CACHE_DB'] = os.path.join(tmp_dir.name, 'translation_cache.db')
+    os.environ['GOOGLE_TRANSLATE_API_KEY'] = 'fake-translate-key'
+    # Key length selects the provider in fetch_trending_news
+    os.environ['NEWS_API_KEY'] = {
+        'mediastack': 'fake-mediastack-key-0123456789abcdef',
+        'newsapi': 'fake-newsapi-key',
+        'rss': ''
+    }[args.news_provider]
+
+    os.chdir(REPO_ROOT)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    sink = open(os.devnull, 'w')
+    quiet = contextlib.redirect_stdout(sink) if not args.verbose else contextlib.nullcontext()
+
+    try:
+        with quiet:
+            import app as app_module
+            app_module.init_database()
+            if not app_module.load_models():
+                print("❌ Failed to load models. Please check model files.", file=sys.stderr)
+                return 2
+            server, base_url = start_app_server(app_module)
+
+        print(f"🚀 App under test on {base_url}; {args.concurrency} clients for {args.duration:.0f}s")
+        with quiet:
+            results, elapsed = run_load(base_url, TrafficGenerator(args.seed, args.mix, args.foreign_ratio),
+                                        args.concurrency, args.duration, args.max_requests,
+                                        args.seed, args.request_timeout)
+            server.shutdown()
+    finally:
+        upstreams.stop()
+        sink.close()
+        tmp_dir.cleanup()
+
+    print_report(results, elapsed)
+    import circuit_breaker
+    import http_client
+    connection_stats = http_client.connection_stats()
+    circuits = circuit_breaker.snapshot()
+    for service, state in circuits.items():
+        if state['state'] != 'closed' or state['failures']:
+            print(f"🔌 Circuit {service}: {state['state']} ({state['failures']}/{state['calls']} recent calls failed)")
+    for host, stats in connection_stats.items():
+        print(f"🔌 Outbound {host}: {stats['requests']} requests over {stats['connections']} connections "
+              f"({stats['reuse_ratio']:.0%} reused)")
+    payload = {
+        'benchmark': 'load',
+        'metadata': run_metadata({
+            'seed': args.seed,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'mix': args.mix,
+            'foreign_ratio': args.foreign_ratio,
+            'news_provider': args.news_provider
+        }),
+        'upstreams': upstreams.stats(),
+        'outbound_connections': connection_stats,
+        'circuits': circuits,
+        'results': results
+    }
+    output_path = save_results(payload, args.output or default_output_path('load'))
+    print(f"💾 Results saved to {output_path}")
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), payload, threshold=args.threshold, metric='p95_ms')
+        if report_regressions(regressions, args.threshold, 'p95_ms'):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Circuit breakers for the external services (Mediastack, NewsAPI, Translate, Speech).
+
+Each breaker keeps a rolling window of recent call outcomes; calls slower than
+the service's slow-call threshold (SLOW_CALL_SECONDS) count as failures. A breaker opens after
+CIRCUIT_CONSECUTIVE_FAILURES failures in a row, or once the failure ratio in
+the window reaches CIRCUIT_FAILURE_RATIO. While open, calls are rejected
+immediately with CircuitOpenError, so callers go straight to their fallback
+(RSS feeds, untranslated text). After CIRCUIT_OPEN_SECONDS a limited number of
+half-open probe calls are let through: a successful probe closes the breaker,
+a failed one opens it again.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import requests
+
+import metrics
+
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '20'))
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '5'))
+CIRCUIT_FAILURE_RATIO = float(os.getenv('CIRCUIT_FAILURE_RATIO', '0.5'))
+CIRCUIT_CONSECUTIVE_FAILURES = int(os.getenv('CIRCUIT_CONSECUTIVE_FAILURES', '3'))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '3'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', '1'))
+
+SERVICES = ('mediastack', 'newsapi', 'translate', 'speech')
+
+# Slow-call threshold per service in seconds (0 disables it). Recognizing a long audio chunk
+# routinely takes longer than an API call, so speech is only judged by its errors by default.
+SLOW_CALL_SECONDS = {
+    'mediastack': CIRCUIT_SLOW_CALL_SECONDS,
+    'newsapi': CIRCUIT_SLOW_CALL_SECONDS,
+    'translate': CIRCUIT_SLOW_CALL_SECONDS,
+    'speech': float(os.getenv('CIRCUIT_SPEECH_SLOW_CALL_SECONDS', '0'))
+}
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = metrics.gauge(
+    'news_sentiment_circuit_state',
+    'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)', ('service',))
+
+CIRCUIT_TRANSITIONS = metrics.counter(
+    'news_sentiment_circuit_transitions_total',
+    'Circuit breaker state changes', ('service', 'from_state', 'to_state'))
+
+CIRCUIT_REJECTED = metrics.counter(
+    'news_sentiment_circuit_rejected_total',
+    'Calls rejected because the circuit was open', ('service',))
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a service whose circuit is open"""
+
+class CircuitBreaker:
+    """Failure/latency-tracking breaker for one upstream service"""
+
+    def __init__(self, name, window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS,
+                 failure_ratio=CIRCUIT_FAILURE_RATIO, consecutive_failures=CIRCUIT_CONSECUTIVE_FAILURES,
+                 slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS, open_seconds=CIRCUIT_OPEN_SECONDS,
+                 half_open_probes=CIRCUIT_HALF_OPEN_PROBES):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.consecutive_failures = consecutive_failures
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._failures_in_row = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED], service=name)
+
+    def allow(self):
+        """Return True if a call may go ahead now"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    CIRCUIT_REJECTED.inc(service=self.name)
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    CIRCUIT_REJECTED.inc(service=self.name)
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, duration=0.0):
+        """Report a completed call; slow calls count as failures"""
+        if self.slow_call_seconds and duration >= self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._outcomes.append(True)
+            self._failures_in_row = 0
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._outcomes.clear()
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        """Report a failed (or too slow) call"""
+        with self._lock:
+            self._outcomes.append(False)
+            self._failures_in_row += 1
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+            elif self.state == CLOSED and self._should_open():
+                self._open()
+
+    def release(self):
+        """Give back a half-open probe for a call that ended without an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    @contextmanager
+    def guard(self):
+        """Run a call under the breaker: rejects when open, records the outcome"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success(time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = calls - sum(self._outcomes)
+            return {
+                'state': self.state,
+                'calls': calls,
+                'failures': failures,
+                'failures_in_row': self._failures_in_row
+            }
+
+    def _should_open(self):
+        if self._failures_in_row >= self.consecutive_failures:
+            return True
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return False
+        return (calls - sum(self._outcomes)) / calls >= self.failure_ratio
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state):
+        if state == self.state:
+            return
+        CIRCUIT_TRANSITIONS.inc(service=self.name, from_state=self.state, to_state=state)
+        CIRCUIT_STATE.set(STATE_VALUES[state], service=self.name)
+        self.state = state
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get(name):
+    """Get or create the breaker for a service"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name, slow_call_seconds=SLOW_CALL_SECONDS.get(name, CIRCUIT_SLOW_CALL_SECONDS))
+        return breaker
+
+def snapshot():
+    """State of every breaker, keyed by service"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+for _service in SERVICES:
+    get(_service)
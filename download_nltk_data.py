@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Download the NLTK data the app needs into a local directory
+
+The app reads NLTK data from NLTK_DATA_DIR (default: ./nltk_data) and never
+downloads it while serving requests, so run this once at build/deploy time:
+
+    python download_nltk_data.py
+    python download_nltk_data.py --target /opt/news-sentiment/nltk_data
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# punkt_tab is the tokenizer data for newer NLTK releases; cmudict is used by textstat
+RESOURCES = ['punkt', 'punkt_tab', 'stopwords', 'cmudict']
+
+def main(argv=None):
+    load_dotenv()
+    default_target = os.getenv('NLTK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+    parser = argparse.ArgumentParser(description='Download NLTK data for the app')
+    parser.add_argument('--target', default=default_target, help=f'download directory (default: {default_target})')
+    args = parser.parse_args(argv)
+
+    import nltk
+
+    os.makedirs(args.target, exist_ok=True)
+    print(f"📥 Downloading NLTK data to {args.target}...")
+    failed = [resource for resource in RESOURCES
+              if not nltk.download(resource, download_dir=args.target, quiet=True)]
+    if failed:
+        print(f"❌ Could not download: {', '.join(failed)}")
+        return 1
+    print(f"✅ Downloaded: {', '.join(RESOURCES)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
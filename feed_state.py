@@ -0,0 +1,146 @@
+"""
+Per-feed polling state for RSS sources.
+
+Each feed's ETag, Last-Modified, last parsed articles and next poll time are
+kept in a small SQLite database (FEED_STATE_DB), so every worker process
+shares them. fetch_rss_feed in app.py serves cached articles until the next
+poll is due, then sends a conditional request; a 304 reuses the stored
+articles without parsing anything.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from email.utils import parsedate_to_datetime
+
+import metrics
+
+FEED_STATE_DB = os.getenv('FEED_STATE_DB', 'feed_state.db')
+# Poll interval bounds (seconds) for feed TTL / Cache-Control / Expires; Retry-After may exceed the maximum
+FEED_MIN_POLL_INTERVAL = float(os.getenv('FEED_MIN_POLL_INTERVAL', '60'))
+FEED_MAX_POLL_INTERVAL = float(os.getenv('FEED_MAX_POLL_INTERVAL', '3600'))
+# Entries parsed and kept per feed; parsing stops once this many are read
+FEED_STATE_MAX_ENTRIES = int(os.getenv('FEED_STATE_MAX_ENTRIES', '20'))
+
+FEED_POLLS = metrics.counter(
+    'news_sentiment_feed_polls_total',
+    'RSS feed lookups by result (cached, not_modified, fetched, error)', ('result',))
+
+_initialized = set()
+
+def _connect():
+    conn = sqlite3.connect(FEED_STATE_DB, timeout=5)
+    if FEED_STATE_DB not in _initialized:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS feed_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                articles TEXT,
+                fetched_at REAL,
+                next_poll_at REAL
+            )
+        ''')
+        conn.commit()
+        _initialized.add(FEED_STATE_DB)
+    return conn
+
+def get_state(url):
+    """Return the stored state of a feed as a dict, or None"""
+    try:
+        conn = _connect()
+        row = conn.execute(
+            'SELECT etag, last_modified, articles, fetched_at, next_poll_at FROM feed_state WHERE url = ?',
+            (url,)).fetchone()
+        conn.close()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return {
+        'etag': row[0],
+        'last_modified': row[1],
+        'articles': json.loads(row[2]) if row[2] else [],
+        'fetched_at': row[3],
+        'next_poll_at': row[4] or 0
+    }
+
+def save_state(url, etag, last_modified, articles, next_poll_at):
+    """Store a freshly fetched feed"""
+    try:
+        conn = _connect()
+        conn.execute('''
+            INSERT OR REPLACE INTO feed_state (url, etag, last_modified, articles, fetched_at, next_poll_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (url, etag, last_modified, json.dumps(articles[:FEED_STATE_MAX_ENTRIES]), time.time(), next_poll_at))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+def defer_poll(url, next_poll_at, etag=None, last_modified=None):
+    """Push back the next poll of a feed, keeping its articles (304, 429, 503 ...)"""
+    try:
+        conn = _connect()
+        conn.execute('''
+            UPDATE feed_state
+            SET next_poll_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+            WHERE url = ?
+        ''', (next_poll_at, etag, last_modified, url))
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+def poll_due(state, now=None):
+    """True when a feed has no usable state or its next poll time has passed"""
+    if not state or not state['articles']:
+        return True
+    return (now or time.time()) >= state['next_poll_at']
+
+def conditional_headers(state):
+    """If-None-Match / If-Modified-Since headers for a stored feed"""
+    headers = {}
+    if state and state['articles']:
+        if state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+    return headers
+
+def _parse_delay(value, now):
+    """Seconds from an HTTP delay value: either a number or an HTTP-date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return parsedate_to_datetime(value).timestamp() - now
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def next_poll_time(headers, feed_ttl_minutes=None, now=None):
+    """Next poll time from Retry-After, Cache-Control max-age, Expires or the RSS <ttl>"""
+    now = now or time.time()
+    retry_after = _parse_delay(headers.get('Retry-After'), now)
+    if retry_after is not None:
+        # Honour Retry-After even beyond the usual maximum interval
+        return now + max(retry_after, FEED_MIN_POLL_INTERVAL)
+    delay = None
+    for directive in headers.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.lower() == 'max-age' and value.strip().isdigit():
+            delay = float(value)
+    if delay is None:
+        delay = _parse_delay(headers.get('Expires'), now)
+    if delay is None and feed_ttl_minutes:
+        try:
+            delay = float(feed_ttl_minutes) * 60
+        except (TypeError, ValueError):
+            delay = None
+    if delay is None:
+        delay = FEED_MIN_POLL_INTERVAL
+    return now + min(max(delay, FEED_MIN_POLL_INTERVAL), FEED_MAX_POLL_INTERVAL)
@@ -0,0 +1,200 @@
+"""
+Shared outbound HTTP client.
+
+Every integration (news APIs, RSS feeds, Google Translate) goes through one
+requests.Session per process, so TCP/TLS connections are pooled and kept
+alive between calls. Pool sizes, timeouts and the retry/backoff policy are
+configured here instead of at each call site.
+
+Configuration (environment):
+    HTTP_POOL_HOSTS        hosts kept in the pool manager (default: 16)
+    HTTP_POOL_MAXSIZE      keep-alive connections per host (default: 10)
+    HTTP_HOST_POOL_LIMITS  per-host overrides, e.g. "translation.googleapis.com=32"
+    HTTP_CONNECT_TIMEOUT   seconds to establish a connection (default: 3.05)
+    HTTP_RETRIES           retries on connection errors and 502/503/504 (default: 2); a read
+                           timeout is never retried, so a hung upstream costs one read timeout
+    HTTP_RETRY_BACKOFF     exponential backoff factor in seconds (default: 0.2)
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import circuit_breaker
+import metrics
+
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '16'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+HTTP_HOST_POOL_LIMITS = os.getenv('HTTP_HOST_POOL_LIMITS', '')
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.2'))
+
+# Read timeouts (seconds) per integration; unknown services get the 'default' entry
+READ_TIMEOUTS = {
+    'mediastack': 5.0,
+    'newsapi': 5.0,
+    'rss': 4.0,
+    'translate': 10.0,
+    'default': 10.0
+}
+
+USER_AGENT = 'news-sentiment-analysis/1.0'
+
+CONNECTIONS_OPENED = metrics.gauge(
+    'news_sentiment_http_connections_opened',
+    'Connections opened by the pooled HTTP client, per host', ('host',))
+
+REQUESTS_SENT = metrics.gauge(
+    'news_sentiment_http_pool_requests',
+    'Requests sent by the pooled HTTP client, per host (requests / connections = reuse)', ('host',))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_registered_hosts = set()
+
+def _retry_policy():
+    # POST is included because the only POST integration (translate) is idempotent.
+    # Retry-After is not honoured here: urllib3 would sleep for it, uncapped, inside the request
+    # thread and retry 429s behind the back of feed_state's back-off and rate_limiter's quota.
+    # Callers see the 429/503 response and back off themselves.
+    # Read errors aren't retried: after a read timeout the upstream is hung, and retrying would
+    # multiply the wait of the request (and count as a single failure for the circuit breaker).
+    return Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+
+def _parse_host_limits(value):
+    limits = {}
+    for item in value.split(','):
+        host, _, size = item.partition('=')
+        if host.strip() and size.strip().isdigit():
+            limits[host.strip()] = int(size)
+    return limits
+
+def _build_session():
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=_retry_policy())
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    for host, size in _parse_host_limits(HTTP_HOST_POOL_LIMITS).items():
+        host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=_retry_policy())
+        session.mount(f"https://{host}", host_adapter)
+        session.mount(f"http://{host}", host_adapter)
+    return session
+
+def get_session():
+    """Return this process's shared session (rebuilt after a fork)"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                # Never reuse sockets inherited from a parent process
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+def request(method, url, service='default', timeout=None, deadline=None, **kwargs):
+    """Send a request through the shared session with the service's default timeout
+
+    Services with a circuit breaker raise circuit_breaker.CircuitOpenError (a
+    requests.RequestException) instead of calling out while their circuit is open.
+    With a deadline (a time.monotonic() value) the timeouts are capped to the time
+    left, and requests.Timeout is raised without calling out once it has passed.
+    """
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, READ_TIMEOUTS.get(service, READ_TIMEOUTS['default']))
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"{service} deadline passed")
+        timeout = tuple(min(value, remaining) for value in timeout) if isinstance(timeout, tuple) \
+            else min(timeout, remaining)
+    breaker = circuit_breaker.get(service) if service in circuit_breaker.SERVICES else None
+    if breaker is not None and not breaker.allow():
+        raise circuit_breaker.CircuitOpenError(f"{service} circuit is open")
+
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # Not the upstream's fault, but a half-open probe must not stay taken
+        if breaker is not None:
+            breaker.release()
+        raise
+    _register_host(url)
+
+    if breaker is not None:
+        # Throttling and server errors mean the upstream is unhealthy; 4xx client errors do not
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.perf_counter() - start)
+    return response
+
+def get(url, service='default', **kwargs):
+    return request('GET', url, service=service, **kwargs)
+
+def post(url, service='default', **kwargs):
+    return request('POST', url, service=service, **kwargs)
+
+def _pools():
+    """Yield (host, urllib3 connection pool) for every pool of the shared session"""
+    if _session is None:
+        return
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        container = adapter.poolmanager.pools
+        with container.lock:
+            pools = list(container._container.values())
+        for pool in pools:
+            yield f"{pool.host}:{pool.port}", pool
+
+def connection_stats():
+    """Connections opened and requests sent per host, with the resulting reuse ratio"""
+    stats = {}
+    for host, pool in _pools():
+        entry = stats.setdefault(host, {'connections': 0, 'requests': 0})
+        entry['connections'] += pool.num_connections
+        entry['requests'] += pool.num_requests
+    for entry in stats.values():
+        requests_sent = entry['requests']
+        entry['reuse_ratio'] = round(1 - entry['connections'] / requests_sent, 3) if requests_sent else 0.0
+    return stats
+
+def _host_value(host, field):
+    return connection_stats().get(host, {}).get(field, 0)
+
+def _register_host(url):
+    """Expose a host's pool counters as gauges the first time it is called"""
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    host = f"{parsed.hostname}:{port}"
+    if host in _registered_hosts:
+        return
+    _registered_hosts.add(host)
+    CONNECTIONS_OPENED.set_function(lambda: _host_value(host, 'connections'), host=host)
+    REQUESTS_SENT.set_function(lambda: _host_value(host, 'requests'), host=host)
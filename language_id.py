@@ -0,0 +1,206 @@
+"""
+Language identification shared by the prediction pipeline and the upload endpoints.
+
+detect() returns {'code', 'name', 'is_english'} and is cheap to call
+repeatedly:
+
+- Long texts are identified from a bounded prefix (LANG_ID_SAMPLE_CHARS,
+  cut at a word boundary); the language rarely changes mid-article.
+- langdetect is seeded, so the same text always gets the same answer.
+- Results are cached by a hash of the sample (LANG_ID_CACHE_SIZE entries per
+  process), so the title/content, the translation step and the endpoints that
+  look at the same text only run the detector once.
+- Plain ASCII text dense in English function words is identified as English
+  without running the detector at all.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import metrics
+
+LANG_ID_SAMPLE_CHARS = int(os.getenv('LANG_ID_SAMPLE_CHARS', '1000'))
+LANG_ID_CACHE_SIZE = int(os.getenv('LANG_ID_CACHE_SIZE', '4096'))
+# English fast path: at least this many words, and this share of them function words
+FAST_PATH_MIN_WORDS = 8
+FAST_PATH_MIN_RATIO = 0.25
+
+LANGUAGE_NAMES = {
+    'en': 'English',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ru': 'Russian',
+    'zh': 'Chinese',
+    'zh-cn': 'Chinese (Simplified)',
+    'zh-tw': 'Chinese (Traditional)',
+    'ja': 'Japanese',
+    'ar': 'Arabic',
+    'hi': 'Hindi',
+    'ko': 'Korean',
+    'th': 'Thai',
+    'vi': 'Vietnamese',
+    'tr': 'Turkish',
+    'pl': 'Polish',
+    'nl': 'Dutch',
+    'sv': 'Swedish',
+    'da': 'Danish',
+    'no': 'Norwegian',
+    'fi': 'Finnish',
+    'cs': 'Czech',
+    'hu': 'Hungarian',
+    'ro': 'Romanian',
+    'bg': 'Bulgarian',
+    'hr': 'Croatian',
+    'sk': 'Slovak',
+    'sl': 'Slovenian',
+    'et': 'Estonian',
+    'lv': 'Latvian',
+    'lt': 'Lithuanian',
+    'el': 'Greek',
+    'he': 'Hebrew',
+    'fa': 'Persian',
+    'ur': 'Urdu',
+    'bn': 'Bengali',
+    'ta': 'Tamil',
+    'te': 'Telugu',
+    'ml': 'Malayalam',
+    'kn': 'Kannada',
+    'gu': 'Gujarati',
+    'pa': 'Punjabi',
+    'mr': 'Marathi',
+    'ne': 'Nepali',
+    'si': 'Sinhala',
+    'my': 'Myanmar',
+    'km': 'Khmer',
+    'lo': 'Lao',
+    'ka': 'Georgian',
+    'am': 'Amharic',
+    'sw': 'Swahili',
+    'zu': 'Zulu',
+    'af': 'Afrikaans',
+    'sq': 'Albanian',
+    'eu': 'Basque',
+    'be': 'Belarusian',
+    'bs': 'Bosnian',
+    'ca': 'Catalan',
+    'cy': 'Welsh',
+    'eo': 'Esperanto',
+    'fo': 'Faroese',
+    'fy': 'Frisian',
+    'ga': 'Irish',
+    'gd': 'Scottish Gaelic',
+    'gl': 'Galician',
+    'is': 'Icelandic',
+    'jw': 'Javanese',
+    'lb': 'Luxembourgish',
+    'mk': 'Macedonian',
+    'mg': 'Malagasy',
+    'ms': 'Malay',
+    'mt': 'Maltese',
+    'mn': 'Mongolian',
+    'sr': 'Serbian',
+    'tl': 'Filipino',
+    'uk': 'Ukrainian',
+    'uz': 'Uzbek',
+    'yi': 'Yiddish'
+}
+
+ENGLISH_FUNCTION_WORDS = frozenset((
+    'the', 'of', 'and', 'to', 'in', 'is', 'that', 'for', 'it', 'was', 'on', 'with', 'as', 'are',
+    'be', 'by', 'this', 'at', 'from', 'have', 'has', 'had', 'not', 'but', 'they', 'which', 'were',
+    'their', 'been', 'will', 'would', 'there', 'an', 'or', 'its', 'we', 'he', 'she', 'his', 'her',
+    'who', 'after', 'said', 'about', 'more', 'than', 'into', 'over', 'can', 'could', 'should'
+))
+
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+UNKNOWN = {'code': 'unknown', 'name': 'Unknown', 'is_english': False}
+
+LANGUAGE_DETECTIONS = metrics.counter(
+    'news_sentiment_language_detections_total',
+    'Language identifications by path (fast_path, cache, detector, failed)', ('path',))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_detector = None
+
+def _load_detector():
+    """Import and seed langdetect on first use"""
+    global _detector
+    if _detector is None:
+        from langdetect import DetectorFactory, detect as langdetect_detect
+        # langdetect is randomized unless seeded
+        DetectorFactory.seed = 0
+        _detector = langdetect_detect
+    return _detector
+
+def language_name(code):
+    """Readable name for a language code"""
+    return LANGUAGE_NAMES.get(code, code.upper())
+
+def _result(code):
+    return {'code': code, 'name': language_name(code), 'is_english': code == 'en'}
+
+def sample(text, max_chars=LANG_ID_SAMPLE_CHARS):
+    """The prefix of text used for identification, cut at a word boundary"""
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(' ', 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars]
+
+def looks_english(text):
+    """Fast path: plain ASCII with a high share of English function words"""
+    if not text.isascii():
+        return False
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < FAST_PATH_MIN_WORDS:
+        return False
+    function_words = sum(1 for word in words if word in ENGLISH_FUNCTION_WORDS)
+    return function_words / len(words) >= FAST_PATH_MIN_RATIO
+
+def detect(text):
+    """Identify the language of text; returns {'code', 'name', 'is_english'}"""
+    text_sample = sample(text or '')
+    if not text_sample:
+        LANGUAGE_DETECTIONS.inc(path='failed')
+        return dict(UNKNOWN)
+
+    if looks_english(text_sample):
+        LANGUAGE_DETECTIONS.inc(path='fast_path')
+        return _result('en')
+
+    key = hashlib.blake2b(text_sample.encode('utf-8'), digest_size=16).digest()
+    with _cache_lock:
+        code = _cache.get(key)
+        if code is not None:
+            _cache.move_to_end(key)
+    if code is not None:
+        LANGUAGE_DETECTIONS.inc(path='cache')
+        return _result(code) if code != 'unknown' else dict(UNKNOWN)
+
+    detector = _load_detector()
+    from langdetect.lang_detect_exception import LangDetectException
+    try:
+        code = detector(text_sample)
+        LANGUAGE_DETECTIONS.inc(path='detector')
+    except LangDetectException:
+        # Text without features (numbers, punctuation); cache that too
+        code = 'unknown'
+        LANGUAGE_DETECTIONS.inc(path='failed')
+
+    with _cache_lock:
+        _cache[key] = code
+        while len(_cache) > LANG_ID_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return _result(code) if code != 'unknown' else dict(UNKNOWN)
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
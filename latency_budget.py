@@ -0,0 +1,198 @@
+"""
+Per-request latency budgets that shed optional analysis stages under load.
+
+Each analysis endpoint has a latency budget (LATENCY_BUDGETS, in seconds,
+counted from the moment the request arrives, so admission and scheduler
+waits use it up too). predict_sentiment always computes the core result:
+language, translation, sentiment, writing style, clickbait and genre. The
+optional stages (readability, keywords, similar articles and the word
+cloud) only run while the remaining budget covers their recent duration.
+While analysis requests are queueing for admission or for an analysis slot
+they are shed even with time left, so the queue drains faster.
+
+Stages that didn't run are listed in the response's skipped_stages. Unless
+LATENCY_DEFER_STAGES=0 they are then computed in the background at
+'deferred' scheduler priority and stored in the stage cache under the
+response's deferred id: GET /analysis/deferred/<id> returns them once ready,
+and a later analysis of the same article takes them from the cache instead
+of skipping them again. Requests without a budget (background ingestion,
+warm-up) run every stage.
+"""
+
+import contextvars
+import hashlib
+import os
+import threading
+import time
+
+import admission
+import app_logging
+import metrics
+import news_cache
+import scheduler
+
+LATENCY_BUDGET_ENABLED = os.getenv('LATENCY_BUDGET_ENABLED', '1') != '0'
+LATENCY_DEFER_STAGES = os.getenv('LATENCY_DEFER_STAGES', '1') != '0'
+
+def parse_budgets(value):
+    """'predict=1.5,analyze_article=2' -> {endpoint: seconds}"""
+    budgets = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, seconds = item.partition('=')
+        if float(seconds) > 0:
+            budgets[endpoint.strip()] = float(seconds)
+    return budgets
+
+# Flask endpoint (view function name) -> budget in seconds
+LATENCY_BUDGETS = parse_budgets(os.getenv('LATENCY_BUDGETS', 'predict=1.5,analyze_article=1.5,transcribe_video=120'))
+
+# Optional stages with the duration assumed before one has been measured (seconds)
+OPTIONAL_STAGES = {'readability': 0.03, 'keywords': 0.005, 'similar_articles': 0.02, 'wordcloud': 0.2}
+# Field of the analysis result each stage fills in
+RESULT_FIELDS = {'readability': 'readability_score', 'keywords': 'keywords', 'similar_articles': 'similar_articles',
+                 'wordcloud': 'wordcloud'}
+# Weight of the latest run in each stage's duration average
+ESTIMATE_SMOOTHING = 0.2
+
+# Deferred stage results; always SQLite, since a deferred id is polled through any worker
+STAGE_CACHE_DB = os.getenv('STAGE_CACHE_DB', 'stage_cache.db')
+STAGE_CACHE_TTL = float(os.getenv('STAGE_CACHE_TTL', '3600'))
+STAGE_CACHE_MAX_ENTRIES = int(os.getenv('STAGE_CACHE_MAX_ENTRIES', '256'))
+# A pending entry older than this is presumed lost (e.g. its worker restarted) and deferred again
+DEFERRED_PENDING_SECONDS = 60
+
+STAGES_SKIPPED = metrics.counter(
+    'news_sentiment_stages_skipped_total',
+    'Optional analysis stages skipped to meet the latency budget by reason (deadline, load)', ('stage', 'reason'))
+DEFERRED_STAGE_RUNS = metrics.counter(
+    'news_sentiment_deferred_stage_runs_total',
+    'Background runs of skipped analysis stages by outcome (done, failed)', ('outcome',))
+
+logger = app_logging.get_logger('pipeline')
+
+_budget = contextvars.ContextVar('latency_budget', default=None)
+_estimates = dict(OPTIONAL_STAGES)
+_pending = set()
+_pending_lock = threading.Lock()
+
+_stage_cache = news_cache.SQLiteBackend(STAGE_CACHE_DB, STAGE_CACHE_MAX_ENTRIES)
+
+class Budget:
+    """Deadline of one request"""
+
+    def __init__(self, endpoint, seconds, started_at):
+        self.endpoint = endpoint
+        self.seconds = seconds
+        self.deadline = started_at + seconds
+
+    def remaining(self):
+        return self.deadline - time.perf_counter()
+
+def start(endpoint, started_at=None):
+    """Give the current request its endpoint's budget (no budget for endpoints without one)"""
+    seconds = LATENCY_BUDGETS.get(endpoint) if LATENCY_BUDGET_ENABLED else None
+    _budget.set(Budget(endpoint, seconds, started_at or time.perf_counter()) if seconds else None)
+
+def finish():
+    _budget.set(None)
+
+def current():
+    """Budget of the current request, or None"""
+    return _budget.get()
+
+def under_load():
+    """True while requests are queueing for admission or an interactive analysis slot"""
+    if any(state['queued'] for state in admission.snapshot().values()):
+        return True
+    return scheduler.snapshot()[scheduler.INTERACTIVE]['queued'] > 0
+
+def skip_reason(stage):
+    """Why the current request should skip an optional stage ('deadline', 'load'), or None to run it"""
+    budget = _budget.get()
+    if budget is None:
+        return None
+    if under_load():
+        return 'load'
+    if budget.remaining() < _estimates[stage]:
+        return 'deadline'
+    return None
+
+def observe(stage, seconds):
+    _estimates[stage] += ESTIMATE_SMOOTHING * (seconds - _estimates[stage])
+
+def result_fields(stages):
+    """{stage: value} -> analysis result fields, leaving out stages that produced nothing"""
+    return {RESULT_FIELDS[stage]: value for stage, value in stages.items() if value is not None}
+
+def deferred_id(title, content):
+    """Stage cache key of an article"""
+    return hashlib.blake2b(f"{title}\0{content}".encode('utf-8'), digest_size=12).hexdigest()
+
+def lookup(key):
+    """Stage cache entry {'status', 'stages'} of a deferred id, or None if unknown or expired"""
+    entry = _stage_cache.get(key)
+    if entry is None:
+        return None
+    value, stored_at = entry
+    if time.time() - stored_at > STAGE_CACHE_TTL:
+        return None
+    return value
+
+class OptionalStages:
+    """The optional stages of one analysis: what ran, what was skipped and what to defer"""
+
+    def __init__(self, title, content):
+        self.key = deferred_id(title, content)
+        self.values = {}
+        self.skipped = []
+        self._deferred = []
+        self._cached = None
+
+    def run(self, stage, function, *args):
+        """Run function(*args) as a stage if the budget allows; the value lands in self.values[stage]"""
+        reason = skip_reason(stage)
+        if reason is not None:
+            if self._cached is None:
+                self._cached = (lookup(self.key) or {}).get('stages', {})
+            if stage in self._cached:
+                self.values[stage] = self._cached[stage]
+                return
+            STAGES_SKIPPED.inc(stage=stage, reason=reason)
+            self.skipped.append(stage)
+            self._deferred.append((stage, function, args))
+            return
+        start = time.perf_counter()
+        with metrics.stage(stage):
+            self.values[stage] = function(*args)
+        observe(stage, time.perf_counter() - start)
+
+    def defer(self):
+        """Compute the skipped stages in the background; returns the deferred id, or None"""
+        if not self._deferred or not LATENCY_DEFER_STAGES:
+            return None
+        with _pending_lock:
+            if self.key in _pending:
+                return self.key
+            entry = _stage_cache.get(self.key)
+            if entry is not None and entry[0]['status'] == 'pending' and \
+                    time.time() - entry[1] < DEFERRED_PENDING_SECONDS:
+                # Another worker is already on it
+                return self.key
+            _pending.add(self.key)
+        _stage_cache.set(self.key, {'status': 'pending', 'stages': dict(self._cached or {})}, time.time())
+        scheduler.submit(scheduler.DEFERRED, _run_deferred, self.key, self._deferred, dict(self._cached or {}))
+        return self.key
+
+def _run_deferred(key, deferred, stages):
+    try:
+        for stage, function, args in deferred:
+            stages[stage] = function(*args)
+        _stage_cache.set(key, {'status': 'done', 'stages': stages}, time.time())
+        DEFERRED_STAGE_RUNS.inc(outcome='done')
+    except Exception as e:
+        logger.error("❌ Deferred analysis stages failed: %s", e)
+        _stage_cache.set(key, {'status': 'failed', 'stages': stages}, time.time())
+        DEFERRED_STAGE_RUNS.inc(outcome='failed')
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
@@ -0,0 +1,421 @@
+"""
+Lightweight in-process metrics for the news sentiment app.
+
+Counters, gauges and histograms rendered in the Prometheus text format, plus
+per-request stage timings that app.py turns into a Server-Timing header.
+Stage timings live in a context variable, so they follow the request into
+any code that runs under a copied context. Every timer also opens a tracing
+span, so traced requests get the same breakdown without extra wiring.
+
+Metrics live in the process that records them. Under serve.py every worker
+also writes its metrics to METRICS_MULTIPROCESS_DIR (when it's answering
+/metrics and every METRICS_FLUSH_INTERVAL seconds), and /metrics renders the
+sum over all workers, so a scrape sees one set of counters whichever worker
+answers it. Counters and histograms of workers that have exited stay in the
+sum; gauges are reported per worker with a worker label, only for workers
+that are still running.
+"""
+
+import contextvars
+import functools
+import glob
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import tracing
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds between writes of a worker's metrics to the multiprocess directory
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+_registry = {}
+_registry_lock = threading.Lock()
+# Directory the serve.py workers share their metrics through, or None for this process only
+_multiprocess_dir = None
+_flusher = None
+
+# List of (name, seconds) recorded during the current request, or None outside one
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.extend(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    """Monotonically increasing counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def state(self):
+        """{label key: value}"""
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+class Gauge(Counter):
+    """Value that can go up and down; callbacks are evaluated at scrape time"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks = {}
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        """Report function() as the gauge value whenever metrics are rendered"""
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._callbacks[key] = function
+
+    def state(self):
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        for key, function in callbacks:
+            try:
+                value = float(function())
+            except Exception:
+                continue
+            with self._lock:
+                self._values[key] = value
+        return super().state()
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self, **labels):
+        """Return {'count', 'sum'} for one label set"""
+        series = self._series.get(_label_key(self.labelnames, labels))
+        if not series:
+            return {'count': 0, 'sum': 0.0}
+        return {'count': series['count'], 'sum': series['sum']}
+
+    def state(self):
+        """{label key: {'buckets', 'sum', 'count'}}"""
+        with self._lock:
+            return {key: dict(series, buckets=list(series['buckets'])) for key, series in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+def _get_or_create(cls, name, documentation, labelnames, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **kwargs)
+        return metric
+
+def counter(name, documentation, labelnames=()):
+    """Get or register a counter"""
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+def gauge(name, documentation, labelnames=()):
+    """Get or register a gauge"""
+    return _get_or_create(Gauge, name, documentation, labelnames)
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Get or register a histogram"""
+    return _get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+def _snapshot():
+    """{name: {'kind', 'documentation', 'labelnames', 'buckets', 'series'}} of this process"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {metric.name: {'kind': metric.kind, 'documentation': metric.documentation,
+                          'labelnames': list(metric.labelnames),
+                          'buckets': [_format_value(bound) for bound in getattr(metric, 'buckets', ())],
+                          'series': [[list(key), value] for key, value in metric.state().items()]}
+            for metric in metrics}
+
+def _render(snapshot):
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric['labelnames']
+        for key, value in sorted(metric['series']):
+            if metric['kind'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['buckets'], value['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', bound)])} {cumulative}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{name}_sum{labels} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{labels} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+def render_prometheus():
+    """Render every registered metric in the Prometheus text exposition format (summed over serve.py workers)"""
+    if _multiprocess_dir is None:
+        return _render(_snapshot())
+    flush()
+    return _render(_merge_workers())
+
+# --- Metrics shared between serve.py workers ---
+
+def _worker_path(pid):
+    return os.path.join(_multiprocess_dir, f"{pid}.json")
+
+def use_multiprocess_dir(directory):
+    """Share metrics through directory from now on; serve.py's parent calls this once, before forking"""
+    global _multiprocess_dir
+    os.makedirs(directory, exist_ok=True)
+    # Counters start from zero with the launcher
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+    _multiprocess_dir = directory
+
+def flush():
+    """Write this process's metrics to the multiprocess directory"""
+    if _multiprocess_dir is None:
+        return
+    path = _worker_path(os.getpid())
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(f"{path}.tmp", path)
+
+def _flush_periodically():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+def start_worker():
+    """Share this worker's metrics, flushed every METRICS_FLUSH_INTERVAL seconds (after fork)"""
+    global _flusher
+    if _multiprocess_dir is None or (_flusher is not None and _flusher.is_alive()):
+        return
+    # Counts inherited from the parent (the warm-up) would be summed once per worker
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        if metric.kind != 'gauge':
+            metric.reset()
+    _flusher = threading.Thread(target=_flush_periodically, name='metrics-flush', daemon=True)
+    _flusher.start()
+
+def mark_process_dead(pid):
+    """Drop the gauges of an exited worker; its counters and histograms stay in the sums"""
+    if _multiprocess_dir is None:
+        return
+    path = _worker_path(pid)
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    snapshot = {name: metric for name, metric in snapshot.items() if metric['kind'] != 'gauge'}
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(f"{path}.tmp", path)
+
+def _merge_workers():
+    """Sum the snapshots of every worker; gauges get a worker label instead"""
+    merged = {}
+    for path in sorted(glob.glob(os.path.join(_multiprocess_dir, '*.json'))):
+        worker = os.path.basename(path)[:-len('.json')]
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, metric in snapshot.items():
+            gauge = metric['kind'] == 'gauge'
+            target = merged.setdefault(name, dict(metric, series={},
+                                                  labelnames=metric['labelnames'] + (['worker'] if gauge else [])))
+            for key, value in metric['series']:
+                key = tuple(key) + ((worker,) if gauge else ())
+                total = target['series'].get(key)
+                if total is None:
+                    target['series'][key] = value
+                elif metric['kind'] == 'histogram':
+                    target['series'][key] = {'buckets': [a + b for a, b in zip(total['buckets'], value['buckets'])],
+                                             'sum': total['sum'] + value['sum'],
+                                             'count': total['count'] + value['count']}
+                else:
+                    target['series'][key] = total + value
+    for metric in merged.values():
+        metric['series'] = [[list(key), value] for key, value in metric['series'].items()]
+    return merged
+
+# --- Core application metrics ---
+
+STAGE_SECONDS = histogram(
+    'news_sentiment_stage_duration_seconds',
+    'Duration of predict_sentiment pipeline stages', ('stage',))
+
+OUTBOUND_SECONDS = histogram(
+    'news_sentiment_outbound_request_duration_seconds',
+    'Duration of calls to external services', ('service', 'outcome'))
+
+OUTBOUND_TOTAL = counter(
+    'news_sentiment_outbound_requests_total',
+    'Calls to external services', ('service', 'outcome'))
+
+DB_SECONDS = histogram(
+    'news_sentiment_db_operation_duration_seconds',
+    'Duration of SQLite helper calls', ('operation',))
+
+HTTP_SECONDS = histogram(
+    'news_sentiment_http_request_duration_seconds',
+    'Duration of HTTP requests handled by the app', ('endpoint', 'method', 'status'))
+
+# --- Per-request stage timings (Server-Timing) ---
+
+def start_request():
+    """Begin collecting stage timings for the current request"""
+    _request_timings.set([])
+
+def finish_request():
+    """Stop collecting and return the (name, seconds) list for the current request"""
+    timings = _request_timings.get()
+    _request_timings.set(None)
+    return timings or []
+
+def record_timing(name, seconds):
+    """Attach a timing to the current request, if one is being collected"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+def server_timing_header(timings, total=None):
+    """Build a Server-Timing header value, summing repeated stages"""
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+@contextmanager
+def stage(name):
+    """Time one predict_sentiment stage"""
+    start = time.perf_counter()
+    try:
+        with tracing.span(name):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        record_timing(name, elapsed)
+
+class _OutboundCall:
+    """Handle yielded by outbound(); set .outcome to report a soft failure"""
+
+    def __init__(self):
+        self.outcome = 'success'
+
+@contextmanager
+def outbound(service):
+    """Time one call to an external service; exceptions count as errors"""
+    call = _OutboundCall()
+    start = time.perf_counter()
+    try:
+        with tracing.span(f"http:{service}"):
+            yield call
+    except Exception:
+        call.outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        OUTBOUND_SECONDS.observe(elapsed, service=service, outcome=call.outcome)
+        OUTBOUND_TOTAL.inc(service=service, outcome=call.outcome)
+        record_timing(service, elapsed)
+
+@contextmanager
+def db_operation(operation):
+    """Time one SQLite operation"""
+    start = time.perf_counter()
+    try:
+        with tracing.span(f"db:{operation}"):
+            yield
+    finally:
+        elapsed = time.perf_counter() - start
+        DB_SECONDS.observe(elapsed, operation=operation)
+        record_timing(f"db_{operation}", elapsed)
+
+def timed_db(function):
+    """Decorator form of db_operation, labelled with the function name"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with db_operation(function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
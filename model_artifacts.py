@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped sentiment model artifacts shared across processes
+
+The pickled TF-IDF vectorizer and logistic regression are unpickled into every
+process's private heap, and unpickling them imports scikit-learn. The export
+step below writes what inference actually needs as flat .npy files:
+
+    terms-<build>.npy         vocabulary, sorted, fixed-width UTF-8 bytes
+    term_columns-<build>.npy  feature column of each sorted term
+    idf-<build>.npy           idf weight per feature column
+    coef-<build>.npy          logistic regression coefficient per feature column
+    manifest.json             tokenizer settings, intercept, labels, file names
+                              and digests of the pickles they were exported from
+
+load() memory-maps the arrays read-only, so every worker (and every restart)
+shares one physical copy from the page cache and startup needs neither
+unpickling nor scikit-learn. The manifest is replaced atomically and array
+files are never rewritten in place, so re-exporting is safe while workers are
+serving from the previous files. If the pickles change after an export the
+artifacts are considered stale and the app falls back to the pickles.
+
+Run once after training (and at deploy time), then check parity:
+
+    python model_artifacts.py
+    python model_artifacts.py --verify
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import unicodedata
+
+import numpy as np
+from dotenv import load_dotenv
+
+import app_logging
+
+MODELS_DIR = 'models'
+MODEL_ARTIFACTS_DIR = os.getenv('MODEL_ARTIFACTS_DIR', os.path.join(MODELS_DIR, 'artifacts'))
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+ARRAYS = ('terms', 'term_columns', 'idf', 'coef')
+VECTORIZER_FILE = 'tfidf_vectorizer.pkl'
+LABEL_ENCODER_FILE = 'label_encoder.pkl'
+# Largest acceptable difference from the pickled model in --verify
+PARITY_TOLERANCE = 1e-9
+
+logger = app_logging.get_logger('model')
+
+def file_digest(path):
+    """blake2b digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def source_files(models_dir=MODELS_DIR):
+    """The pickles an export is built from, as {name: path}"""
+    with open(os.path.join(models_dir, 'model_metadata.json'), 'r') as f:
+        metadata = json.load(f)
+    names = [metadata['model_files']['model'], VECTORIZER_FILE, LABEL_ENCODER_FILE]
+    return {name: os.path.join(models_dir, name) for name in names}
+
+def _strip_accents_unicode(text):
+    try:
+        text.encode('ascii')
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize('NFKD', text)
+        return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+ACCENT_FUNCTIONS = {None: None, 'ascii': _strip_accents_ascii, 'unicode': _strip_accents_unicode}
+
+class MappedVectorizer:
+    """TF-IDF transform over memory-mapped vocabulary and idf arrays
+
+    Same tokenization as scikit-learn's word analyzer: lowercase, strip accents,
+    token pattern, stop words removed, then n-grams. transform() returns one
+    (columns, weights) pair per document for MappedLogisticRegression.
+    """
+
+    def __init__(self, settings, terms, term_columns, idf):
+        self.lowercase = settings['lowercase']
+        self.strip_accents = ACCENT_FUNCTIONS[settings['strip_accents']]
+        self.token_pattern = re.compile(settings['token_pattern'])
+        self.stop_words = frozenset(settings['stop_words'] or ())
+        self.min_n, self.max_n = settings['ngram_range']
+        self.binary = settings['binary']
+        self.sublinear_tf = settings['sublinear_tf']
+        self.norm = settings['norm']
+        self.terms = terms
+        self.term_columns = term_columns
+        self.idf = idf
+        self.term_width = terms.dtype.itemsize
+
+    def analyze(self, doc):
+        """Document -> list of terms (unigrams and n-grams)"""
+        if self.lowercase:
+            doc = doc.lower()
+        if self.strip_accents:
+            doc = self.strip_accents(doc)
+        tokens = [token for token in self.token_pattern.findall(doc) if token not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        min_n = self.min_n
+        ngrams = []
+        if min_n == 1:
+            ngrams = list(tokens)
+            min_n += 1
+        for n in range(min_n, min(self.max_n + 1, len(tokens) + 1)):
+            for i in range(len(tokens) - n + 1):
+                ngrams.append(' '.join(tokens[i:i + n]))
+        return ngrams
+
+    def transform_one(self, doc):
+        """Document -> (feature columns, tf-idf weights)"""
+        encoded = [term.encode('utf-8') for term in self.analyze(doc)]
+        # Longer terms can't be in the vocabulary, and would be truncated by the array dtype
+        encoded = [term for term in encoded if len(term) <= self.term_width]
+        if not encoded:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        keys = np.array(encoded, dtype=self.terms.dtype)
+        positions = np.minimum(np.searchsorted(self.terms, keys), len(self.terms) - 1)
+        found = positions[self.terms[positions] == keys]
+        columns, counts = np.unique(self.term_columns[found], return_counts=True)
+        weights = counts.astype(np.float64)
+        if self.binary:
+            weights[:] = 1.0
+        elif self.sublinear_tf:
+            weights = np.log(weights) + 1.0
+        if self.idf is not None:
+            weights *= self.idf[columns]
+        if self.norm == 'l2':
+            length = np.sqrt(np.dot(weights, weights))
+        elif self.norm == 'l1':
+            length = np.abs(weights).sum()
+        else:
+            length = 0.0
+        if length > 0:
+            weights /= length
+        return columns.astype(np.int64), weights
+
+    def transform(self, raw_documents):
+        return [self.transform_one(doc) for doc in raw_documents]
+
+class MappedLogisticRegression:
+    """Binary logistic regression over a memory-mapped coefficient array"""
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = np.array(classes)
+
+    def decision_function(self, rows):
+        return np.array([np.dot(weights, self.coef[columns]) for columns, weights in rows],
+                        dtype=np.float64) + self.intercept
+
+    def predict_proba(self, rows):
+        # expit without overflow warnings for large scores
+        positive = np.exp(-np.logaddexp(0.0, -self.decision_function(rows)))
+        return np.vstack([1.0 - positive, positive]).T
+
+    def predict(self, rows):
+        return self.classes_[(self.decision_function(rows) > 0).astype(int)]
+
+class MappedLabelEncoder:
+    """inverse_transform() of a fitted LabelEncoder, from the labels in the manifest"""
+
+    def __init__(self, labels):
+        self.classes_ = np.array(labels)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=int)]
+
+def touch(*arrays):
+    """Read every page of memory-mapped arrays so the first predictions don't fault them in"""
+    for array in arrays:
+        if array is not None:
+            np.asarray(array).view(np.uint8).sum()
+
+def vectorizer_settings(vectorizer):
+    """The parts of a fitted TfidfVectorizer the mapped transform reproduces"""
+    params = vectorizer.get_params()
+    unsupported = [name for name in ('preprocessor', 'tokenizer', 'vocabulary') if params[name] is not None]
+    if params['analyzer'] != 'word' or unsupported or params['strip_accents'] not in ACCENT_FUNCTIONS \
+            or params['norm'] not in ('l1', 'l2', None):
+        raise ValueError(f"Unsupported vectorizer settings for export: analyzer={params['analyzer']!r}, "
+                         f"strip_accents={params['strip_accents']!r}, norm={params['norm']!r}, custom={unsupported}")
+    stop_words = vectorizer.get_stop_words()
+    return {
+        'lowercase': params['lowercase'],
+        'strip_accents': params['strip_accents'],
+        'token_pattern': params['token_pattern'],
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'ngram_range': list(params['ngram_range']),
+        'binary': params['binary'],
+        'sublinear_tf': params['sublinear_tf'],
+        'norm': params['norm'],
+        'use_idf': params['use_idf']
+    }
+
+def _save_array(directory, name, array):
+    """Write a new file (never overwrite one a worker may have mapped)"""
+    path = os.path.join(directory, name)
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, array)
+    os.replace(path + '.tmp', path)
+
+def export(models_dir=MODELS_DIR, target_dir=MODEL_ARTIFACTS_DIR):
+    """Export the pickled vectorizer and model to memory-mappable arrays; returns the manifest"""
+    import joblib
+
+    sources = source_files(models_dir)
+    model_file, vectorizer_file, label_encoder_file = sources
+    model = joblib.load(sources[model_file])
+    vectorizer = joblib.load(sources[vectorizer_file])
+    label_encoder = joblib.load(sources[label_encoder_file])
+    if model.coef_.shape[0] != 1:
+        raise ValueError(f"Only binary models can be exported (coef shape {model.coef_.shape})")
+
+    digests = {name: file_digest(path) for name, path in sources.items()}
+    build = hashlib.blake2b(json.dumps(digests, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+    vocabulary = vectorizer.vocabulary_
+    encoded = [term.encode('utf-8') for term in vocabulary]
+    terms = np.array(encoded)
+    order = np.argsort(terms, kind='stable')
+    arrays = {
+        'terms': terms[order],
+        'term_columns': np.array([vocabulary[term] for term in vocabulary], dtype=np.int32)[order],
+        'idf': np.asarray(vectorizer.idf_, dtype=np.float64),
+        'coef': np.ascontiguousarray(model.coef_[0], dtype=np.float64)
+    }
+    if len(np.unique(arrays['terms'])) != len(vocabulary):
+        raise ValueError("Vocabulary terms collide when stored as fixed-width bytes")
+
+    os.makedirs(target_dir, exist_ok=True)
+    files = {name: f'{name}-{build}.npy' for name in ARRAYS}
+    for name, array in arrays.items():
+        _save_array(target_dir, files[name], array)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'build': build,
+        'sources': digests,
+        'files': files,
+        'vectorizer': vectorizer_settings(vectorizer),
+        'intercept': float(model.intercept_[0]),
+        'classes': model.classes_.tolist(),
+        'labels': label_encoder.classes_.tolist(),
+        'n_features': len(vocabulary)
+    }
+    manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    # Earlier builds are no longer referenced; unlinking a mapped file is safe on POSIX
+    current = set(files.values()) | {MANIFEST_NAME}
+    for name in os.listdir(target_dir):
+        if name not in current and name.endswith('.npy'):
+            try:
+                os.remove(os.path.join(target_dir, name))
+            except OSError:
+                pass
+    return manifest
+
+def load(artifacts_dir=MODEL_ARTIFACTS_DIR, models_dir=MODELS_DIR):
+    """Memory-map exported artifacts: (vectorizer, model, label_encoder), or None when missing or stale"""
+    manifest_path = os.path.join(artifacts_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            logger.warning("⚠️ Model artifacts in %s use format %s, re-export them", artifacts_dir, manifest.get('format_version'))
+            return None
+        stale = [name for name, digest in manifest['sources'].items()
+                 if file_digest(os.path.join(models_dir, name)) != digest]
+        if stale:
+            logger.warning("⚠️ Model artifacts are stale (%s changed since export), using the pickles", ', '.join(stale))
+            return None
+
+        arrays = {name: np.load(os.path.join(artifacts_dir, manifest['files'][name]), mmap_mode='r')
+                  for name in ARRAYS}
+        settings = manifest['vectorizer']
+        vectorizer = MappedVectorizer(settings, arrays['terms'], arrays['term_columns'],
+                                      arrays['idf'] if settings['use_idf'] else None)
+        model = MappedLogisticRegression(arrays['coef'], manifest['intercept'], manifest['classes'])
+        return vectorizer, model, MappedLabelEncoder(manifest['labels'])
+    except Exception as e:
+        logger.warning("⚠️ Could not load model artifacts from %s: %s", artifacts_dir, e)
+        return None
+
+def parity_corpus(vocabulary, seed=0, count=200):
+    """Documents for --verify: edge cases plus text assembled from the vocabulary"""
+    rng = random.Random(seed)
+    terms = sorted(vocabulary)
+    documents = [
+        '', '   ', 'a an the of', '12345 !!! ???',
+        'Stocks rallied after strong earnings beat expectations',
+        'The company reported heavy losses and announced layoffs',
+        'Café crème, naïve résumé — Zürich officials déclined to comment',
+        'MARKETS CRASH AS INVESTORS PANIC OVER RISING RATES',
+        'Ünïcödé ﬁnance ｆｕｌｌｗｉｄｔｈ text and 東京 markets'
+    ]
+    for _ in range(count):
+        words = [rng.choice(terms) for _ in range(rng.randint(1, 120))]
+        if rng.random() < 0.5:
+            words = [word.upper() if rng.random() < 0.2 else word for word in words]
+        documents.append(' '.join(words))
+    return documents
+
+def verify(artifacts_dir=MODEL_ARTIFACTS_DIR, models_dir=MODELS_DIR):
+    """Compare the mapped artifacts with the pickled model; returns the largest difference found"""
+    import joblib
+
+    loaded = load(artifacts_dir, models_dir)
+    if loaded is None:
+        raise RuntimeError(f"No usable model artifacts in {artifacts_dir}")
+    mapped_vectorizer, mapped_model, mapped_labels = loaded
+    sources = source_files(models_dir)
+    model_file, vectorizer_file, label_encoder_file = sources
+    model = joblib.load(sources[model_file])
+    vectorizer = joblib.load(sources[vectorizer_file])
+    label_encoder = joblib.load(sources[label_encoder_file])
+
+    documents = parity_corpus(vectorizer.vocabulary_)
+    expected = vectorizer.transform(documents)
+    rows = mapped_vectorizer.transform(documents)
+    worst = 0.0
+    for index, (columns, weights) in enumerate(rows):
+        dense = np.zeros(expected.shape[1])
+        dense[columns] = weights
+        worst = max(worst, float(np.abs(dense - expected[index].toarray()[0]).max()))
+    worst = max(worst, float(np.abs(mapped_model.predict_proba(rows) - model.predict_proba(expected)).max()))
+    labels = mapped_labels.inverse_transform(mapped_model.predict(rows))
+    mismatched = int((labels != label_encoder.inverse_transform(model.predict(expected))).sum())
+    print(f"🔍 Checked {len(documents)} documents: max difference {worst:.2e}, {mismatched} label mismatch(es)")
+    if mismatched:
+        raise RuntimeError(f"{mismatched} predicted label(s) differ from the pickled model")
+    return worst
+
+def main(argv=None):
+    load_dotenv()
+    default_target = os.getenv('MODEL_ARTIFACTS_DIR', MODEL_ARTIFACTS_DIR)
+    parser = argparse.ArgumentParser(description='Export the sentiment model as memory-mapped artifacts')
+    parser.add_argument('--models-dir', default=MODELS_DIR, help=f'pickled models (default: {MODELS_DIR})')
+    parser.add_argument('--target', default=default_target, help=f'artifact directory (default: {default_target})')
+    parser.add_argument('--verify', action='store_true',
+                        help='only check the existing artifacts against the pickled model')
+    args = parser.parse_args(argv)
+
+    try:
+        if not args.verify:
+            manifest = export(args.models_dir, args.target)
+            print(f"✅ Exported {manifest['n_features']} features to {args.target} (build {manifest['build']})")
+        worst = verify(args.target, args.models_dir)
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+    if worst > PARITY_TOLERANCE:
+        print(f"❌ Artifacts differ from the pickled model by more than {PARITY_TOLERANCE:g}")
+        return 1
+    print("✅ Artifacts match the pickled model")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
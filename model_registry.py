@@ -0,0 +1,266 @@
+"""
+Versioned sentiment model bundles with background reload and atomic swap
+
+A bundle is everything needed to score text with one trained model: the
+vectorizer, the classifier, the label encoder and model_metadata.json, under
+one version. The version is metadata['version'] when the training notebook sets
+it, otherwise the best model's name plus a digest of the model files.
+
+Requests take the current bundle once (current()) and use it to the end, so a
+swap never changes the model under a request in flight, and results report the
+version that produced them. A reload loads and warms the new bundle on a
+background thread while the old one keeps serving, then swaps it in with one
+assignment; a failed load leaves the old bundle in place.
+
+Reloads are triggered by POST /admin/model/reload or, with
+MODEL_WATCH_INTERVAL set, by a watcher thread that notices the model files
+changing. Each process holds its own bundle. Under serve.py the parent owns
+reloads instead: it watches the files itself, workers forward reload
+requests to it (set_reload_handler), and it loads the new bundle (refresh())
+before re-forking every worker from it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import app_logging
+import metrics
+import model_artifacts
+
+MODELS_DIR = 'models'
+# Seconds between checks of the model files for a new version (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', '0'))
+
+# Scored after loading, before the swap, so the first requests on a new model aren't slower
+WARM_UP_TEXTS = [
+    'stocks rallied after the company reported record profits and raised its forecast',
+    'officials warned of severe flooding as the storm damaged homes and forced evacuations',
+    'the council will meet on tuesday to discuss the new budget proposal'
+]
+
+MODEL_RELOADS = metrics.counter(
+    'news_sentiment_model_reloads_total',
+    'Model reloads by outcome (swapped, failed)', ('outcome',))
+MODEL_INFO = metrics.gauge(
+    'news_sentiment_model_info',
+    'Model version currently serving requests (1) and replaced versions (0)', ('version', 'source'))
+
+logger = app_logging.get_logger('model')
+
+_current = None
+_reload_lock = threading.Lock()
+_watcher = None
+_swap_listeners = []
+_reload_handler = None
+
+# Progress of the last reload, reported by /admin/model
+reload_state = {'status': 'idle', 'version': None, 'error': None, 'started_at': None, 'duration_ms': None}
+
+class ModelBundle:
+    """One loaded model version: vectorizer, classifier, label encoder and metadata"""
+
+    def __init__(self, version, metadata, vectorizer, model, label_encoder, source, signature):
+        self.version = version
+        self.metadata = metadata
+        self.vectorizer = vectorizer
+        self.model = model
+        self.label_encoder = label_encoder
+        self.source = source
+        self.signature = signature
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+
+    def score(self, texts):
+        """Batch inference on preprocessed texts: [(sentiment, confidence)]"""
+        vectors = self.vectorizer.transform(texts)
+        predictions = self.model.predict(vectors)
+        probabilities = self.model.predict_proba(vectors)
+        labels = self.label_encoder.inverse_transform(predictions)
+        return [(str(label), float(max(proba))) for label, proba in zip(labels, probabilities)]
+
+    def describe(self):
+        return {'version': self.version, 'source': self.source, 'loaded_at': self.loaded_at,
+                'best_model': self.metadata.get('best_model')}
+
+def files_signature(models_dir=MODELS_DIR, artifacts_dir=model_artifacts.MODEL_ARTIFACTS_DIR):
+    """(name, mtime, size) of every file a bundle is loaded from; changes when a model is deployed"""
+    try:
+        paths = list(model_artifacts.source_files(models_dir).values())
+    except (OSError, ValueError, KeyError):
+        paths = []
+    paths += [os.path.join(models_dir, 'model_metadata.json'),
+              os.path.join(artifacts_dir, model_artifacts.MANIFEST_NAME)]
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+def model_version(metadata, models_dir=MODELS_DIR):
+    """metadata['version'], or the model name plus a digest of the model files"""
+    if metadata.get('version'):
+        return str(metadata['version'])
+    digests = ''.join(model_artifacts.file_digest(path)
+                      for path in model_artifacts.source_files(models_dir).values())
+    name = re.sub(r'[^a-z0-9]+', '-', metadata.get('best_model', 'model').lower()).strip('-')
+    return f"{name}-{hashlib.blake2b(digests.encode('ascii'), digest_size=4).hexdigest()}"
+
+def load_bundle(models_dir=MODELS_DIR, artifacts_dir=model_artifacts.MODEL_ARTIFACTS_DIR):
+    """Load one model version from disk, preferring the memory-mapped artifacts"""
+    signature = files_signature(models_dir, artifacts_dir)
+    with open(os.path.join(models_dir, 'model_metadata.json'), 'r') as f:
+        metadata = json.load(f)
+    version = model_version(metadata, models_dir)
+
+    artifacts = model_artifacts.load(artifacts_dir, models_dir)
+    if artifacts:
+        vectorizer, model, label_encoder = artifacts
+        source = 'artifacts'
+    else:
+        import joblib
+        model = joblib.load(os.path.join(models_dir, metadata['model_files']['model']))
+        vectorizer = joblib.load(os.path.join(models_dir, model_artifacts.VECTORIZER_FILE))
+        label_encoder = joblib.load(os.path.join(models_dir, model_artifacts.LABEL_ENCODER_FILE))
+        source = 'pickles'
+
+    if files_signature(models_dir, artifacts_dir) != signature:
+        raise RuntimeError("model files changed while loading, try again once the deployment has finished")
+    return ModelBundle(version, metadata, vectorizer, model, label_encoder, source, signature)
+
+def warm_bundle(bundle):
+    """Fault in mapped pages and run a few predictions before the bundle takes traffic"""
+    if bundle.source == 'artifacts':
+        model_artifacts.touch(bundle.vectorizer.terms, bundle.vectorizer.term_columns,
+                              bundle.vectorizer.idf, bundle.model.coef)
+    bundle.score(WARM_UP_TEXTS)
+
+def current():
+    """The bundle serving new requests (None before the first load)"""
+    return _current
+
+def install(bundle):
+    """Swap in a loaded bundle; requests already running keep the one they took"""
+    global _current
+    previous = _current
+    _current = bundle
+    if previous is not None and (previous.version, previous.source) != (bundle.version, bundle.source):
+        MODEL_INFO.set(0, version=previous.version, source=previous.source)
+    MODEL_INFO.set(1, version=bundle.version, source=bundle.source)
+    return previous
+
+def on_swap(function):
+    """Call function(bundle) after a reload swaps in a new bundle (not for the initial load)"""
+    _swap_listeners.append(function)
+
+def load_initial(models_dir=MODELS_DIR):
+    """Load, warm and install the model at startup; returns the bundle or None"""
+    try:
+        bundle = load_bundle(models_dir)
+        warm_bundle(bundle)
+    except Exception as e:
+        logger.error("❌ Error loading models: %s", e)
+        return None
+    install(bundle)
+    return bundle
+
+def _reload(models_dir):
+    start = time.perf_counter()
+    try:
+        bundle = load_bundle(models_dir)
+        warm_bundle(bundle)
+        previous = install(bundle)
+        reload_state.update(status='swapped', version=bundle.version,
+                            duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        MODEL_RELOADS.inc(outcome='swapped')
+        logger.info("🔄 Model %s -> %s (%s, %.0f ms)", previous.version if previous else None, bundle.version,
+                    bundle.source, reload_state['duration_ms'])
+        for listener in _swap_listeners:
+            try:
+                listener(bundle)
+            except Exception as e:
+                logger.warning("⚠️ Model swap listener failed: %s", e)
+    except Exception as e:
+        reload_state.update(status='failed', error=str(e),
+                            duration_ms=round((time.perf_counter() - start) * 1000, 1))
+        MODEL_RELOADS.inc(outcome='failed')
+        logger.error("❌ Model reload failed, still serving %s: %s", _current.version if _current else None, e)
+    finally:
+        _reload_lock.release()
+
+def reload(models_dir=MODELS_DIR):
+    """Start loading the model files in the background; False if a reload is already running"""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    reload_state.update(status='loading', version=None, error=None, duration_ms=None,
+                        started_at=datetime.now().isoformat(timespec='seconds'))
+    threading.Thread(target=_reload, args=(models_dir,), name='model-reload', daemon=True).start()
+    return True
+
+def set_reload_handler(function):
+    """Send request_reload() to function() instead of reloading in this process"""
+    global _reload_handler
+    _reload_handler = function
+
+def request_reload(models_dir=MODELS_DIR):
+    """Reload here, or through the reload handler when one is set; False if a reload is already running"""
+    if _reload_handler is not None:
+        return _reload_handler()
+    return reload(models_dir)
+
+def is_stale(models_dir=MODELS_DIR):
+    """True if the model files changed since the current bundle was loaded"""
+    return _current is None or files_signature(models_dir) != _current.signature
+
+def refresh(models_dir=MODELS_DIR):
+    """Load, warm and install the model files now if they changed; True if a new bundle was swapped in"""
+    if not is_stale(models_dir):
+        return False
+    previous = _current
+    try:
+        bundle = load_bundle(models_dir)
+        warm_bundle(bundle)
+    except Exception as e:
+        MODEL_RELOADS.inc(outcome='failed')
+        logger.error("❌ Model reload failed, still serving %s: %s", previous.version if previous else None, e)
+        return False
+    install(bundle)
+    MODEL_RELOADS.inc(outcome='swapped')
+    logger.info("🔄 Model %s -> %s (%s)", previous.version if previous else None, bundle.version, bundle.source)
+    return True
+
+def _watch(models_dir, interval):
+    pending = None
+    failed = None
+    while True:
+        time.sleep(interval)
+        bundle = _current
+        signature = files_signature(models_dir)
+        if bundle is None or signature == bundle.signature or signature == failed:
+            pending = None
+            continue
+        if signature != pending:
+            # Files are still being written; wait until they stay the same for one interval
+            pending = signature
+            continue
+        pending = None
+        if reload(models_dir):
+            # Wait for the outcome so a broken deployment isn't retried on every poll
+            with _reload_lock:
+                failed = signature if reload_state['status'] == 'failed' else None
+
+def start_watcher(models_dir=MODELS_DIR):
+    """Reload automatically when the model files change (no-op unless MODEL_WATCH_INTERVAL is set)"""
+    global _watcher
+    if MODEL_WATCH_INTERVAL <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return False
+    _watcher = threading.Thread(target=_watch, args=(models_dir, MODEL_WATCH_INTERVAL),
+                                name='model-watcher', daemon=True)
+    _watcher.start()
+    return True
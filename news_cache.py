@@ -0,0 +1,278 @@
+"""
+Bounded cache for trending-news results with stale-while-revalidate.
+
+Entries are fresh for NEWS_CACHE_TTL seconds. After that they are still
+served (up to NEWS_CACHE_STALE_TTL) while one background task refreshes them,
+so a user request only waits on the news APIs when a key has never been
+fetched or is far too old. Concurrent misses for the same key share a single
+fetch.
+
+Backends (NEWS_CACHE_BACKEND):
+    memory  in-process LRU (default)
+    sqlite  LRU table in NEWS_CACHE_DB, shared by every worker process; a
+            refresh lease keeps workers from refreshing the same key at once
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+NEWS_CACHE_BACKEND = os.getenv('NEWS_CACHE_BACKEND', 'memory').lower()
+NEWS_CACHE_DB = os.getenv('NEWS_CACHE_DB', 'news_cache.db')
+NEWS_CACHE_TTL = float(os.getenv('NEWS_CACHE_TTL', '300'))
+NEWS_CACHE_STALE_TTL = float(os.getenv('NEWS_CACHE_STALE_TTL', '3600'))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv('NEWS_CACHE_MAX_ENTRIES', '256'))
+# How long one worker may hold the refresh of a key before another may take over
+REFRESH_LEASE_SECONDS = 60
+
+CACHE_LOOKUPS = metrics.counter(
+    'news_sentiment_news_cache_lookups_total',
+    'News cache lookups by result (hit, stale, miss, shared)', ('result',))
+
+CACHE_REFRESHES = metrics.counter(
+    'news_sentiment_news_cache_refreshes_total',
+    'Background news cache refreshes by outcome', ('outcome',))
+
+class MemoryBackend:
+    """In-process LRU of key -> (value, stored_at)"""
+
+    def __init__(self, max_entries=NEWS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim_refresh(self, key):
+        # Refreshes are already single-flight within this process
+        return True
+
+    def release_refresh(self, key):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    """LRU table shared by every worker process"""
+
+    def __init__(self, path=NEWS_CACHE_DB, max_entries=NEWS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS news_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                stored_at REAL,
+                accessed_at REAL,
+                refreshing_until REAL DEFAULT 0
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value, stored_at FROM news_cache WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE news_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+                conn.commit()
+            conn.close()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        try:
+            conn = self._connect()
+            conn.execute('''
+                INSERT OR REPLACE INTO news_cache (key, value, stored_at, accessed_at, refreshing_until)
+                VALUES (?, ?, ?, ?, 0)
+            ''', (key, json.dumps(value), stored_at, time.time()))
+            # Evict the least recently used entries beyond the bound
+            conn.execute('''
+                DELETE FROM news_cache WHERE key IN (
+                    SELECT key FROM news_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def claim_refresh(self, key):
+        """Take the refresh lease for a key; False if another worker holds it"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            cursor = conn.execute(
+                'UPDATE news_cache SET refreshing_until = ? WHERE key = ? AND refreshing_until < ?',
+                (now + REFRESH_LEASE_SECONDS, key, now))
+            conn.commit()
+            conn.close()
+            return cursor.rowcount > 0
+        except sqlite3.Error:
+            return True
+
+    def release_refresh(self, key):
+        try:
+            conn = self._connect()
+            conn.execute('UPDATE news_cache SET refreshing_until = 0 WHERE key = ?', (key,))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        try:
+            conn = self._connect()
+            conn.execute('DELETE FROM news_cache')
+            conn.commit()
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def __len__(self):
+        try:
+            conn = self._connect()
+            count = conn.execute('SELECT COUNT(*) FROM news_cache').fetchone()[0]
+            conn.close()
+            return count
+        except sqlite3.Error:
+            return 0
+
+class NewsCache:
+    """Stale-while-revalidate cache with single-flight fetches"""
+
+    def __init__(self, backend, ttl=NEWS_CACHE_TTL, stale_ttl=NEWS_CACHE_STALE_TTL, refresh_workers=2):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='news-cache')
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached value for key, calling fetch() only when nothing usable is cached"""
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                CACHE_LOOKUPS.inc(result='hit')
+                return value
+            if age < self.stale_ttl:
+                CACHE_LOOKUPS.inc(result='stale')
+                self.refresh_in_background(key, fetch)
+                return value
+
+        future, owner = self._join_or_start(key)
+        if not owner:
+            CACHE_LOOKUPS.inc(result='shared')
+            value = future.result()
+            if value is not None:
+                return value
+            # The shared task was a refresh another worker took over; fetch directly
+            return fetch()
+
+        CACHE_LOOKUPS.inc(result='miss')
+        try:
+            value = fetch()
+            self.backend.set(key, value, time.time())
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def peek(self, key):
+        """Cached value for key regardless of age, or None (no fetch, no metrics)"""
+        entry = self.backend.get(key)
+        return entry[0] if entry is not None else None
+
+    def refresh_in_background(self, key, fetch):
+        """Schedule one refresh of key unless one is already running"""
+        future, owner = self._join_or_start(key)
+        if not owner:
+            return future
+        if not self.backend.claim_refresh(key):
+            # Another worker process is refreshing this key
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(None)
+            return future
+        self._refresh_executor.submit(self._refresh, key, fetch, future)
+        return future
+
+    def _refresh(self, key, fetch, future):
+        try:
+            value = fetch()
+            self.backend.set(key, value, time.time())
+            CACHE_REFRESHES.inc(outcome='success')
+            future.set_result(value)
+        except Exception as e:
+            # Keep serving the stale entry; the next lookup tries again
+            self.backend.release_refresh(key)
+            CACHE_REFRESHES.inc(outcome='error')
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _join_or_start(self, key):
+        """Return (future, True) for a new fetch of key, or (running future, False)"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
+
+def create_cache():
+    """Build the cache described by NEWS_CACHE_BACKEND"""
+    if NEWS_CACHE_BACKEND == 'sqlite':
+        backend = SQLiteBackend(NEWS_CACHE_DB, NEWS_CACHE_MAX_ENTRIES)
+    else:
+        backend = MemoryBackend(NEWS_CACHE_MAX_ENTRIES)
+    cache = NewsCache(backend)
+    metrics.gauge('news_sentiment_news_cache_entries', 'Entries in the news cache').set_function(cache.__len__)
+    return cache
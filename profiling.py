@@ -0,0 +1,210 @@
+"""
+On-demand profiling of live requests.
+
+When ADMIN_TOKEN is set, an operator can add ?profile=cpu or ?profile=mem to
+any endpoint and send the token in the X-Admin-Token header. The request then
+runs under cProfile (deterministic, per thread) or tracemalloc (process-wide,
+one at a time), and the report is kept in memory and on disk under
+PROFILE_DIR so it can be fetched from /debug/profiles/<id>. Reports are
+listed and read from PROFILE_DIR too, so under serve.py any worker can
+return the profile another worker recorded.
+"""
+
+import cProfile
+import glob
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import app_logging
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '50'))
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '40'))
+
+PROFILE_KINDS = ('cpu', 'mem')
+PROFILE_ID_PATTERN = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{6}$')
+# First line of a report file, as written by store_profile()
+PROFILE_HEADER_PATTERN = re.compile(r'^# (?P<request>.*) \((?P<kind>\w+), (?P<duration_ms>[\d.]+) ms, (?P<created_at>[^)]*)\)$')
+
+logger = app_logging.get_logger('profiling')
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+# tracemalloc is process-wide, so only one memory profile may run at a time
+_mem_profile_lock = threading.Lock()
+
+def is_authorized(token):
+    """Check an admin token; always False when no ADMIN_TOKEN is configured"""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+class ProfileSession:
+    """A profiler running for the duration of one request"""
+
+    def __init__(self, kind, label):
+        self.kind = kind
+        self.label = label
+        self.profile_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.error = None
+        self._profiler = None
+        self._owns_mem_lock = False
+
+        if kind == 'cpu':
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError as e:
+                # Another profiler is already active in this interpreter
+                self._profiler = None
+                self.error = str(e)
+        elif kind == 'mem':
+            if _mem_profile_lock.acquire(blocking=False):
+                self._owns_mem_lock = True
+                tracemalloc.start(25)
+            else:
+                self.error = 'another memory profile is already running'
+
+    def stop(self):
+        """Stop profiling and return the stored profile record"""
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        if self.kind == 'cpu':
+            report = self._stop_cpu()
+        else:
+            report = self._stop_mem()
+
+        record = {
+            'id': self.profile_id,
+            'kind': self.kind,
+            'request': self.label,
+            'created_at': self.created_at,
+            'duration_ms': round(duration_ms, 1),
+            'error': self.error,
+            'report': report
+        }
+        store_profile(record)
+        return record
+
+    def _stop_cpu(self):
+        if self._profiler is None:
+            return ''
+        self._profiler.disable()
+        output = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=output)
+        stats.strip_dirs()
+        output.write('=== Sorted by cumulative time ===\n')
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        output.write('\n=== Sorted by internal time ===\n')
+        stats.sort_stats('tottime').print_stats(PROFILE_TOP_N)
+        return output.getvalue()
+
+    def _stop_mem(self):
+        if not self._owns_mem_lock:
+            return ''
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            _mem_profile_lock.release()
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        lines = [
+            f"Traced memory at end of request: {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB)",
+            '',
+            f"=== Top {PROFILE_TOP_N} allocation sites ==="
+        ]
+        for index, stat in enumerate(snapshot.statistics('lineno')[:PROFILE_TOP_N], 1):
+            lines.append(f"{index:>3}. {stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback[0]}")
+
+        lines.append('')
+        lines.append('=== Top 5 allocation tracebacks ===')
+        for stat in snapshot.statistics('traceback')[:5]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return '\n'.join(lines) + '\n'
+
+def start_profile(kind, label):
+    """Start profiling the current request"""
+    if kind not in PROFILE_KINDS:
+        return None
+    return ProfileSession(kind, label)
+
+def store_profile(record):
+    """Keep a profile in memory (bounded) and write its report to PROFILE_DIR"""
+    with _profiles_lock:
+        _profiles[record['id']] = record
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{record['id']}-{record['kind']}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# {record['request']} ({record['kind']}, {record['duration_ms']} ms, {record['created_at']})\n")
+            if record['error']:
+                f.write(f"# error: {record['error']}\n")
+            f.write(record['report'])
+    except OSError as e:
+        logger.warning("⚠️ Could not write profile %s: %s", record['id'], e)
+
+def read_profile(path, header_only=False):
+    """Profile record from a report file in PROFILE_DIR, or None if it can't be read"""
+    profile_id, _, kind = os.path.basename(path)[:-len('.txt')].rpartition('-')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            match = PROFILE_HEADER_PATTERN.match(f.readline().rstrip('\n'))
+            if not match:
+                return None
+            line = f.readline()
+            error = line[len('# error: '):].rstrip('\n') if line.startswith('# error: ') else None
+            report = '' if header_only else (line if error is None else '') + f.read()
+    except OSError:
+        return None
+    return {'id': profile_id, 'kind': kind, 'request': match.group('request'), 'created_at': match.group('created_at'),
+            'duration_ms': float(match.group('duration_ms')), 'error': error, 'report': report}
+
+def list_profiles():
+    """Summaries of stored profiles of every worker, newest first"""
+    with _profiles_lock:
+        records = {record['id']: record for record in _profiles.values()}
+    # Profile ids start with their timestamp, so file names sort by age
+    for path in sorted(glob.glob(os.path.join(PROFILE_DIR, '*.txt')), reverse=True)[:PROFILE_KEEP]:
+        profile_id = os.path.basename(path).rpartition('-')[0]
+        if PROFILE_ID_PATTERN.match(profile_id) and profile_id not in records:
+            record = read_profile(path, header_only=True)
+            if record:
+                records[profile_id] = record
+    return [
+        {key: record[key] for key in ('id', 'kind', 'request', 'created_at', 'duration_ms', 'error')}
+        for record in sorted(records.values(), key=lambda record: record['id'], reverse=True)[:PROFILE_KEEP]
+    ]
+
+def get_profile(profile_id):
+    """Stored profile record, from memory or (when another worker recorded it) PROFILE_DIR"""
+    with _profiles_lock:
+        record = _profiles.get(profile_id)
+    if record is not None or not PROFILE_ID_PATTERN.match(profile_id):
+        return record
+    for kind in PROFILE_KINDS:
+        path = os.path.join(PROFILE_DIR, f"{profile_id}-{kind}.txt")
+        if os.path.exists(path):
+            return read_profile(path)
+    return None
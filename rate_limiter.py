@@ -0,0 +1,223 @@
+"""
+Quota-aware rate limiting for the news APIs.
+
+Each provider (Mediastack, NewsAPI) has a token bucket refilled at
+<PROVIDER>_RATE_PER_MINUTE and a daily budget of <PROVIDER>_DAILY_BUDGET
+calls. Both live in SQLite (RATE_LIMIT_DB), so every worker process draws
+from the same quota.
+
+Calls for hot category/country keys (the most requested ones recently) may
+use the whole budget. Other calls are paced: they may only spend the share of
+the daily budget that matches the time of day already elapsed, and they
+leave RATE_LIMIT_HOT_RESERVE of the budget for hot keys. When a provider
+answers 429, its bucket is blocked for the Retry-After period.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import metrics
+
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', 'rate_limits.db')
+# Share of the daily budget only hot keys may spend
+RATE_LIMIT_HOT_RESERVE = float(os.getenv('RATE_LIMIT_HOT_RESERVE', '0.2'))
+# Calls paced requests may run ahead of the even spread through the day
+RATE_LIMIT_PACE_BURST = int(os.getenv('RATE_LIMIT_PACE_BURST', '5'))
+# Number of most-requested keys treated as hot
+RATE_LIMIT_HOT_KEYS = int(os.getenv('RATE_LIMIT_HOT_KEYS', '5'))
+# Half-life (seconds) of the demand score used to rank keys
+DEMAND_HALF_LIFE = 900.0
+# Keys are user-supplied, so only this many are tracked
+MAX_TRACKED_KEYS = 500
+
+PROVIDERS = {
+    'mediastack': {
+        'rate_per_minute': float(os.getenv('MEDIASTACK_RATE_PER_MINUTE', '5')),
+        'burst': int(os.getenv('MEDIASTACK_BURST', '3')),
+        'daily_budget': int(os.getenv('MEDIASTACK_DAILY_BUDGET', '100'))
+    },
+    'newsapi': {
+        'rate_per_minute': float(os.getenv('NEWSAPI_RATE_PER_MINUTE', '10')),
+        'burst': int(os.getenv('NEWSAPI_BURST', '5')),
+        'daily_budget': int(os.getenv('NEWSAPI_DAILY_BUDGET', '100'))
+    }
+}
+
+HOT = 'hot'
+NORMAL = 'normal'
+
+RATE_LIMIT_DECISIONS = metrics.counter(
+    'news_sentiment_rate_limit_decisions_total',
+    'News API call decisions by provider, priority and result', ('provider', 'priority', 'result'))
+
+BUDGET_REMAINING = metrics.gauge(
+    'news_sentiment_rate_limit_budget_remaining',
+    'Calls left in the daily budget per news API provider', ('provider',))
+
+_initialized = set()
+
+def _connect():
+    conn = sqlite3.connect(RATE_LIMIT_DB, timeout=5, isolation_level=None)
+    if RATE_LIMIT_DB not in _initialized:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                provider TEXT PRIMARY KEY,
+                tokens REAL,
+                updated_at REAL,
+                day TEXT,
+                used_today INTEGER DEFAULT 0,
+                blocked_until REAL DEFAULT 0
+            )
+        ''')
+        _initialized.add(RATE_LIMIT_DB)
+    return conn
+
+def _today(now):
+    return datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+
+def _day_fraction(now):
+    """Share of the current UTC day that has elapsed"""
+    return (now % 86400) / 86400
+
+def _load_bucket(conn, provider, config, now):
+    """Read a provider's bucket, refilled up to now and reset on a new day"""
+    row = conn.execute(
+        'SELECT tokens, updated_at, day, used_today, blocked_until FROM rate_limits WHERE provider = ?',
+        (provider,)).fetchone()
+    if row is None:
+        return {'tokens': float(config['burst']), 'day': _today(now), 'used_today': 0, 'blocked_until': 0.0}
+    tokens, updated_at, day, used_today, blocked_until = row
+    tokens = min(config['burst'], tokens + (now - updated_at) * config['rate_per_minute'] / 60)
+    if day != _today(now):
+        day, used_today = _today(now), 0
+    return {'tokens': tokens, 'day': day, 'used_today': used_today, 'blocked_until': blocked_until or 0.0}
+
+def _save_bucket(conn, provider, bucket, now):
+    conn.execute('''
+        INSERT OR REPLACE INTO rate_limits (provider, tokens, updated_at, day, used_today, blocked_until)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (provider, bucket['tokens'], now, bucket['day'], bucket['used_today'], bucket['blocked_until']))
+
+def _decide(bucket, config, priority, now):
+    """Return 'allowed' or the reason a call must not be made"""
+    if now < bucket['blocked_until']:
+        return 'blocked'
+    budget = config['daily_budget']
+    if bucket['used_today'] >= budget:
+        return 'budget_exhausted'
+    if priority != HOT:
+        if bucket['used_today'] >= budget * (1 - RATE_LIMIT_HOT_RESERVE):
+            return 'budget_exhausted'
+        if bucket['used_today'] >= math.ceil(budget * _day_fraction(now)) + RATE_LIMIT_PACE_BURST:
+            return 'paced'
+    if bucket['tokens'] < 1:
+        return 'throttled'
+    return 'allowed'
+
+def acquire(provider, priority=NORMAL):
+    """Take one call from a provider's bucket and daily budget; False if the call must be skipped"""
+    config = PROVIDERS.get(provider)
+    if config is None:
+        return True
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            bucket = _load_bucket(conn, provider, config, now)
+            result = _decide(bucket, config, priority, now)
+            if result == 'allowed':
+                bucket['tokens'] -= 1
+                bucket['used_today'] += 1
+            _save_bucket(conn, provider, bucket, now)
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        # Never block news fetching on the limiter's own storage
+        result = 'allowed'
+    RATE_LIMIT_DECISIONS.inc(provider=provider, priority=priority, result=result)
+    return result == 'allowed'
+
+def has_budget(provider, priority=NORMAL):
+    """Whether acquire() would currently allow a call, without taking it"""
+    config = PROVIDERS.get(provider)
+    if config is None:
+        return True
+    now = time.time()
+    try:
+        conn = _connect()
+        bucket = _load_bucket(conn, provider, config, now)
+        conn.close()
+    except sqlite3.Error:
+        return True
+    return _decide(bucket, config, priority, now) == 'allowed'
+
+def penalize(provider, seconds):
+    """Block a provider after it answered 429, e.g. for its Retry-After period"""
+    config = PROVIDERS.get(provider)
+    if config is None:
+        return
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            bucket = _load_bucket(conn, provider, config, now)
+            bucket['tokens'] = 0.0
+            bucket['blocked_until'] = max(bucket['blocked_until'], now + seconds)
+            _save_bucket(conn, provider, bucket, now)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+def remaining_budget(provider):
+    config = PROVIDERS[provider]
+    try:
+        conn = _connect()
+        bucket = _load_bucket(conn, provider, config, time.time())
+        conn.close()
+    except sqlite3.Error:
+        return config['daily_budget']
+    return max(0, config['daily_budget'] - bucket['used_today'])
+
+# --- Demand tracking for hot keys (per process) ---
+
+_demand = {}
+_demand_lock = threading.Lock()
+
+def record_demand(key):
+    """Count one request for a category/country key (exponentially decayed)"""
+    now = time.time()
+    with _demand_lock:
+        score, updated_at = _demand.get(key, (0.0, now))
+        score *= 0.5 ** ((now - updated_at) / DEMAND_HALF_LIFE)
+        _demand[key] = (score + 1.0, now)
+        if len(_demand) > MAX_TRACKED_KEYS:
+            # Forget the least recently requested half
+            for stale_key in sorted(_demand, key=lambda k: _demand[k][1])[:MAX_TRACKED_KEYS // 2]:
+                del _demand[stale_key]
+
+def priority_for(key):
+    """HOT for the most requested keys, NORMAL otherwise"""
+    now = time.time()
+    with _demand_lock:
+        scores = {k: score * 0.5 ** ((now - updated_at) / DEMAND_HALF_LIFE)
+                  for k, (score, updated_at) in _demand.items()}
+    if key not in scores:
+        return NORMAL
+    hottest = sorted(scores, key=scores.get, reverse=True)[:RATE_LIMIT_HOT_KEYS]
+    return HOT if key in hottest else NORMAL
+
+for _provider in PROVIDERS:
+    BUDGET_REMAINING.set_function(lambda provider=_provider: remaining_budget(provider), provider=_provider)
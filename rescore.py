@@ -0,0 +1,291 @@
+"""
+Background re-scoring of the article history after a model change
+
+Each row of the articles table records the model_version that scored it. When
+a different version starts serving, a job walks the history in id order,
+re-scores RESCORE_CHUNK_SIZE rows at a time through the bundle's batch
+inference path (ModelBundle.score) and writes the new sentiment, confidence
+and version back in one short transaction per chunk. The chart and history
+endpoints aggregate the articles table directly, so they reflect every chunk
+as soon as it is committed. Rows are re-scored from what is stored: the title
+(with the [CATEGORY] prefix of ingested news) and the first 1000 characters
+of the content, not the full text that was originally scored, so a row can
+come out differently even under the same model. Only rows of a different
+version are ever re-scored. Rows from before versions were recorded
+(model_version NULL) are taken to be scored by the model serving when the
+app is first started with versioning, and stamped with its version instead
+(stamp_legacy_rows). That happens once per database, recorded in the
+schema_migrations table; every writer sets model_version from then on.
+
+Progress is checkpointed per model version in the rescore_progress table, so a
+restarted process resumes after the last committed chunk. The checkpoint row
+doubles as a lease: only one process (e.g. of several serve.py workers)
+re-scores a version at a time, and a job stops as soon as a newer version has
+been requested, so two versions never overwrite each other's rows.
+
+Each chunk is scored in a 'rescore' slot of the analysis scheduler, so live
+requests go first; the slot is held only for the inference, not while rows
+are prepared (and possibly translated). Between chunks the job sleeps long
+enough to keep its share of the time at RESCORE_DUTY_CYCLE.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import app_logging
+import metrics
+import scheduler
+
+RESCORE_ENABLED = os.getenv('RESCORE_ENABLED', '1') != '0'
+RESCORE_CHUNK_SIZE = int(os.getenv('RESCORE_CHUNK_SIZE', '200'))
+# Fraction of wall time the job may spend working (the rest it sleeps)
+RESCORE_DUTY_CYCLE = min(1.0, max(0.01, float(os.getenv('RESCORE_DUTY_CYCLE', '0.2'))))
+# A job that hasn't checkpointed for this long is presumed dead and another process may take over
+RESCORE_LEASE_SECONDS = 60
+
+RESCORED_ROWS = metrics.counter(
+    'news_sentiment_rescored_rows_total',
+    'History rows re-scored after a model change by outcome (changed, unchanged, skipped)', ('outcome',))
+
+logger = app_logging.get_logger('rescore')
+
+# schema_migrations entry of stamp_legacy_rows()
+LEGACY_ROWS_MIGRATION = 'stamp_unversioned_rows'
+
+_job = None
+_job_lock = threading.Lock()
+
+def ensure_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rescore_progress (
+            model_version TEXT PRIMARY KEY,
+            status TEXT,
+            last_id INTEGER DEFAULT 0,
+            rescored INTEGER DEFAULT 0,
+            changed INTEGER DEFAULT 0,
+            skipped INTEGER DEFAULT 0,
+            requested_at REAL,
+            updated_at REAL,
+            owner TEXT,
+            error TEXT
+        )
+    ''')
+
+class RescoreJob:
+    """Re-scores the history rows not yet scored by one model version"""
+
+    def __init__(self, database_path, bundle, prepare):
+        self.database_path = database_path
+        self.bundle = bundle
+        self.version = bundle.version
+        # rows (id, title, content, language, sentiment) -> preprocessed text, or None to skip the row
+        self.prepare = prepare
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'rescore-{self.version}', daemon=True)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        # Explicit BEGIN IMMEDIATE per chunk, so the checks and the writes happen under one lock
+        conn.isolation_level = None
+        return conn
+
+    def stop(self):
+        self.stop_event.set()
+
+    def request(self, conn):
+        """Mark this version as the newest one to re-score, keeping an unfinished checkpoint"""
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        ensure_schema(conn)
+        row = conn.execute('SELECT status FROM rescore_progress WHERE model_version = ?', (self.version,)).fetchone()
+        if row is None or row[0] == 'done':
+            # Rows scored by other versions may have been added since a finished run
+            conn.execute('''
+                INSERT OR REPLACE INTO rescore_progress (model_version, status, requested_at, updated_at)
+                VALUES (?, 'pending', ?, ?)
+            ''', (self.version, now, now))
+        else:
+            conn.execute('UPDATE rescore_progress SET requested_at = ?, error = NULL WHERE model_version = ?',
+                         (now, self.version))
+        conn.execute('COMMIT')
+
+    def _superseded(self, conn):
+        newest = conn.execute(
+            'SELECT model_version FROM rescore_progress ORDER BY requested_at DESC LIMIT 1').fetchone()
+        return newest is not None and newest[0] != self.version
+
+    def claim(self, conn):
+        """Take the lease for this version: 'claimed', 'busy', 'superseded' or 'done'"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._superseded(conn):
+                return 'superseded'
+            status = conn.execute('SELECT status FROM rescore_progress WHERE model_version = ?',
+                                  (self.version,)).fetchone()
+            if status is None or status[0] == 'done':
+                return 'done'
+            now = time.time()
+            claimed = conn.execute('''
+                UPDATE rescore_progress SET owner = ?, status = 'running', updated_at = ?
+                WHERE model_version = ? AND (owner IS NULL OR owner = ? OR updated_at < ?)
+            ''', (self.owner, now, self.version, self.owner, now - RESCORE_LEASE_SECONDS)).rowcount
+            return 'claimed' if claimed else 'busy'
+        finally:
+            conn.execute('COMMIT')
+
+    def release(self, conn, status):
+        """Give up the lease, leaving the checkpoint for whoever re-scores this version next"""
+        conn.execute('''
+            UPDATE rescore_progress SET status = ?, owner = NULL, updated_at = ?
+            WHERE model_version = ? AND owner = ?
+        ''', (status, time.time(), self.version, self.owner))
+
+    def run(self):
+        conn = self._connect()
+        try:
+            self.request(conn)
+            while not self.stop_event.is_set():
+                state = self.claim(conn)
+                if state == 'claimed':
+                    self.rescore(conn)
+                    return
+                if state != 'busy':
+                    return
+                # Another process holds the lease; take over if it stops checkpointing
+                self.stop_event.wait(RESCORE_LEASE_SECONDS / 2)
+        except Exception as e:
+            logger.error("❌ Re-scoring history for model %s failed: %s", self.version, e)
+            try:
+                conn.execute('''
+                    UPDATE rescore_progress SET status = 'failed', owner = NULL, error = ?, updated_at = ?
+                    WHERE model_version = ? AND owner = ?
+                ''', (str(e), time.time(), self.version, self.owner))
+            except sqlite3.Error:
+                pass
+        finally:
+            conn.close()
+
+    def rescore(self, conn):
+        """Re-score chunk after chunk until every row carries this version"""
+        last_id = conn.execute('SELECT last_id FROM rescore_progress WHERE model_version = ?',
+                               (self.version,)).fetchone()[0]
+        logger.info("🔁 Re-scoring history with model %s (from article id %s)", self.version, last_id)
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            rows = conn.execute('''
+                SELECT id, title, content, language, sentiment FROM articles
+                WHERE id > ? AND (model_version IS NULL OR model_version != ?)
+                ORDER BY id LIMIT ?
+            ''', (last_id, self.version, RESCORE_CHUNK_SIZE)).fetchall()
+            if not rows:
+                self.release(conn, 'done')
+                logger.info("✅ History re-scored with model %s", self.version)
+                return
+
+            # Preparing (which may translate over the network) holds no analysis slot; only the
+            # inference does, in a low-priority one, and neither holds the write transaction
+            texts = self.prepare(rows)
+            scored = [(row, text) for row, text in zip(rows, texts) if text]
+            with scheduler.slot(scheduler.RESCORE):
+                scores = self.bundle.score([text for _, text in scored]) if scored else []
+            updates = [(sentiment, confidence, self.version, row[0], self.version)
+                       for (row, _), (sentiment, confidence) in zip(scored, scores)]
+            changed = sum(1 for (row, _), (sentiment, _) in zip(scored, scores) if row[4] != sentiment)
+            skipped = len(rows) - len(scored)
+
+            conn.execute('BEGIN IMMEDIATE')
+            owner = conn.execute('SELECT owner FROM rescore_progress WHERE model_version = ?',
+                                 (self.version,)).fetchone()
+            if self._superseded(conn) or owner is None or owner[0] != self.owner:
+                conn.execute('ROLLBACK')
+                self.release(conn, 'paused')
+                logger.info("⏹️ Stopped re-scoring with model %s: a newer version took over", self.version)
+                return
+            conn.executemany('''
+                UPDATE articles SET sentiment = ?, confidence = ?, model_version = ?
+                WHERE id = ? AND (model_version IS NULL OR model_version != ?)
+            ''', updates)
+            last_id = rows[-1][0]
+            conn.execute('''
+                UPDATE rescore_progress
+                SET last_id = ?, rescored = rescored + ?, changed = changed + ?, skipped = skipped + ?, updated_at = ?
+                WHERE model_version = ?
+            ''', (last_id, len(updates), changed, skipped, time.time(), self.version))
+            conn.execute('COMMIT')
+
+            RESCORED_ROWS.inc(changed, outcome='changed')
+            RESCORED_ROWS.inc(len(updates) - changed, outcome='unchanged')
+            RESCORED_ROWS.inc(skipped, outcome='skipped')
+            elapsed = time.perf_counter() - start
+            self.stop_event.wait(elapsed * (1 / RESCORE_DUTY_CYCLE - 1))
+
+        # Stopped by start() for another version in this process
+        self.release(conn, 'paused')
+
+def stamp_legacy_rows(database_path, bundle):
+    """One-time migration: attribute rows saved before versions were recorded to bundle's version
+
+    Run by the process that sets up the database (app.py, or serve.py's parent before forking).
+    Recorded in schema_migrations, so rows written without a version later are never stamped.
+    Returns the number of rows stamped.
+    """
+    if bundle is None:
+        return 0
+    try:
+        conn = sqlite3.connect(database_path, timeout=30)
+        conn.isolation_level = None
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at REAL, '
+                         'detail TEXT)')
+            if conn.execute('SELECT 1 FROM schema_migrations WHERE name = ?', (LEGACY_ROWS_MIGRATION,)).fetchone():
+                conn.execute('COMMIT')
+                return 0
+            stamped = conn.execute('UPDATE articles SET model_version = ? WHERE model_version IS NULL',
+                                   (bundle.version,)).rowcount
+            conn.execute('INSERT INTO schema_migrations (name, applied_at, detail) VALUES (?, ?, ?)',
+                         (LEGACY_ROWS_MIGRATION, time.time(), f"{stamped} rows attributed to {bundle.version}"))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Could not stamp unversioned history rows: %s", e)
+        return 0
+    if stamped:
+        logger.info("🏷️ Attributed %d history rows without a model version to %s", stamped, bundle.version)
+    return stamped
+
+def start(database_path, bundle, prepare):
+    """Re-score the history for bundle's version in the background, replacing a job for another version"""
+    global _job
+    if not RESCORE_ENABLED or bundle is None:
+        return None
+    with _job_lock:
+        if _job is not None and _job.thread.is_alive():
+            if _job.version == bundle.version:
+                return _job
+            # Let the old job finish its chunk so it can't overwrite rows after the new one starts
+            _job.stop()
+            _job.thread.join(RESCORE_LEASE_SECONDS)
+        _job = RescoreJob(database_path, bundle, prepare)
+        _job.thread.start()
+        return _job
+
+def progress(database_path, limit=5):
+    """Checkpoints of the most recently requested versions, newest first"""
+    try:
+        conn = sqlite3.connect(database_path, timeout=5)
+        rows = conn.execute('''
+            SELECT model_version, status, last_id, rescored, changed, skipped, requested_at, updated_at, error
+            FROM rescore_progress ORDER BY requested_at DESC LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+    except sqlite3.Error:
+        return []
+    names = ('model_version', 'status', 'last_id', 'rescored', 'changed', 'skipped', 'requested_at',
+             'updated_at', 'error')
+    return [dict(zip(names, row)) for row in rows]
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
 """
 Simple script to run the sentiment analysis application
+
+    python run_app.py                 development server (debug, auto-reload)
+    python run_app.py --production    preforked workers sharing the loaded models (see serve.py)
 """
 
 import subprocess
 import sys
 import os
 
-def run_app():
+def ensure_nltk_data():
+    """Download the NLTK data into NLTK_DATA_DIR (see download_nltk_data.py) if it isn't there yet"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    nltk_data_dir = os.getenv('NLTK_DATA_DIR', 'nltk_data')
+    if os.path.isdir(nltk_data_dir):
+        return
+    print(f"📥 {nltk_data_dir} not found, downloading NLTK data...")
+    subprocess.run([sys.executable, "download_nltk_data.py"], check=True)
+
+def run_app(production=False):
     """Run the Flask application"""
     print("🚀 Starting News Sentiment Analysis Application...")
     print("📊 Stock-like sentiment chart is now available!")
@@ -22,9 +35,10 @@ def run_app():
     try:
         # Change to the directory containing app.py
         os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        ensure_nltk_data()
         
         # Run the Flask app
-        subprocess.run([sys.executable, "app.py"], check=True)
+        subprocess.run([sys.executable, "serve.py" if production else "app.py"], check=True)
         
     except KeyboardInterrupt:
         print("\n🛑 Application stopped by user")
@@ -34,4 +48,4 @@ def run_app():
         print(f"❌ Unexpected error: {e}")
 
 if __name__ == "__main__":
-    run_app()
+    run_app(production='--production' in sys.argv[1:])
@@ -0,0 +1,182 @@
+"""
+Priority scheduling of analysis work between interactive and background callers.
+
+Sentiment analysis is CPU-bound and shares the models, so all of it runs in
+one of SCHEDULER_SLOTS analysis slots per process (serve.py splits the CPUs
+between its workers, so the host as a whole runs one analysis per CPU).
+Every caller states a priority class:
+
+    interactive  requests a user is waiting for (/predict, /analyze-article, uploads)
+    deferred     optional stages a request skipped to meet its latency budget (latency_budget.py)
+    ingestion    bulk analysis of fetched news (analyze_trending_news_all_categories)
+    rescore      re-scoring the history after a model change (rescore.py)
+
+A free slot always goes to the longest-waiting interactive request first.
+Background classes only get slots nobody interactive is waiting for, never
+more than SCHEDULER_SLOTS - SCHEDULER_INTERACTIVE_RESERVED of them at once,
+and share them by weight (SCHEDULER_WEIGHTS, stride scheduling), so ingestion
+soaks up idle capacity without delaying interactive requests by more than the
+one unit of background work already running. Background work is submitted in
+small units (one article, one chunk) so that bound stays short. With a single
+slot there is no slot to reserve; background work then only starts while no
+interactive request is in flight (begin_request() / end_request(), called by
+app.py around every admitted request), not merely while none is waiting for
+the slot. Interactive requests must therefore never wait for background work.
+
+Request threads take a slot with `with scheduler.slot(priority):`; background
+work goes through submit(), which runs it on the scheduler's threads with the
+caller's context (metrics, tracing, logging).
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import metrics
+
+INTERACTIVE = 'interactive'
+DEFERRED = 'deferred'
+INGESTION = 'ingestion'
+RESCORE = 'rescore'
+PRIORITIES = (INTERACTIVE, DEFERRED, INGESTION, RESCORE)
+BACKGROUND = (DEFERRED, INGESTION, RESCORE)
+
+SCHEDULER_SLOTS = int(os.getenv('SCHEDULER_SLOTS', str(os.cpu_count() or 2)))
+# Slots background classes may never take
+SCHEDULER_INTERACTIVE_RESERVED = int(os.getenv('SCHEDULER_INTERACTIVE_RESERVED', '1'))
+# Threads running submitted background work (they wait for slots like everyone else)
+SCHEDULER_BACKGROUND_THREADS = int(os.getenv('SCHEDULER_BACKGROUND_THREADS', '4'))
+
+def parse_weights(value):
+    """'ingestion=3,rescore=2' -> {class: weight}, defaulting unlisted background classes to 1"""
+    weights = {priority: 1.0 for priority in BACKGROUND}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = item.partition('=')
+        if name.strip() in weights:
+            weights[name.strip()] = max(0.01, float(weight))
+    return weights
+
+SCHEDULER_WEIGHTS = parse_weights(os.getenv('SCHEDULER_WEIGHTS', 'deferred=4,ingestion=3,rescore=2'))
+
+SCHEDULER_WAIT_SECONDS = metrics.histogram(
+    'news_sentiment_scheduler_wait_seconds',
+    'Time analysis work waited for a slot, per priority class', ('priority',))
+SCHEDULER_RUNNING = metrics.gauge(
+    'news_sentiment_scheduler_running',
+    'Analysis slots in use per priority class', ('priority',))
+SCHEDULER_QUEUED = metrics.gauge(
+    'news_sentiment_scheduler_queued',
+    'Analysis work waiting for a slot per priority class', ('priority',))
+
+class Scheduler:
+    """Strict priority for interactive work, weighted fair shares for background classes"""
+
+    def __init__(self, slots, interactive_reserved, weights):
+        self.slots = max(1, slots)
+        # With a single slot background work still has to run somewhere (between interactive requests)
+        self.max_background = max(1, self.slots - interactive_reserved)
+        self.interactive_in_flight = 0
+        self.weights = weights
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        # Stride scheduling: the waiting background class with the lowest pass goes next
+        self._pass = {priority: 0.0 for priority in BACKGROUND}
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+        for priority in PRIORITIES:
+            SCHEDULER_RUNNING.set_function(lambda priority=priority: self.running[priority], priority=priority)
+            SCHEDULER_QUEUED.set_function(lambda priority=priority: len(self._queues[priority]),
+                                          priority=priority)
+
+    def acquire(self, priority):
+        """Block until a slot is granted to this priority class"""
+        waiter = threading.Event()
+        with self._lock:
+            queue = self._queues[priority]
+            if priority in self._pass and not queue:
+                # A class that was idle doesn't bank credit for the time it didn't ask
+                self._pass[priority] = max(self._pass[priority], self._virtual_time)
+            queue.append(waiter)
+            self._dispatch()
+        waiter.wait()
+
+    def release(self, priority):
+        with self._lock:
+            self.running[priority] -= 1
+            self._dispatch()
+
+    def begin_request(self):
+        with self._lock:
+            self.interactive_in_flight += 1
+
+    def end_request(self):
+        with self._lock:
+            self.interactive_in_flight -= 1
+            self._dispatch()
+
+    def _dispatch(self):
+        while sum(self.running.values()) < self.slots:
+            priority = self._next_priority()
+            if priority is None:
+                return
+            self.running[priority] += 1
+            self._queues[priority].popleft().set()
+
+    def _next_priority(self):
+        if self._queues[INTERACTIVE]:
+            return INTERACTIVE
+        if sum(self.running[priority] for priority in BACKGROUND) >= self.max_background:
+            return None
+        if self.slots == 1 and self.interactive_in_flight:
+            return None
+        waiting = [priority for priority in BACKGROUND if self._queues[priority]]
+        if not waiting:
+            return None
+        priority = min(waiting, key=lambda name: self._pass[name])
+        self._virtual_time = self._pass[priority]
+        self._pass[priority] += 1.0 / self.weights[priority]
+        return priority
+
+    def snapshot(self):
+        with self._lock:
+            return {priority: {'running': self.running[priority], 'queued': len(self._queues[priority])}
+                    for priority in PRIORITIES}
+
+_scheduler = Scheduler(SCHEDULER_SLOTS, SCHEDULER_INTERACTIVE_RESERVED, SCHEDULER_WEIGHTS)
+_executor = ThreadPoolExecutor(max_workers=SCHEDULER_BACKGROUND_THREADS, thread_name_prefix='scheduler')
+
+@contextmanager
+def slot(priority=INTERACTIVE):
+    """Hold an analysis slot for the duration of the block"""
+    start = time.perf_counter()
+    _scheduler.acquire(priority)
+    waited = time.perf_counter() - start
+    SCHEDULER_WAIT_SECONDS.observe(waited, priority=priority)
+    metrics.record_timing('scheduler_wait', waited)
+    try:
+        yield
+    finally:
+        _scheduler.release(priority)
+
+def begin_request():
+    """An interactive request was admitted (see the module docstring)"""
+    _scheduler.begin_request()
+
+def end_request():
+    _scheduler.end_request()
+
+def submit(priority, function, *args):
+    """Run function(*args) in a slot of a background class; returns a Future"""
+    context = contextvars.copy_context()
+
+    def run():
+        with slot(priority):
+            return function(*args)
+    return _executor.submit(context.run, run)
+
+def snapshot():
+    return _scheduler.snapshot()
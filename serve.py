@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Production launcher: load the models once, then fork workers that share them.
+
+The parent process imports app.py, loads the models and vectorizer, runs the
+warm-up, and freezes the garbage collector so those objects are never
+rewritten by a collection. It then binds the listening socket and forks
+WEB_WORKERS workers. Each worker inherits the loaded models copy-on-write and
+serves the shared socket with a pool of WEB_THREADS threads, so adding a
+worker costs a fork instead of another model load.
+
+Signals (sent to the parent):
+    SIGTERM / SIGINT  graceful shutdown: workers stop accepting, finish the
+                      requests in flight (up to WEB_GRACEFUL_TIMEOUT), exit
+    SIGHUP            rolling restart: the parent loads the model files if
+                      they changed, then workers are replaced one at a time,
+                      each new worker is started before the old one stops
+Workers that die are replaced automatically. Code changes need a full restart
+of the launcher; SIGHUP re-forks from the already loaded parent. A retrained
+model only needs SIGHUP, and not even that with MODEL_WATCH_INTERVAL set: the
+parent watches the model files and does the rolling restart itself. POST
+/admin/model/reload reaches one worker, which passes it on to the parent as a
+SIGHUP, so every worker moves to the new model. Models are only ever loaded
+in the parent and inherited; a worker forked from a parent whose model files
+have changed since (a reload that failed there) loads them itself.
+
+Configuration (environment):
+    WEB_HOST              bind address (default: 0.0.0.0)
+    WEB_PORT              port (default: 5000)
+    WEB_WORKERS           worker processes (default: number of CPUs)
+    WEB_THREADS           request threads per worker (default: enough for every request the
+                          admission classes may run or queue, plus WEB_SPARE_THREADS)
+    WEB_GRACEFUL_TIMEOUT  seconds a worker may take to finish in-flight requests (default: 30)
+    SCHEDULER_SLOTS       analysis slots per worker (default: CPUs / WEB_WORKERS, at least 1)
+    METRICS_MULTIPROCESS_DIR  directory the workers share their metrics through, so /metrics
+                          reports all of them (default: metrics_workers; emptied at startup)
+
+Unix only (uses fork). Usage:
+    python serve.py
+    WEB_WORKERS=4 WEB_THREADS=8 python serve.py
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from werkzeug.serving import BaseWSGIServer
+
+load_dotenv()
+
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 1)))
+# Analysis slots are per process (scheduler.py): split the CPUs between the workers so the host runs one
+# analysis per CPU, not one per CPU in every worker
+os.environ.setdefault('SCHEDULER_SLOTS', str(max(1, (os.cpu_count() or 1) // max(1, WEB_WORKERS))))
+
+# Read their limits from the environment, so they're imported once .env is loaded
+import admission  # noqa: E402
+import app_logging  # noqa: E402
+import metrics  # noqa: E402
+import model_registry  # noqa: E402
+import rescore  # noqa: E402
+
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', '5000'))
+# Threads left for endpoints that are never queued (/history, /metrics, ...) when every
+# expensive request slot is taken
+WEB_SPARE_THREADS = 4
+WEB_THREADS = int(os.getenv('WEB_THREADS', '0')) or admission.max_held() + WEB_SPARE_THREADS
+WEB_GRACEFUL_TIMEOUT = float(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR', 'metrics_workers')
+LISTEN_BACKLOG = 2048
+# Workers that exit sooner than this after starting are respawned after a pause
+WORKER_MIN_LIFETIME = 5.0
+WORKER_RESPAWN_DELAY = 2.0
+
+logger = app_logging.get_logger('serve')
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server on an inherited socket that handles requests on a fixed thread pool"""
+
+    multithread = True
+    daemon_threads = True
+
+    def __init__(self, app, threads, fd):
+        super().__init__(WEB_HOST, WEB_PORT, app, fd=fd)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='web')
+        # Only accept a connection when a thread is free; the rest wait in the
+        # kernel backlog, where an idle worker can pick them up
+        self._free_threads = threading.Semaphore(threads)
+
+    def process_request(self, request, client_address):
+        self._free_threads.acquire()
+        self._executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._free_threads.release()
+
+    def drain(self):
+        """Wait for the requests in flight to finish"""
+        self._executor.shutdown(wait=True)
+
+def preload():
+    """Import the app and load everything workers should share"""
+    # Objects created while loading stay out of the collector's generations
+    gc.disable()
+    import app
+
+    app.init_database()
+    if not app.load_models():
+        logger.error("❌ Failed to load models. Please check model files.")
+        sys.exit(1)
+    # Once per database, before any worker writes or re-scores history (see rescore.py)
+    rescore.stamp_legacy_rows(app.DATABASE_PATH, model_registry.current())
+    if app.WARM_UP_ENABLED:
+        logger.info("🔥 Warming up the analysis pipeline...")
+        app.warm_up()
+
+    extra_threads = [thread.name for thread in threading.enumerate() if thread is not threading.main_thread()]
+    if extra_threads:
+        # Threads don't survive fork; executors that started them would hang in workers
+        logger.warning("⚠️ Threads running before fork (will not exist in workers): %s", extra_threads)
+    metrics.use_multiprocess_dir(METRICS_MULTIPROCESS_DIR)
+    gc.collect()
+    gc.freeze()
+    return app.app
+
+def reload_through_parent():
+    """Reload handler of workers: the parent reloads and replaces every worker"""
+    model_registry.reload_state.update(status='rolling_restart', version=None, error=None, duration_ms=None,
+                                       started_at=time.time())
+    os.kill(os.getppid(), signal.SIGHUP)
+    return True
+
+def run_worker(wsgi_app, listener):
+    """Worker process body: serve the shared socket until told to stop"""
+    gc.enable()
+    metrics.start_worker()
+    # Never serve (or re-score history back to) a bundle older than the files on disk
+    model_registry.refresh()
+    model_registry.set_reload_handler(reload_through_parent)
+    # Threads don't survive fork, so each worker starts its own history re-scoring; the parent
+    # watches the model files
+    import app
+    app.start_background_jobs(watch_models=False)
+    server = PooledWSGIServer(wsgi_app, WEB_THREADS, listener.fileno())
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever(), which runs in this (the main) thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    # Returns (with the listening socket closed) after shutdown()
+    server.serve_forever()
+    server.drain()
+    metrics.flush()
+
+class Arbiter:
+    """Parent process: forks, watches, replaces and stops workers"""
+
+    def __init__(self, wsgi_app, listener, workers):
+        self.wsgi_app = wsgi_app
+        self.listener = listener
+        self.workers = workers
+        self.pids = set()
+        self.started_at = {}
+        self.stopping = False
+        self.reload_requested = False
+        self.next_model_check = time.monotonic() + model_registry.MODEL_WATCH_INTERVAL
+        self.pending_signature = None
+        self.failed_signature = None
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.wsgi_app, self.listener)
+            except Exception as e:
+                logger.error("❌ Worker %d crashed: %s", os.getpid(), e)
+                code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        self.pids.add(pid)
+        self.started_at[pid] = time.monotonic()
+        logger.info("👷 Worker %d started", pid)
+        return pid
+
+    def stop_worker(self, pid):
+        """Ask a worker to finish its requests and exit; kill it after the graceful timeout"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.pids.discard(pid)
+            return
+        deadline = time.monotonic() + WEB_GRACEFUL_TIMEOUT
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.1)
+        else:
+            logger.warning("⚠️ Worker %d did not stop in %.0fs, killing it", pid, WEB_GRACEFUL_TIMEOUT)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.pids.discard(pid)
+        self.started_at.pop(pid, None)
+        metrics.mark_process_dead(pid)
+
+    def refresh_models(self):
+        """Load changed model files in the parent, so the workers forked next inherit them"""
+        if not model_registry.refresh():
+            return False
+        gc.collect()
+        gc.freeze()
+        return True
+
+    def models_changed(self):
+        """Parent's model watcher: True once changed model files stayed the same for one interval"""
+        if model_registry.MODEL_WATCH_INTERVAL <= 0 or time.monotonic() < self.next_model_check:
+            return False
+        self.next_model_check = time.monotonic() + model_registry.MODEL_WATCH_INTERVAL
+        signature = model_registry.files_signature()
+        if signature == model_registry.current().signature or signature == self.failed_signature:
+            self.pending_signature = None
+            return False
+        settled = signature == self.pending_signature
+        self.pending_signature = None if settled else signature
+        return settled
+
+    def rolling_restart(self):
+        logger.info("🔄 Rolling restart of workers...")
+        for pid in list(self.pids):
+            self.spawn()
+            self.stop_worker(pid)
+        logger.info("✅ Rolling restart done")
+
+    def reap(self):
+        """Collect exited workers; returns how many died (after a pause if they crashed at startup)"""
+        died = 0
+        crashed_early = False
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.pids:
+                self.pids.discard(pid)
+                metrics.mark_process_dead(pid)
+                died += 1
+                crashed_early |= time.monotonic() - self.started_at.pop(pid, 0) < WORKER_MIN_LIFETIME
+                logger.warning("⚠️ Worker %d exited with status %d", pid, status)
+        if crashed_early:
+            # Don't fork in a tight loop when workers can't start
+            time.sleep(WORKER_RESPAWN_DELAY)
+        return died
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("📊 Serving on http://%s:%d with %d worker(s) x %d thread(s)", WEB_HOST, WEB_PORT, self.workers, WEB_THREADS)
+
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.refresh_models()
+                self.rolling_restart()
+            elif self.models_changed():
+                if self.refresh_models():
+                    self.rolling_restart()
+                else:
+                    # Don't retry a broken deployment on every poll
+                    self.failed_signature = model_registry.files_signature()
+            for _ in range(self.reap()):
+                if not self.stopping:
+                    self.spawn()
+            time.sleep(0.5)
+
+        logger.info("🛑 Shutting down workers...")
+        for pid in list(self.pids):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.pids):
+            self.stop_worker(pid)
+        self.listener.close()
+        logger.info("👋 Stopped")
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def _request_reload(self, signum, frame):
+        self.reload_requested = True
+
+def main():
+    app_logging.configure_logging()
+    if not hasattr(os, 'fork'):
+        logger.error("❌ serve.py needs fork (Linux/macOS); use run_app.py on Windows")
+        return 1
+    logger.info("🚀 Starting News Sentiment Analysis (production launcher)...")
+    if WEB_THREADS <= admission.max_held():
+        logger.warning("⚠️ WEB_THREADS=%d can all be taken by queued expensive requests "
+                       "(%d admission slots); cheap endpoints may stall", WEB_THREADS, admission.max_held())
+    wsgi_app = preload()
+    listener = socket.create_server((WEB_HOST, WEB_PORT), backlog=LISTEN_BACKLOG)
+    listener.set_inheritable(True)
+    Arbiter(wsgi_app, listener, max(1, WEB_WORKERS)).run()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
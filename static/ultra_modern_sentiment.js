@@ -679,7 +679,9 @@ class SentimentAnalyzer {
             key_details: result.key_details,
             keywords: result.keywords,
             news_genre: result.news_genre,
-            similar_articles: result.similar_articles
+            similar_articles: result.similar_articles,
+            skipped_stages: result.skipped_stages,
+            deferred: result.deferred
         };
     }
 
@@ -731,6 +733,39 @@ class SentimentAnalyzer {
         
         // Initialize result animations
         this.initResultAnimations();
+        
+        // Stages skipped to answer quickly are computed in the background
+        if (response.deferred) {
+            this.loadDeferredStages(response.deferred);
+        }
+    }
+
+    async loadDeferredStages(deferred) {
+        for (let attempt = 0; attempt < 10; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            try {
+                const response = await fetch(deferred.url);
+                // 404: the pending entry isn't visible yet; keep polling
+                if (response.status === 202 || response.status === 404) {
+                    continue;
+                }
+                if (!response.ok) {
+                    return;
+                }
+                const data = await response.json();
+                if (this.currentAnalysisResult) {
+                    Object.assign(this.currentAnalysisResult, data.results);
+                }
+                const placeholder = document.getElementById('deferredWordCloud');
+                if (placeholder && data.results.wordcloud) {
+                    placeholder.outerHTML = this.createWordCloudSection(data.results.wordcloud);
+                }
+                return;
+            } catch (error) {
+                console.error('Deferred stages error:', error);
+                return;
+            }
+        }
     }
 
     createResultsHTML(response) {
@@ -872,7 +907,7 @@ class SentimentAnalyzer {
                     <!-- Keywords Section -->
                     ${response.important_keywords ? this.createImportantKeywordsSection(response.important_keywords) : ''}
                     
-                    ${response.wordcloud ? this.createWordCloudSection(response.wordcloud) : ''}
+                    ${response.wordcloud ? this.createWordCloudSection(response.wordcloud) : '<div id="deferredWordCloud"></div>'}
                     
                     <!-- Action Buttons -->
                     <div class="flex flex-wrap gap-4 mt-8 pt-8 border-t border-white/10">
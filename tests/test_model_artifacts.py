@@ -0,0 +1,68 @@
+"""Parity of the memory-mapped model artifacts with the pickled model they are exported from"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import model_artifacts
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+joblib = pytest.importorskip('joblib')
+pytest.importorskip('sklearn')
+if not os.path.exists(os.path.join(MODELS_DIR, 'model_metadata.json')):
+    pytest.skip('models/ is not available', allow_module_level=True)
+
+@pytest.fixture(scope='module')
+def pickled():
+    sources = model_artifacts.source_files(MODELS_DIR)
+    model_file, vectorizer_file, label_encoder_file = sources
+    return (joblib.load(sources[vectorizer_file]), joblib.load(sources[model_file]),
+            joblib.load(sources[label_encoder_file]))
+
+@pytest.fixture(scope='module')
+def mapped(tmp_path_factory):
+    target = str(tmp_path_factory.mktemp('artifacts'))
+    model_artifacts.export(MODELS_DIR, target)
+    loaded = model_artifacts.load(target, MODELS_DIR)
+    assert loaded is not None
+    return loaded
+
+@pytest.fixture(scope='module')
+def documents(pickled):
+    return model_artifacts.parity_corpus(pickled[0].vocabulary_)
+
+def test_features_match(pickled, mapped, documents):
+    expected = pickled[0].transform(documents)
+    for index, (columns, weights) in enumerate(mapped[0].transform(documents)):
+        dense = np.zeros(expected.shape[1])
+        dense[columns] = weights
+        np.testing.assert_allclose(dense, expected[index].toarray()[0], rtol=0, atol=model_artifacts.PARITY_TOLERANCE)
+
+def test_probabilities_and_labels_match(pickled, mapped, documents):
+    vectorizer, model, label_encoder = pickled
+    mapped_vectorizer, mapped_model, mapped_labels = mapped
+    expected = vectorizer.transform(documents)
+    rows = mapped_vectorizer.transform(documents)
+
+    np.testing.assert_allclose(mapped_model.predict_proba(rows), model.predict_proba(expected),
+                               rtol=0, atol=model_artifacts.PARITY_TOLERANCE)
+    assert list(mapped_labels.inverse_transform(mapped_model.predict(rows))) == \
+        list(label_encoder.inverse_transform(model.predict(expected)))
+
+def test_verify_passes(tmp_path):
+    target = str(tmp_path / 'artifacts')
+    model_artifacts.export(MODELS_DIR, target)
+    assert model_artifacts.verify(target, MODELS_DIR) <= model_artifacts.PARITY_TOLERANCE
+
+def test_stale_artifacts_are_not_loaded(tmp_path):
+    models_dir = str(tmp_path / 'models')
+    shutil.copytree(MODELS_DIR, models_dir, ignore=shutil.ignore_patterns('artifacts', '__pycache__'))
+    target = str(tmp_path / 'artifacts')
+    model_artifacts.export(models_dir, target)
+
+    with open(os.path.join(models_dir, model_artifacts.LABEL_ENCODER_FILE), 'ab') as f:
+        f.write(b'\0')
+    assert model_artifacts.load(target, models_dir) is None
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-request tracing for the news sentiment app.
+
+A request is traced when it carries the trace header (X-Trace: 1 by default)
+or is picked by TRACE_SAMPLE_RATE. Traced requests record nested spans for
+pipeline stages, regex-heavy helpers, SQLite calls and outbound HTTP calls,
+and each finished trace is written as one compact JSON line to a rotating
+file. When no trace is active, span() and @traced cost a single lookup.
+
+Flame-style summary of the slowest recent trace:
+    python tracing.py summarize traces/traces.jsonl --slowest
+"""
+
+import argparse
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+TRACE_HEADER = os.getenv('TRACE_HEADER', 'X-Trace')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0') or 0)
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join('traces', 'traces.jsonl'))
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv('TRACE_BACKUP_COUNT', '5'))
+
+# Hard cap so a pathological request can't build an unbounded trace
+MAX_SPANS_PER_TRACE = 5000
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=0)
+
+_trace_logger = None
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name, attrs=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs or {}
+        self.started_at = datetime.now().isoformat(timespec='milliseconds')
+        self.start = time.perf_counter()
+        # Each span: [span_id, parent_id, name, start_ms, duration_ms]
+        self.spans = []
+        self.dropped = 0
+        self._next_id = 1
+
+    def open_span(self, name, parent_id):
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped += 1
+            return None
+        span_id = self._next_id
+        self._next_id += 1
+        span = [span_id, parent_id, name, round((time.perf_counter() - self.start) * 1000, 3), None]
+        self.spans.append(span)
+        return span
+
+    def to_dict(self, status):
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'status': status,
+            'attrs': self.attrs,
+            'dropped_spans': self.dropped,
+            'spans': self.spans
+        }
+
+def _get_trace_logger():
+    """Lazily create the rotating JSONL writer"""
+    global _trace_logger
+    if _trace_logger is None:
+        directory = os.path.dirname(os.path.abspath(TRACE_FILE))
+        os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger('news_sentiment.traces')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        _trace_logger = logger
+    return _trace_logger
+
+def should_trace(header_value=None):
+    """Decide whether to trace a request from its header value and the sample rate"""
+    if header_value and header_value.strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+def start_trace(name, attrs=None):
+    """Begin tracing the current context; returns the Trace"""
+    trace = Trace(name, attrs)
+    _current_trace.set(trace)
+    _current_span.set(0)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+def finish_trace(status='ok'):
+    """Write the active trace (if any) and stop tracing; returns the trace id"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    _current_trace.set(None)
+    _current_span.set(0)
+    try:
+        _get_trace_logger().info(json.dumps(trace.to_dict(status), separators=(',', ':')))
+    except Exception as e:
+        print(f"⚠️ Failed to write trace {trace.trace_id}: {e}")
+    return trace.trace_id
+
+@contextmanager
+def span(name):
+    """Record a nested span when a trace is active"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    record = trace.open_span(name, _current_span.get())
+    if record is None:
+        yield
+        return
+    token = _current_span.set(record[0])
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        record[4] = round((time.perf_counter() - trace.start) * 1000 - record[3], 3)
+
+def traced(name=None):
+    """Decorator that wraps a function in a span named after it"""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return function(*args, **kwargs)
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- Flame-style summary CLI ---
+
+def load_traces(path):
+    """Read every trace from a JSONL file"""
+    traces = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    traces.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return traces
+
+def build_flame_tree(trace):
+    """Aggregate spans by call path: returns nested {name: node} with totals and counts"""
+    spans = {span_id: (parent, name, duration or 0.0) for span_id, parent, name, _, duration in trace['spans']}
+    root = {'name': trace['name'], 'total': trace['duration_ms'], 'count': 1, 'children': {}}
+
+    def path_of(span_id):
+        path = []
+        while span_id:
+            parent, name, _ = spans[span_id]
+            path.append(name)
+            span_id = parent if parent in spans else 0
+        return list(reversed(path))
+
+    for span_id, (_, _, duration) in spans.items():
+        node = root
+        for name in path_of(span_id):
+            node = node['children'].setdefault(name, {'name': name, 'total': 0.0, 'count': 0, 'children': {}})
+        node['total'] += duration
+        node['count'] += 1
+    return root
+
+def render_flame(trace, min_percent=0.5, width=40):
+    """Render an indented text flame summary of one trace"""
+    root = build_flame_tree(trace)
+    total = root['total'] or 1.0
+    lines = [
+        f"trace {trace['trace_id']}  {trace['name']}  {trace['duration_ms']:.1f} ms  "
+        f"status={trace.get('status')}  started={trace.get('started_at')}",
+        f"{'total ms':>10} {'self ms':>10} {'%':>6} {'calls':>6}  span"
+    ]
+
+    def walk(node, depth):
+        children_total = sum(child['total'] for child in node['children'].values())
+        self_time = max(0.0, node['total'] - children_total)
+        percent = node['total'] / total * 100
+        bar = '█' * max(1, int(round(percent / 100 * width))) if percent >= min_percent else ''
+        lines.append(f"{node['total']:>10.1f} {self_time:>10.1f} {percent:>5.1f}% {node['count']:>6}  "
+                     f"{'  ' * depth}{node['name']} {bar}")
+        for child in sorted(node['children'].values(), key=lambda c: c['total'], reverse=True):
+            if child['total'] / total * 100 >= min_percent:
+                walk(child, depth + 1)
+
+    walk(root, 0)
+    if trace.get('dropped_spans'):
+        lines.append(f"⚠️ {trace['dropped_spans']} span(s) dropped (limit {MAX_SPANS_PER_TRACE})")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize recorded request traces')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    summarize = subparsers.add_parser('summarize', help='print a flame-style breakdown')
+    summarize.add_argument('path', nargs='?', default=TRACE_FILE, help=f"trace file (default: {TRACE_FILE})")
+    summarize.add_argument('--trace-id', help='summarize this trace')
+    summarize.add_argument('--slowest', action='store_true', help='summarize the slowest trace in the file')
+    summarize.add_argument('--last', type=int, default=1, help='summarize the last N traces (default: 1)')
+    summarize.add_argument('--min-percent', type=float, default=0.5, help='hide spans below this share')
+
+    listing = subparsers.add_parser('list', help='list traces with their durations')
+    listing.add_argument('path', nargs='?', default=TRACE_FILE)
+
+    args = parser.parse_args(argv)
+    traces = load_traces(args.path)
+    if not traces:
+        print(f"No traces found in {args.path}")
+        return 1
+
+    if args.command == 'list':
+        for trace in traces:
+            print(f"{trace['trace_id']}  {trace['duration_ms']:>10.1f} ms  {trace['status']:<6} "
+                  f"{trace['started_at']}  {trace['name']}")
+        return 0
+
+    if args.trace_id:
+        selected = [trace for trace in traces if trace['trace_id'] == args.trace_id]
+        if not selected:
+            print(f"Trace {args.trace_id} not found")
+            return 1
+    elif args.slowest:
+        selected = [max(traces, key=lambda trace: trace['duration_ms'])]
+    else:
+        selected = traces[-args.last:]
+
+    for trace in selected:
+        print(render_flame(trace, args.min_percent))
+        print()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Batched, cached translation on top of the Google Translate client.
+
+translate_batch() looks every text up in a persistent cache keyed by
+(sha256 of the text, source language, target language) and sends all misses
+in one API call (the v2 API accepts repeated `q` values). The cache lives in
+SQLite (TRANSLATION_CACHE_DB) so every worker shares it, and the least
+recently used rows are evicted beyond TRANSLATION_CACHE_MAX_ENTRIES.
+
+translate_document() handles texts of any length (uploaded files, OCR output,
+transcripts): it cuts the text at sentence boundaries into chunks of at most
+TRANSLATION_CHUNK_CHARS, translates them concurrently (at most
+TRANSLATION_CONCURRENCY requests in flight per process), retries the chunks
+that failed, and stitches the results back together in order.
+
+Both have a deadline (TRANSLATION_DEADLINE, TRANSLATION_DOCUMENT_DEADLINE):
+request timeouts are capped to the time left, and texts still untranslated
+when it passes come back as failures instead of holding up the caller.
+"""
+
+import contextvars
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import metrics
+
+TRANSLATION_CACHE_DB = os.getenv('TRANSLATION_CACHE_DB', 'translation_cache.db')
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', '20000'))
+# Eviction runs once every this many inserts rather than on every write
+EVICTION_INTERVAL = 200
+# The v2 API recommends at most 5K characters per request
+TRANSLATION_CHUNK_CHARS = int(os.getenv('TRANSLATION_CHUNK_CHARS', '4000'))
+TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', '4'))
+TRANSLATION_CHUNK_RETRIES = int(os.getenv('TRANSLATION_CHUNK_RETRIES', '2'))
+CHUNK_RETRY_BACKOFF = 0.2
+# Seconds a translate_batch() call / a whole translate_document() may take
+TRANSLATION_DEADLINE = float(os.getenv('TRANSLATION_DEADLINE', '8'))
+TRANSLATION_DOCUMENT_DEADLINE = float(os.getenv('TRANSLATION_DOCUMENT_DEADLINE', '60'))
+
+# End of a sentence (with closing quotes/brackets and the whitespace after it) or a line break
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\'\u201d\u2019)\]]*\s+|[\u3002\uff01\uff1f]+\s*|\n\s*')
+
+TRANSLATION_CACHE_LOOKUPS = metrics.counter(
+    'news_sentiment_translation_cache_lookups_total',
+    'Translation cache lookups by result', ('result',))
+
+TRANSLATION_CHUNKS = metrics.counter(
+    'news_sentiment_translation_chunks_total',
+    'Document translation chunks by outcome (translated, retried, failed)', ('outcome',))
+
+_chunk_executor = ThreadPoolExecutor(max_workers=TRANSLATION_CONCURRENCY, thread_name_prefix='translate-chunk')
+
+_initialized = set()
+_inserts_since_eviction = 0
+_eviction_lock = threading.Lock()
+
+def _connect():
+    conn = sqlite3.connect(TRANSLATION_CACHE_DB, timeout=5)
+    if TRANSLATION_CACHE_DB not in _initialized:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                cache_key TEXT PRIMARY KEY,
+                translated_text TEXT,
+                detected_language TEXT,
+                accessed_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed_at)')
+        conn.commit()
+        _initialized.add(TRANSLATION_CACHE_DB)
+    return conn
+
+def cache_key(text, source_language, target_language):
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f"{digest}:{source_language or 'auto'}:{target_language}"
+
+def cache_get_many(keys):
+    """Return {key: (translated_text, detected_language)} for the keys that are cached"""
+    if not keys:
+        return {}
+    try:
+        conn = _connect()
+        placeholders = ','.join('?' * len(keys))
+        rows = conn.execute(
+            f'SELECT cache_key, translated_text, detected_language FROM translations WHERE cache_key IN ({placeholders})',
+            list(keys)).fetchall()
+        if rows:
+            hit_keys = [row[0] for row in rows]
+            conn.execute(f"UPDATE translations SET accessed_at = ? WHERE cache_key IN ({','.join('?' * len(hit_keys))})",
+                         [time.time()] + hit_keys)
+            conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        return {}
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+def cache_put_many(entries):
+    """Store {key: (translated_text, detected_language)}"""
+    global _inserts_since_eviction
+    if not entries:
+        return
+    now = time.time()
+    try:
+        conn = _connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO translations (cache_key, translated_text, detected_language, accessed_at) '
+            'VALUES (?, ?, ?, ?)',
+            [(key, translated, detected, now) for key, (translated, detected) in entries.items()])
+        conn.commit()
+        with _eviction_lock:
+            _inserts_since_eviction += len(entries)
+            evict = _inserts_since_eviction >= EVICTION_INTERVAL
+            if evict:
+                _inserts_since_eviction = 0
+        if evict:
+            conn.execute('''
+                DELETE FROM translations WHERE cache_key IN (
+                    SELECT cache_key FROM translations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (TRANSLATION_CACHE_MAX_ENTRIES,))
+            conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+def translate_batch(client, texts, target_language='en', source_language=None, deadline=None):
+    """Translate several texts with at most one API call
+
+    Returns one {'translatedText', 'detectedSourceLanguage'} dict per text, or
+    None for texts that could not be translated. deadline (time.monotonic())
+    defaults to TRANSLATION_DEADLINE from now.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + TRANSLATION_DEADLINE
+    keys = [cache_key(text, source_language, target_language) for text in texts]
+    cached = cache_get_many(set(keys))
+    results = [None] * len(texts)
+    missing = {}
+    for index, (text, key) in enumerate(zip(texts, keys)):
+        if key in cached:
+            translated, detected = cached[key]
+            results[index] = {'translatedText': translated, 'detectedSourceLanguage': detected}
+        else:
+            # Identical texts in one batch are only sent once
+            missing.setdefault(key, []).append(index)
+    TRANSLATION_CACHE_LOOKUPS.inc(len(texts) - sum(len(indexes) for indexes in missing.values()), result='hit')
+    TRANSLATION_CACHE_LOOKUPS.inc(sum(len(indexes) for indexes in missing.values()), result='miss')
+
+    if not missing:
+        return results
+
+    pending_keys = list(missing)
+    translations = client.translate_batch(
+        [texts[missing[key][0]] for key in pending_keys],
+        target_language=target_language,
+        source_language=source_language,
+        deadline=deadline
+    )
+    if not translations:
+        return results
+
+    new_entries = {}
+    for key, translation in zip(pending_keys, translations):
+        if translation is None:
+            continue
+        detected = translation.get('detectedSourceLanguage') or source_language
+        new_entries[key] = (translation['translatedText'], detected)
+        for index in missing[key]:
+            results[index] = {'translatedText': translation['translatedText'], 'detectedSourceLanguage': detected}
+    cache_put_many(new_entries)
+    return results
+
+def split_text(text, max_chars=TRANSLATION_CHUNK_CHARS):
+    """Cut text into chunks of at most max_chars, at sentence boundaries where possible
+
+    Joining the chunks gives back the original text exactly.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+
+    pieces = []
+    for sentence in sentences:
+        # A sentence longer than a chunk is cut at the last space that fits, or hard cut
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars) + 1 or max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ''
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _translate_chunk(client, text, target_language, source_language, deadline):
+    try:
+        return translate_batch(client, [text], target_language, source_language, deadline)[0]
+    except Exception:
+        return None
+
+def translate_document(client, text, target_language='en', source_language=None, max_chars=TRANSLATION_CHUNK_CHARS):
+    """Translate a text of any length in concurrent, sentence-aligned chunks
+
+    Returns {'translatedText', 'detectedSourceLanguage', 'chunks'}, or None if a
+    chunk still fails after TRANSLATION_CHUNK_RETRIES retries or by
+    TRANSLATION_DOCUMENT_DEADLINE.
+    """
+    deadline = time.monotonic() + TRANSLATION_DOCUMENT_DEADLINE
+    chunks = split_text(text, max_chars)
+    # Whitespace around each chunk is kept as is, only the words are translated
+    parts = [re.match(r'(\s*)(.*?)(\s*)$', chunk, re.DOTALL).groups() for chunk in chunks]
+    pending = [index for index, (_, core, _) in enumerate(parts) if core]
+    results = {}
+
+    for attempt in range(TRANSLATION_CHUNK_RETRIES + 1):
+        if attempt:
+            backoff = CHUNK_RETRY_BACKOFF * 2 ** (attempt - 1)
+            if time.monotonic() + backoff >= deadline:
+                break
+            TRANSLATION_CHUNKS.inc(len(pending), outcome='retried')
+            time.sleep(backoff)
+        futures = {
+            index: _chunk_executor.submit(contextvars.copy_context().run, _translate_chunk,
+                                          client, parts[index][1], target_language, source_language, deadline)
+            for index in pending
+        }
+        pending = []
+        for index, future in futures.items():
+            try:
+                result = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                result = None
+            if result is None:
+                pending.append(index)
+            else:
+                results[index] = result
+        if not pending:
+            break
+
+    TRANSLATION_CHUNKS.inc(len(results), outcome='translated')
+    if pending:
+        TRANSLATION_CHUNKS.inc(len(pending), outcome='failed')
+        return None
+
+    translated = ''.join(
+        leading + (results[index]['translatedText'] if core else '') + trailing
+        for index, (leading, core, trailing) in enumerate(parts)
+    )
+    detected = Counter(result['detectedSourceLanguage'] for result in results.values()
+                       if result.get('detectedSourceLanguage'))
+    return {
+        'translatedText': translated,
+        'detectedSourceLanguage': detected.most_common(1)[0][0] if detected else source_language,
+        'chunks': len(chunks)
+    }